@@ -0,0 +1,70 @@
+"""Measure the memory used per node by a large site object model.
+
+A synthetic content tree of JSON and YAML records (all of them sharing the
+same keys) is generated in a temporary directory and a som is created out of
+it. The memory retained by the som is measured with tracemalloc.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/node_memory.py --nodes 100000
+"""
+import json
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from spekulatio.som import SOM
+
+
+def create_records(root_path, nodes, fan_out):
+    """Create a content tree with ``nodes`` records in dirs of ``fan_out`` files."""
+    (root_path / '_values.json').write_text(json.dumps({
+        'site': 'benchmark',
+        'description': 'shared value ' * 100,
+    }))
+    for index in range(nodes):
+        dir_path = root_path / f"dir{index // fan_out:05d}"
+        if index % fan_out == 0:
+            dir_path.mkdir()
+        record = {
+            'title': f"Record {index}",
+            'position': index,
+            'tags': ['foo', 'bar'],
+        }
+        if index % 2:
+            (dir_path / f"record{index:07d}.json").write_text(json.dumps(record))
+        else:
+            lines = [f"title: {record['title']}", f"position: {index}", "tags: [foo, bar]"]
+            (dir_path / f"record{index:07d}.yaml").write_text('\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=100000, help="number of records")
+    parser.add_argument('--fan-out', type=int, default=1000, help="records per directory")
+    parser.add_argument('--jobs', type=int, default=1, help="extraction processes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root_path = Path(tmp_dir)
+        print(f"Creating {args.nodes} records...")
+        create_records(root_path, args.nodes, args.fan_out)
+
+        print("Creating som...")
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        som = SOM(root_path, jobs=args.jobs)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    node_count = len(som.map)
+    retained = current - baseline
+    print(f"nodes:          {node_count}")
+    print(f"retained:       {retained / 2**20:.1f} MiB")
+    print(f"peak:           {(peak - baseline) / 2**20:.1f} MiB")
+    print(f"bytes per node: {retained / node_count:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Time each phase of the build of a synthetic site.
+
+A site is generated with ``site_generator`` and built several times from
+scratch. The best time of each phase is reported:
+
+    :som: scanning the content folder, extracting the files and creating
+        the nodes.
+    :data: data inheritance.
+    :sorting: sorting the children of each directory.
+    :relationships: setting the prev/next/root links.
+    :templates: processing the template folder (static files, SCSS).
+    :render: rendering the pages and copying the static content files.
+
+Results can be saved as a baseline and later runs compared against it. The
+run fails (exit code 1) if any phase is slower than the baseline by more
+than the allowed regression. Baselines are machine specific, so compare
+results from the same machine only.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/run_benchmarks.py --save-baseline baseline.json
+    PYTHONPATH=. python benchmarks/run_benchmarks.py --compare baseline.json
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+from spekulatio.som import SOM
+from spekulatio.builder import SiteBuilder
+
+import site_generator
+
+PHASES = ('som', 'data', 'sorting', 'relationships', 'templates', 'render')
+
+# differences under this number of seconds are considered noise
+MIN_REGRESSION_SECONDS = 0.01
+
+
+@contextmanager
+def timer(timings, phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0) + time.perf_counter() - start
+
+
+class TimedSOM(SOM):
+    """SOM that records the time spent in each of the phases of its creation."""
+
+    def __init__(self, *args, timings, **kwargs):
+        self.timings = timings
+        super().__init__(*args, **kwargs)
+
+    def create_tree(self, *args, **kwargs):
+        with timer(self.timings, 'som'):
+            return super().create_tree(*args, **kwargs)
+
+    def set_node_data(self, node):
+        if node is not self.root_node:
+            return super().set_node_data(node)
+        with timer(self.timings, 'data'):
+            return super().set_node_data(node)
+
+    def sort_som_siblings(self, node, recursive=True):
+        if node is not self.root_node:
+            return super().sort_som_siblings(node, recursive)
+        with timer(self.timings, 'sorting'):
+            return super().sort_som_siblings(node, recursive)
+
+    def set_som_relationships(self):
+        with timer(self.timings, 'relationships'):
+            return super().set_som_relationships()
+
+
+def run_build(content_path, template_path, build_path, jobs, fork=None):
+    """Build a site from scratch and return the time spent in each phase."""
+    timings = {}
+    shutil.rmtree(build_path, ignore_errors=True)
+    build_path.mkdir()
+    builder = SiteBuilder(content_path, template_path, build_path, jobs=jobs, fork=fork)
+
+    with timer(timings, 'templates'):
+        builder.build_templates(no_cache=True)
+    with timer(timings, 'som'):
+        builder.scan_content()
+    builder.som = TimedSOM(content_path, jobs=jobs, tree=builder.content_tree, timings=timings)
+    with timer(timings, 'render'):
+        builder.build_content(no_cache=True)
+    return timings
+
+
+def compare_timings(timings, baseline, max_regression):
+    """Print the comparison of some timings and a baseline.
+
+    :return: list of the phases that are slower than allowed.
+    """
+    regressions = []
+    print(f"{'phase':<15}{'baseline':>10}{'current':>10}{'change':>10}")
+    for phase in PHASES:
+        current = timings[phase]
+        previous = baseline['timings'].get(phase)
+        if previous is None:
+            print(f"{phase:<15}{'-':>10}{current:>10.3f}")
+            continue
+        change = (current - previous) / previous if previous else 0
+        is_regression = (
+            current > previous * (1 + max_regression) and
+            current - previous > MIN_REGRESSION_SECONDS
+        )
+        mark = '  REGRESSION' if is_regression else ''
+        print(f"{phase:<15}{previous:>10.3f}{current:>10.3f}{change:>+10.1%}{mark}")
+        if is_regression:
+            regressions.append(phase)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    site_generator.add_arguments(parser)
+    parser.add_argument('--jobs', type=int, default=1, help="parallel jobs")
+    parser.add_argument('--threads', action='store_true',
+        help="render in threads instead of forked processes")
+    parser.add_argument('--repeat', type=int, default=3, help="number of builds")
+    parser.add_argument('--save-baseline', metavar='PATH', help="store results as baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare results with a baseline")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+        help="allowed slowdown per phase when comparing (default: 0.2, ie. 20%%)")
+    args = parser.parse_args()
+    parameters = site_generator.get_parameters(args)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        print(f"Generating site: {parameters}")
+        content_path, template_path = site_generator.generate_site(tmp_path, **parameters)
+
+        # keep the best time of each phase
+        timings = {}
+        for index in range(args.repeat):
+            run_timings = run_build(
+                content_path, template_path, tmp_path / 'build', args.jobs,
+                False if args.threads else None)
+            for phase, seconds in run_timings.items():
+                timings[phase] = min(seconds, timings.get(phase, seconds))
+            total = sum(run_timings.values())
+            print(f"Build {index + 1}/{args.repeat}: {total:.3f}s")
+
+    print()
+    for phase in PHASES:
+        print(f"{phase:<15}{timings[phase]:>10.3f}s")
+
+    results = {
+        'parameters': {**parameters, 'jobs': args.jobs, 'threads': args.threads},
+        'timings': timings,
+    }
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"\nBaseline saved in {args.save_baseline}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print()
+        if baseline['parameters'] != results['parameters']:
+            print("Warning: the baseline was generated with different parameters.")
+        regressions = compare_timings(timings, baseline, args.max_regression)
+        if regressions:
+            print(f"\nSlower than the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
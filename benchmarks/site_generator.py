@@ -0,0 +1,242 @@
+"""Generate synthetic sites to benchmark spekulatio.
+
+The generated project has the usual layout::
+
+    <path>/
+        content/
+        templates/
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/site_generator.py /tmp/site --pages 1000
+"""
+import json
+import random
+import argparse
+from pathlib import Path
+
+FORMATS = ('rst', 'md', 'yaml', 'json')
+SORTING_METHODS = ('none', 'name', 'field')
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud"
+).split()
+
+DEFAULT_PARAMETERS = {
+    'pages': 1000,
+    'depth': 3,
+    'fan_out': 5,
+    'formats': list(FORMATS),
+    'frontmatter_size': 5,
+    'body_size': 10,
+    'template_depth': 3,
+    'assets': 20,
+    'asset_size': 10000,
+    'seed': 0,
+}
+
+
+def get_text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+def get_dir_paths(depth, fan_out):
+    """Return the relative paths of the directories of a tree (root included)."""
+    dir_paths = [Path('.')]
+    level = [Path('.')]
+    for _ in range(depth):
+        level = [parent / f"dir{index}" for parent in level for index in range(fan_out)]
+        dir_paths.extend(level)
+    return dir_paths
+
+
+def get_frontmatter(index, frontmatter_size, rnd):
+    data = {
+        'title': f"Page {index}",
+        'position': rnd.randint(0, 1000),
+        'date': f"2020-01-{index % 28 + 1:02d}",
+    }
+    for key_index in range(frontmatter_size):
+        data[f"key{key_index}"] = get_text(rnd, 3)
+    return data
+
+
+def write_page(path, page_format, data, body_size, rnd):
+    """Write a content file with a frontmatter (or its data) and a body."""
+    if page_format == 'json':
+        data['body'] = [get_text(rnd, 30) for _ in range(body_size)]
+        path.with_suffix('.json').write_text(json.dumps(data))
+        return
+
+    frontmatter = '\n'.join(f"{key}: {json.dumps(value)}" for key, value in data.items())
+    if page_format == 'yaml':
+        body = '\n'.join(f"  - {json.dumps(get_text(rnd, 30))}" for _ in range(body_size))
+        path.with_suffix('.yaml').write_text(f"{frontmatter}\nbody:\n{body}\n")
+        return
+
+    sections = []
+    for section_index in range(body_size):
+        paragraph = get_text(rnd, 50)
+        if page_format == 'rst':
+            heading = f"Section {section_index}"
+            sections.append(f"{heading}\n{'-' * len(heading)}\n\n{paragraph}\n\n* {paragraph}\n")
+        else:
+            sections.append(f"## Section {section_index}\n\n{paragraph}\n\n* *{paragraph}*\n")
+    title = data['title']
+    if page_format == 'rst':
+        heading = f"{title}\n{'=' * len(title)}\n"
+    else:
+        heading = f"# {title}\n"
+    text = f"---\n{frontmatter}\n---\n\n{heading}\n" + '\n'.join(sections)
+    path.with_suffix(f".{page_format}").write_text(text)
+
+
+def write_templates(template_path, template_depth, assets, asset_size, rnd):
+    """Write a chain of templates extending each other plus static files."""
+    template_path.mkdir(parents=True)
+
+    # inheritance chain: base0.html <- base1.html <- ... <- layout.html
+    (template_path / 'base0.html').write_text(
+        '<html><head><title>{{ node.title }}</title>'
+        '<link rel="stylesheet" href="/css/main.css"></head>'
+        '<body>{% include "nav.html" %}{% block body %}{% endblock %}</body></html>'
+    )
+    for level in range(1, template_depth):
+        (template_path / f"base{level}.html").write_text(
+            f'{{% extends "base{level - 1}.html" %}}'
+            f'{{% block body %}}<div class="level{level}">{{{{ super() }}}}'
+            f'{{% block level{level} %}}{{% endblock %}}</div>{{% endblock %}}'
+        )
+    (template_path / 'layout.html').write_text(
+        f'{{% extends "base{template_depth - 1}.html" %}}'
+        '{% block body %}{{ super() }}<main>'
+        '<h1>{{ node.title }}</h1>'
+        '<dl>{% for key, value in data.items() %}<dt>{{ key }}</dt>'
+        '<dd>{{ value }}</dd>{% endfor %}</dl>'
+        '{{ node.content or "" }}'
+        '</main>{% endblock %}'
+    )
+    (template_path / 'nav.html').write_text(
+        '<nav>'
+        '{% if node.prev %}<a href="{{ node.prev.url }}">{{ node.prev.title }}</a>{% endif %}'
+        '{% if node.next %}<a href="{{ node.next.url }}">{{ node.next.title }}</a>{% endif %}'
+        '{% if node.parent %}<ul>{% for sibling in node.parent.children %}'
+        '<li><a href="{{ sibling.url }}">{{ sibling.title }}</a></li>'
+        '{% endfor %}</ul>{% endif %}'
+        '</nav>'
+    )
+
+    # style sheets
+    css_path = template_path / 'css'
+    css_path.mkdir()
+    imports = []
+    for index in range(10):
+        (css_path / f"_part{index}.scss").write_text(
+            f"$color{index}: #{index}{index}{index};\n.part{index} {{ color: $color{index}; }}\n"
+        )
+        imports.append(f'@import "part{index}";')
+    (css_path / 'main.scss').write_text('\n'.join(imports) + '\nbody { margin: 0; }\n')
+
+    # (the names differ from the ones of the content assets so that they don't
+    # overwrite each other in the build directory)
+    write_assets(template_path / 'static', assets, asset_size, rnd, prefix='theme')
+
+
+def write_assets(path, assets, asset_size, rnd, prefix='asset'):
+    path.mkdir(parents=True, exist_ok=True)
+    for index in range(assets):
+        # (Random.randbytes needs Python 3.9 and older versions of getrandbits
+        # don't accept 0)
+        data = rnd.getrandbits(asset_size * 8).to_bytes(asset_size, 'little') if asset_size else b''
+        (path / f"{prefix}{index}.bin").write_bytes(data)
+
+
+def generate_site(path, pages=1000, depth=3, fan_out=5, formats=FORMATS, frontmatter_size=5,
+        body_size=10, template_depth=3, assets=20, asset_size=10000, seed=0):
+    """Generate a synthetic site at path.
+
+    :param pages: number of content pages.
+    :param depth: depth of the directory tree of the content.
+    :param fan_out: number of subdirectories in each directory.
+    :param formats: formats of the pages (they're used in turns).
+    :param frontmatter_size: number of extra keys in the metadata of each page.
+    :param body_size: number of sections (or list items) of each page.
+    :param template_depth: number of levels of template inheritance.
+    :param assets: number of static files in the content and template folders.
+    :param asset_size: size in bytes of each static file.
+    :param seed: seed used to generate the random texts.
+    :return: (content_path, template_path)
+    """
+    rnd = random.Random(seed)
+    path = Path(path)
+    content_path = path / 'content'
+    template_path = path / 'templates'
+
+    # directories and their data
+    dir_paths = get_dir_paths(depth, fan_out)
+    for dir_index, dir_path in enumerate(dir_paths):
+        (content_path / dir_path).mkdir(parents=True, exist_ok=True)
+        sorting_method = SORTING_METHODS[dir_index % len(SORTING_METHODS)]
+        dir_data = {
+            '_sorting_method': sorting_method,
+            'section': str(dir_path),
+            'position': dir_index,
+        }
+        if sorting_method == 'field':
+            dir_data['_sorting_data'] = 'position'
+        (content_path / dir_path / '_values.json').write_text(json.dumps(dir_data))
+
+    # pages (distributed among all the directories)
+    for index in range(pages):
+        dir_path = content_path / dir_paths[index % len(dir_paths)]
+        data = get_frontmatter(index, frontmatter_size, rnd)
+        page_format = formats[index % len(formats)]
+        write_page(dir_path / f"page{index:06d}", page_format, data, body_size, rnd)
+
+    write_assets(content_path / 'static', assets, asset_size, rnd)
+    write_templates(template_path, template_depth, assets, asset_size, rnd)
+    return content_path, template_path
+
+
+def add_arguments(parser):
+    """Add the parameters of the generator to an argument parser."""
+    defaults = DEFAULT_PARAMETERS
+    parser.add_argument('--pages', type=int, default=defaults['pages'],
+        help="number of pages")
+    parser.add_argument('--depth', type=int, default=defaults['depth'],
+        help="depth of the directory tree")
+    parser.add_argument('--fan-out', type=int, default=defaults['fan_out'],
+        help="subdirectories per directory")
+    parser.add_argument('--formats', type=lambda value: value.split(','),
+        default=defaults['formats'], help="comma separated formats of the pages")
+    parser.add_argument('--frontmatter-size', type=int, default=defaults['frontmatter_size'],
+        help="extra metadata keys per page")
+    parser.add_argument('--body-size', type=int, default=defaults['body_size'],
+        help="sections per page")
+    parser.add_argument('--template-depth', type=int, default=defaults['template_depth'],
+        help="levels of template inheritance")
+    parser.add_argument('--assets', type=int, default=defaults['assets'],
+        help="static files in the content and template folders")
+    parser.add_argument('--asset-size', type=int, default=defaults['asset_size'],
+        help="size in bytes of each static file")
+    parser.add_argument('--seed', type=int, default=defaults['seed'],
+        help="random seed")
+
+
+def get_parameters(args):
+    """Return the generator parameters of some parsed arguments."""
+    return {name: getattr(args, name) for name in DEFAULT_PARAMETERS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="directory where the site is generated")
+    add_arguments(parser)
+    args = parser.parse_args()
+    content_path, template_path = generate_site(args.path, **get_parameters(args))
+    print(f"Site generated in {content_path} and {template_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,10 @@ setuptools.setup(
         "rst2html5>=1.10.1",
         "markdown>=3.3.3",
     ],
+    extras_require={
+        'watch': ["inotify_simple>=1.3"],
+        'fast': ["orjson>=3.0"],
+    },
     entry_points={
         'console_scripts': ['spekulatio=spekulatio.commands:create_site'],
     }
@@ -1 +1,6 @@
 from .build_file_tree import build_file_tree  # noqa
+from .dependencies import DependencyTracker  # noqa
+from .fragments import FragmentStore  # noqa
+from .manifest import BuildManifest  # noqa
+from .manifest import write_output  # noqa
+from .manifest import write_output_stream  # noqa
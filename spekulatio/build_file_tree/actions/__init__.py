@@ -1,5 +1,9 @@
 from .ignore import ignore  # noqa
 from .copy import copy  # noqa
+from .copy import copy_factory  # noqa
+from .copy import copy_modes  # noqa
 from .compile_scss import compile_scss  # noqa
+from .compile_scss import compile_scss_factory  # noqa
 from .render_html import render_html_factory  # noqa
+from .render_html import create_environment  # noqa
 
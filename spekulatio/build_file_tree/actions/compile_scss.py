@@ -1,13 +1,209 @@
 
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
 import sass
 
-def compile_scss(root_src_path, src_path, root_dst_path, dst_path):
-    """Compile SCSS into CSS."""
+from ..manifest import write_output
+
+# @import, @use and @forward rules (the paths are the quoted strings in them)
+IMPORT_RULE_RE = re.compile(r'@(import|use|forward)\s+([^;{}]+)')
+QUOTED_RE = re.compile(r'''["']([^"']+)["']''')
+COMMENT_RE = re.compile(r'/\*.*?\*/|//[^\n]*', re.DOTALL)
+
+
+def get_import_names(text):
+    """Return the names of the stylesheets imported by a SCSS text.
+
+    Plain CSS imports (urls, '.css' files) and built-in modules are ignored.
+    """
+    names = []
+    for rule, arguments in IMPORT_RULE_RE.findall(COMMENT_RE.sub('', text)):
+        quoted = QUOTED_RE.findall(arguments)
+        if rule != 'import':
+            # '@use "name" with (...)' only references one stylesheet
+            quoted = quoted[:1]
+        for name in quoted:
+            if (name.startswith(('sass:', 'http://', 'https://', '//', 'url(')) or
+                    name.endswith('.css')):
+                continue
+            names.append(name)
+    return names
+
+
+def resolve_import(dir_path, name):
+    """Return the path of the file referenced by an import name (or None).
+
+    The name is resolved as Sass does: partials (with a leading underscore)
+    and index files are tried too.
+    """
+    path = dir_path / name
+    if path.suffix in ('.scss', '.sass'):
+        candidates = [path.with_name(f"_{path.name}"), path]
+    else:
+        candidates = [
+            path.with_name(f"_{path.name}.scss"), path.with_name(f"{path.name}.scss"),
+            path.with_name(f"_{path.name}.sass"), path.with_name(f"{path.name}.sass"),
+            path / '_index.scss', path / 'index.scss',
+        ]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def is_partial(path):
+    """Check if a stylesheet is only meant to be imported by other ones."""
+    return path.name.startswith('_')
+
+
+def compile_file(filename):
+    """Compile a SCSS file (this function may run in a worker process)."""
+    return sass.compile(filename=filename)
+
+
+def compile_scss_factory(cache_path=None, executor=None):
+    """Create an action that compiles SCSS files into CSS.
+
+    The ``@import``/``@use``/``@forward`` graph of every stylesheet is
+    tracked, so:
+
+    * partials (files starting with '_') aren't compiled on their own: they
+      only exist to be imported.
+    * an output is only regenerated when the entry file or any of the files
+      it imports (directly or transitively) is modified.
+
+    :param cache_path: optional directory where the compiled CSS of each
+        entry file is stored along with the hash and the modification times
+        of its sources. If the sources didn't change the stored CSS is used
+        instead of compiling them again. The modification times are used to
+        check if an output is up to date (outputs whose content doesn't change
+        aren't written again, so their own mtime can't be used for it).
+    :param executor: optional executor (eg. a process pool) used to compile
+        the stylesheets. libsass doesn't release the GIL, so entry files
+        processed concurrently by several threads are only compiled in
+        parallel when run in worker processes.
+    """
+    cache_path = Path(cache_path) if cache_path is not None else None
+
+    # imports found in each file (with the mtime of the file when parsed)
+    imports = {}
+    lock = threading.Lock()
+
+    def get_imports(path):
+        mtime = os.stat(path).st_mtime_ns
+        with lock:
+            memo = imports.get(path)
+        if memo is not None and memo[0] == mtime:
+            return memo[1]
+
+        text = path.read_text()
+        import_paths = []
+        for name in get_import_names(text):
+            import_path = resolve_import(path.parent, name)
+            if import_path is None:
+                logging.debug(f"Can't resolve import '{name}' in {path}")
+            else:
+                import_paths.append(import_path)
+        with lock:
+            imports[path] = (mtime, import_paths)
+        return import_paths
+
+    def get_dependencies(path):
+        """Return the stylesheet and all the ones it imports transitively."""
+        dependencies = []
+        pending = [path]
+        seen = set()
+        while pending:
+            dependency = pending.pop()
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            dependencies.append(dependency)
+            pending.extend(get_imports(dependency))
+        return dependencies
+
+    def get_sources_hash(dependencies):
+        digest = hashlib.sha256(sass.__version__.encode())
+        for dependency in dependencies:
+            digest.update(f"\0{dependency}\0".encode())
+            digest.update(dependency.read_bytes())
+        return digest.hexdigest()
+
+    def get_mtimes(dependencies):
+        return {str(dependency): os.stat(dependency).st_mtime_ns for dependency in dependencies}
+
+    def get_cache_entry_path(src_path):
+        name = hashlib.sha256(str(src_path.absolute()).encode()).hexdigest()
+        return cache_path / f"{name}.json"
+
+    def read_cache_entry(src_path):
+        try:
+            return json.loads(get_cache_entry_path(src_path).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def write_cache_entry(src_path, entry):
+        entry_path = get_cache_entry_path(src_path)
+        cache_path.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.with_name(f"{entry_path.name}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        os.replace(tmp_path, entry_path)
+
+    def run_compiler(src_path):
+        if executor is None:
+            return compile_file(str(src_path))
+        return executor.submit(compile_file, str(src_path)).result()
+
+    def compile_scss(root_src_path, src_path, root_dst_path, dst_path):
+        """Compile SCSS into CSS."""
+        if is_partial(src_path):
+            return
+
+        # get content (from the cache if the sources didn't change)
+        dependencies = get_dependencies(src_path)
+        content = None
+        if cache_path is not None:
+            mtimes = get_mtimes(dependencies)
+            sources_hash = get_sources_hash(dependencies)
+            entry = read_cache_entry(src_path)
+            if entry is not None and entry.get('hash') == sources_hash:
+                content = entry['css']
+
+        if content is None:
+            content = run_compiler(src_path)
+        if cache_path is not None:
+            write_cache_entry(src_path, {'hash': sources_hash, 'css': content, 'mtimes': mtimes})
+
+        # write file
+        new_dst_path = dst_path.with_suffix('.css')
+        write_output(new_dst_path, content)
+
+    def is_up_to_date(root_src_path, src_path, root_dst_path, dst_path):
+        if is_partial(src_path):
+            return True
+        try:
+            if cache_path is not None:
+                entry = read_cache_entry(src_path)
+                return (
+                    entry is not None and os.path.exists(dst_path) and
+                    entry.get('mtimes') == get_mtimes(get_dependencies(src_path))
+                )
+            dst_timestamp = os.stat(dst_path).st_mtime_ns
+            return all(
+                os.stat(dependency).st_mtime_ns <= dst_timestamp
+                for dependency in get_dependencies(src_path)
+            )
+        except OSError:
+            return False
 
-    # get content
-    content = sass.compile(filename=str(src_path))
+    compile_scss.is_up_to_date = is_up_to_date
+    return compile_scss
 
-    # write file
-    new_dst_path = dst_path.with_suffix('.css')
-    new_dst_path.write_text(content)
 
+compile_scss = compile_scss_factory()
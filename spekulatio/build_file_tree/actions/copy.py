@@ -1,6 +1,144 @@
+import os
+import stat
+import errno
 import shutil
+import logging
+import threading
 
-def copy(root_src_path, src_path, root_dst_path, dst_path):
-    """Copy file without transformation"""
-    shutil.copy(src_path.absolute(), dst_path.absolute())
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
+# ioctl request to clone the extents of a file (Linux: btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# errors meaning that a copy method isn't supported for a pair of files
+UNSUPPORTED_ERRORS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP, errno.EBADF,
+    errno.EPERM,
+}
+
+copy_modes = ('copy', 'hardlink', 'symlink')
+
+
+def _reflink(src_file, dst_file):
+    """Make dst_file share the data blocks of src_file (copy on write)."""
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks aren't supported")
+    fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+
+
+def _get_chunk_size(src_file):
+    size = os.fstat(src_file.fileno()).st_size
+    return min(max(size, 2 ** 23), 2 ** 30)
+
+
+def _copy_file_range(src_file, dst_file):
+    """Copy a file inside the kernel with copy_file_range."""
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "copy_file_range isn't available")
+    chunk_size = _get_chunk_size(src_file)
+    while os.copy_file_range(src_file.fileno(), dst_file.fileno(), chunk_size):
+        pass
+
+
+def _sendfile(src_file, dst_file):
+    """Copy a file inside the kernel with sendfile."""
+    chunk_size = _get_chunk_size(src_file)
+    while os.sendfile(dst_file.fileno(), src_file.fileno(), None, chunk_size):
+        pass
+
+
+def _copy_data(src_path, dst_path):
+    """Copy the content of a file using the fastest method available."""
+    with open(src_path, 'rb') as src_file, open(dst_path, 'wb') as dst_file:
+        for copy_method in (_reflink, _copy_file_range, _sendfile):
+            try:
+                copy_method(src_file, dst_file)
+                return
+            except OSError as err:
+                if err.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                src_file.seek(0)
+                dst_file.seek(0)
+                dst_file.truncate()
+        shutil.copyfileobj(src_file, dst_file)
+
+
+def _create_copy(src_path, tmp_path, mode):
+    """Create the destination file at tmp_path using the given mode.
+
+    Links that can't be created (eg. hardlinks across file systems) are
+    replaced by copies.
+    """
+    if mode == 'symlink':
+        os.symlink(os.path.abspath(src_path), tmp_path)
+        return
+
+    if mode == 'hardlink':
+        try:
+            os.link(src_path, tmp_path)
+            return
+        except OSError as err:
+            logging.debug(f"Can't hardlink {src_path}, copying it: {err}")
+
+    _copy_data(src_path, tmp_path)
+    shutil.copystat(src_path, tmp_path)
+
+
+def copy_factory(mode='copy'):
+    """Create a copy action.
+
+    :param mode: how static files are copied:
+
+        :copy: the files are cloned if the file system supports reflinks and
+            copied inside the kernel (copy_file_range/sendfile) otherwise.
+            Modification times are preserved.
+        :hardlink: the destination is a hardlink to the source file (useful for
+            development builds). Falls back to copying.
+        :symlink: the destination is a symbolic link to the source file.
+
+    The action comes with an ``is_up_to_date`` check that skips the files
+    whose destination has the same size and modification time as the source
+    (or, for links, already points to it).
+    """
+    if mode not in copy_modes:
+        raise ValueError(f"Unknown copy mode '{mode}'. Valid values: {', '.join(copy_modes)}.")
+
+    def copy(root_src_path, src_path, root_dst_path, dst_path):
+        """Copy file without transformation"""
+        tmp_path = dst_path.with_name(f".{dst_path.name}.{threading.get_ident()}.tmp")
+        try:
+            _create_copy(src_path, tmp_path, mode)
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def is_up_to_date(root_src_path, src_path, root_dst_path, dst_path):
+        try:
+            src_stat = os.stat(src_path)
+            dst_stat = os.lstat(dst_path)
+        except OSError:
+            return False
+
+        if stat.S_ISLNK(dst_stat.st_mode):
+            return mode == 'symlink' and os.readlink(dst_path) == os.path.abspath(src_path)
+        if mode == 'symlink':
+            return False
+        if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            return mode == 'hardlink'
+        return (
+            dst_stat.st_size == src_stat.st_size and
+            dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+        )
+
+    copy.is_up_to_date = is_up_to_date
+    return copy
+
+
+copy = copy_factory()
@@ -0,0 +1,90 @@
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from spekulatio.som.node import Node
+from ..dependencies import fetched_nodes
+from ..dependencies import add_fetched_nodes
+
+
+def get_fragment_key(template_name, lineno, keys):
+    """Return the key of a fragment out of the position of its block and its keys.
+
+    Nodes are identified by their path, so keys are the same across builds.
+    """
+    parts = [template_name or '', str(lineno)]
+    for key in keys:
+        parts.append(f"node:{key}" if isinstance(key, Node) else repr(key))
+    return '\0'.join(parts)
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension that renders a block only once per key.
+
+    Usage::
+
+        {% cache node.parent %}
+            ... menu of the pages of the section ...
+        {% endcache %}
+
+    The first time a block is rendered with some keys (any number of
+    expressions separated by commas), its output is stored and reused by all
+    the pages that render the same block with the same keys. So the keys must
+    include everything that makes the output of the block different.
+
+    Fragments are kept in ``environment.fragment_cache``, which is meant to be
+    reset for every build (see ``set_environment_som``). If
+    ``environment.fragment_store`` is set to a FragmentStore, fragments are
+    also kept between builds.
+
+    The nodes in the keys and the ones read while rendering the block (eg.
+    the children of a node or the ones fetched with ``get_node``) are
+    recorded as dependencies of every page that uses the fragment.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache={}, fragment_store=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        # keys
+        keys = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        arguments = [nodes.Const(parser.name), nodes.Const(lineno), nodes.List(keys)]
+        call = self.call_method('_render_fragment', arguments)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, template_name, lineno, keys, caller):
+        env = self.environment
+        key = get_fragment_key(template_name, lineno, keys)
+
+        fragment = env.fragment_cache.get(key)
+        if fragment is None and env.fragment_store is not None:
+            fragment = env.fragment_store.get(env.som, key)
+            if fragment is not None:
+                env.fragment_cache[key] = fragment
+
+        if fragment is None:
+            token = fetched_nodes.set(set())
+            try:
+                html = caller()
+                used_nodes = fetched_nodes.get()
+            finally:
+                fetched_nodes.reset(token)
+            used_nodes.update(key for key in keys if isinstance(key, Node))
+            fragment = (html, list(used_nodes))
+            env.fragment_cache[key] = fragment
+            if env.fragment_store is not None:
+                env.fragment_store.set(env.som, env, key, template_name, html, used_nodes)
+
+        html, used_nodes = fragment
+        add_fetched_nodes(used_nodes)
+        return Markup(html)
@@ -1,15 +1,143 @@
+
 import logging
+import threading
 
 import jinja2
 
+from spekulatio.som import SOM
+from spekulatio.som import Query
+from spekulatio.som.node import Node
+from ..manifest import write_output
+from ..manifest import write_output_stream
+from ..dependencies import fetched_nodes
+from ..dependencies import SOM_KEY
+from ..dependencies import add_fetched_nodes
+from ..dependencies import add_query_dependencies
+from .fragment_cache import FragmentCacheExtension
+
+
+class TemplateLoader(jinja2.FileSystemLoader):
+    """Template loader that can be shared by several rendering threads.
+
+    Loading is serialized so that a template requested concurrently by
+    several pages is still compiled only once: the environment only asks
+    the loader for the templates that aren't in its cache (or are outdated),
+    and the loader returns the template loaded by another thread in the
+    meantime if it is still up to date.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+        self.templates = {}
+
+    def load(self, environment, name, globals=None):
+        with self.lock:
+            template = self.templates.get(name)
+            if template is None or not template.is_up_to_date:
+                template = super().load(environment, name, globals)
+                self.templates[name] = template
+            return template
+
+
+class Environment(jinja2.Environment):
+    """Jinja environment that records the nodes used by the templates.
+
+    The nodes whose attributes or items are read by the templates (and the
+    som, if it is accessed directly) are recorded in ``fetched_nodes``, so
+    they're tracked as dependencies of the page being rendered.
+    """
+
+    def getattr(self, obj, attribute):
+        if isinstance(obj, (Node, SOM)):
+            _add_fetched_node(obj)
+        return super().getattr(obj, attribute)
+
+    def getitem(self, obj, argument):
+        if isinstance(obj, (Node, SOM)):
+            _add_fetched_node(obj)
+        return super().getitem(obj, argument)
+
+
+def _add_fetched_node(obj):
+    fetched = fetched_nodes.get()
+    if fetched is not None:
+        fetched.add(SOM_KEY if isinstance(obj, SOM) else obj)
+
+
+def create_environment(template_paths, auto_reload=False):
+    """Create the templating environment used to render the pages of a site.
+
+    Compiled templates are kept in the environment cache, so each template is
+    only loaded and compiled once regardless of the number of pages that use
+    it. If ``auto_reload`` is True, templates modified on disk are compiled
+    again the next time they're used (useful for long running processes).
+
+    Templates can use ``{% cache key %}...{% endcache %}`` blocks to render
+    fragments shared by many pages only once (see FragmentCacheExtension).
+
+    :param template_paths: paths where to find the templates
+    """
+    loader = TemplateLoader(template_paths, followlinks=True)
+    env = Environment(loader=loader, cache_size=-1, auto_reload=auto_reload,
+        extensions=[FragmentCacheExtension])
+    env.som = None
+
+    def get_node(path):
+        node = env.som.map[path]
+        add_fetched_nodes((node,))
+        return node
+
+    def get_node_by_url(url):
+        node = env.som.by_url.get(url)
+        if node is not None:
+            add_fetched_nodes((node,))
+        return node
+
+    env.globals.update(
+        get_node=get_node,
+        get_node_by_url=get_node_by_url,
+    )
+    return env
+
+
+def set_environment_som(env, som):
+    """Set the som used by the globals of a templating environment.
+
+    A new ``query`` global and a new fragment cache are created each time,
+    so their memoized results are only reused within a build.
+    """
+    env.som = som
+    env.fragment_cache = {}
+    env.globals['som'] = som
+    env.globals['query'] = Query(
+        som, on_result=add_fetched_nodes, on_query=add_query_dependencies)
+
 
-def render_html_factory(som, template_paths):
+def render_html_factory(som, template_paths, dependencies=None, env=None, stream=False,
+        fragment_store=None):
     """Create a render function using a som and a list of template dirs.
 
     :param som: site object model to use as source of contents
     :param template_paths: paths where to find the templates
+    :param dependencies: optional DependencyTracker. If set, the dependencies
+        of each rendered page are recorded and pages are only regenerated
+        when some of them change.
+    :param env: optional environment created with ``create_environment`` to
+        reuse its compiled templates. A new one is created if not provided.
+    :param stream: if True, pages are written while they're rendered
+        instead of being rendered in memory first. This reduces the memory
+        used by very big pages.
+    :param fragment_store: optional FragmentStore where the fragments of the
+        ``{% cache %}`` blocks are kept between builds.
     """
 
+    # initialize templating environment (shared by all the pages)
+    if env is None:
+        env = create_environment(template_paths)
+    set_environment_som(env, som)
+    env.fragment_store = fragment_store
+
     def render_html(root_src_path, src_path, root_dst_path, dst_path):
 
         # get node
@@ -20,16 +148,50 @@ def render_html_factory(som, template_paths):
             logging.debug(f"{src_name} won't generate HTML")
             return
 
-        # initialize templating environment
-        loader = jinja2.FileSystemLoader(template_paths, followlinks=True)
-        env = jinja2.Environment(loader=loader)
-        env.globals.update(get_node=lambda path: som.map[path])
-
         # create html
         template_name = node.data.get('_template', 'layout.html')
         template = env.get_template(template_name)
-        content = template.render(node=node, data=node.data)
-        dst_path.write_text(content)
+        token = fetched_nodes.set(set())
+        try:
+            if stream:
+                chunks = template.generate(node=node, data=node.data)
+                write_output_stream(dst_path, chunks)
+            else:
+                content = template.render(node=node, data=node.data)
+                write_output(dst_path, content)
+            nodes = fetched_nodes.get()
+        finally:
+            fetched_nodes.reset(token)
 
-    return render_html
+        # free the converted content of lazily loaded nodes
+        node.release_content()
+
+        # save dependencies
+        if dependencies is not None:
+            nodes.update((node, node.prev, node.next))
+            nodes.discard(None)
+            dependencies.record(som, env, dst_path, template_name, nodes)
 
+    def is_up_to_date(root_src_path, src_path, root_dst_path, dst_path):
+        return dependencies.is_up_to_date(som, env, dst_path)
+
+    # dependencies and fragments recorded by forked workers (see build_file_tree)
+    def export_state(dst_path):
+        return {
+            'dependencies': dependencies.get_record(dst_path) if dependencies else None,
+            'fragments': fragment_store.pop_new_records() if fragment_store else None,
+        }
+
+    def import_state(dst_path, state):
+        if state['dependencies'] is not None:
+            dependencies.set_record(dst_path, state['dependencies'])
+        if state['fragments']:
+            fragment_store.update(state['fragments'])
+
+    if dependencies is not None:
+        render_html.is_up_to_date = is_up_to_date
+    if dependencies is not None or fragment_store is not None:
+        render_html.export_state = export_state
+        render_html.import_state = import_state
+
+    return render_html
@@ -1,9 +1,26 @@
+import gc
+import os
+import stat
+import time
 import logging
+import multiprocessing
+from pathlib import Path
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
 
 from .actions import copy
+from .manifest import current_manifest
+from ..walker import ScannedDir
+from ..walker import scan_tree
+from ..profiler import Profiler
 
+# state inherited by the forked worker processes (see _run_forked)
+_forked_state = None
 
-def build_file_tree(src_path, dst_path, no_cache, actions):
+
+def build_file_tree(src_path, dst_path, no_cache, actions, jobs=1, manifest=None,
+        default_action=copy, tree=None, profiler=None, processes=1):
     """Build a file tree at dst_path by perfoming a set of actions per file
     type over src_path.
 
@@ -21,15 +38,16 @@ def build_file_tree(src_path, dst_path, no_cache, actions):
         :dst_path: it the path object of the output file
 
     The default action for a file is just to be copied over the destination file
-    tree without transformation.
+    tree without transformation (see ``default_action``).
 
     To skip a file just pass an action function that does nothing.
 
     :param src_path: source directory.
     :param dst_path: destination directory.
     :param no_cache: if False, output files will only be generated if
-        the source file is more modern than its destination. If True, all files
-        will be generated irrespectively of their timestamp.
+        the source file is more modern than its destination (or, if the action
+        has an ``is_up_to_date`` attribute, when it returns False). If True,
+        all files will be generated irrespectively of their timestamp.
     :param actions: map of suffixes and functions. For example::
 
             {
@@ -40,51 +58,237 @@ def build_file_tree(src_path, dst_path, no_cache, actions):
         You can pass both a function of a tuple with two elements. If you pass a
         tuple, the first element must be the extension to use in the output file,
         and the second element must be the function itself.
+    :param jobs: number of worker threads used to run the actions. Threads
+        only run Python code one at a time, so they speed up I/O-bound
+        actions (eg. copies) but not CPU-bound ones (eg. rendering), which
+        need ``processes``.
+    :param manifest: optional BuildManifest. If set, the outputs that
+        actions write with ``write_output`` are only written when their
+        content changes, and the outputs of this tree whose source file
+        doesn't exist anymore are deleted at the end.
+    :param default_action: action for the files whose suffix isn't in
+        ``actions`` (by default, a copy action created with ``copy_factory``).
+    :param tree: optional ScannedDir of src_path (see ``scan_tree``) so a scan
+        of the source directory can be shared with other consumers. If not
+        provided, src_path is scanned.
+    :param profiler: optional Profiler where the time spent in the action of
+        each file is recorded.
+    :param processes: if greater than one, the actions are run in that number
+        of forked worker processes instead of threads (see ``_run_forked``).
 
     Output files have the same filename as the input files unless a new extension
     is specified in ``actions``, in which case the stem will be the same but the
     extension will be modified.
+
+    If ``jobs`` is greater than one, the actions are run in a pool of threads.
+    Directories are always created before any of the files they contain is
+    processed. Errors are logged per file as they happen and summarized at the
+    end.
+
+    :return: list of the source files that couldn't be processed.
     """
     logging.debug(f"- Building from {src_path}")
-    _build_file_tree(src_path, dst_path, src_path, no_cache, actions)
+    if tree is None:
+        tree = scan_tree(src_path, jobs=jobs)
+    file_jobs = _build_file_tree(dst_path, tree, actions, default_action)
+    process_file = partial(_process_file, src_path, dst_path, no_cache, manifest, profiler)
+
+    # run actions
+    if processes > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        results = _run_forked(
+            src_path, dst_path, no_cache, manifest, profiler, list(file_jobs), processes)
+    elif jobs > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(process_file, file_jobs))
+    else:
+        results = [process_file(file_job) for file_job in file_jobs]
+
+    # report failures
+    failures = [src_file_path for src_file_path in results if src_file_path is not None]
+    if failures:
+        logging.error(f"{len(failures)} file(s) in {src_path} couldn't be processed:")
+        for src_file_path in failures:
+            logging.error(f"  {src_file_path}")
 
+    # delete orphaned outputs
+    if manifest is not None:
+        manifest.prune(src_path, dst_path)
 
-def _build_file_tree(root_src_path, root_dst_path, current_dir, no_cache, actions):
-    """Process recursively all the directories that hang from current_dir."""
-    for src_path in current_dir.iterdir():
+    return failures
 
-        # get path in destination
-        relative_src_path = src_path.relative_to(root_src_path)
-        dst_path = root_dst_path.joinpath(*relative_src_path.parts)
 
-        if src_path.is_dir():
+def _build_file_tree(root_dst_path, scanned_dir, actions, default_action):
+    """Process recursively all the directories that hang from scanned_dir.
+
+    Directories are created in the destination while traversing the tree and
+    a tuple ``(action, src_path, dst_path, entry)`` is yielded for each file
+    (where ``entry`` is its ``os.DirEntry``). Since this is a generator,
+    directories are always created before the files in them are yielded.
+    """
+    for entry in scanned_dir.entries:
+
+        if isinstance(entry, ScannedDir):
             # create directory
+            dst_path = root_dst_path / entry.relative_path
             logging.debug(f"directory: {dst_path}")
             dst_path.mkdir(parents=True, exist_ok=True)
 
             # process its children
-            _build_file_tree(root_src_path, root_dst_path, src_path, no_cache, actions)
+            yield from _build_file_tree(root_dst_path, entry, actions, default_action)
         else:
+            # get path in destination
+            src_path = Path(entry.path)
+            dst_path = root_dst_path / scanned_dir.get_relative_path(entry.name)
+
             # get new suffix and action function
-            value = actions.get(relative_src_path.suffix, copy)
+            value = actions.get(src_path.suffix, default_action)
             if isinstance(value, (tuple, list)):
                 dst_path = dst_path.with_suffix(value[0])
                 action = value[1]
             else:
                 action = value
 
-            # check age of destination file
-            if dst_path.is_file() and no_cache is False:
-                dst_timestamp = dst_path.stat().st_mtime
-                src_timestamp = src_path.stat().st_mtime
-                if dst_timestamp >= src_timestamp:
-                    logging.debug(f"(up-to-date): {dst_path}")
-                    continue
-
-            # perform action
-            logging.debug(f"{action.__name__}: {dst_path}")
-            try:
-                action(root_src_path, src_path, root_dst_path, dst_path)
-            except Exception as err:
-                logging.exception(f"Error while processing {src_path}: {err}")
+            yield action, src_path, dst_path, entry
+
+
+def _process_file(root_src_path, root_dst_path, no_cache, manifest, profiler, file_job):
+    """Run the action of a file.
+
+    :return: the source path if the action failed or None otherwise.
+    """
+    action, src_path, dst_path, entry = file_job
+    failed = False
+
+    # check if the destination file needs to be generated
+    if no_cache is False and _is_up_to_date(
+            action, root_src_path, src_path, root_dst_path, dst_path, entry):
+        logging.debug(f"(up-to-date): {dst_path}")
+    else:
+        # perform action
+        logging.debug(f"{action.__name__}: {dst_path}")
+        token = current_manifest.set(manifest)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            action(root_src_path, src_path, root_dst_path, dst_path)
+        except Exception as err:
+            logging.exception(f"Error while processing {src_path}: {err}")
+            failed = True
+        finally:
+            current_manifest.reset(token)
+            if profiler is not None:
+                wall = time.perf_counter() - wall_start
+                cpu = time.thread_time() - cpu_start
+                profiler.record_file('action', action.__name__, src_path, wall, cpu)
+
+    # register the output (actions like ignore don't generate any). The
+    # previous output of a failed action is kept too: its source still exists
+    if manifest is not None and dst_path.exists():
+        manifest.add(dst_path, src_path)
+    return src_path if failed else None
+
+
+def _run_forked(root_src_path, root_dst_path, no_cache, manifest, profiler, file_jobs,
+        processes):
+    """Run the actions of a list of files in forked worker processes.
+
+    The workers are forked once all the state the actions need (eg. the som
+    and the templating environment) has been built, so they inherit it
+    copy-on-write instead of receiving it pickled: only the indexes of the
+    files are sent to them. Before forking, the objects tracked by the
+    garbage collector are frozen so collections in the workers don't touch
+    them (which would copy the memory pages that contain them).
+
+    What the workers record for each output is sent back to this process:
+    its manifest record, the timings of the profiler and, if the action has
+    an ``export_state`` attribute, the state returned by
+    ``export_state(dst_path)``, which is passed to the ``import_state(dst_path,
+    state)`` attribute of the action here.
+
+    :return: the result of ``_process_file`` for each file.
+    """
+    global _forked_state
+
+    # split the files in chunks (several per worker to balance the load)
+    chunk_size = max(1, len(file_jobs) // (processes * 4))
+    chunks = [
+        range(start, min(start + chunk_size, len(file_jobs)))
+        for start in range(0, len(file_jobs), chunk_size)
+    ]
+
+    gc.collect()
+    gc.freeze()
+    _forked_state = (root_src_path, root_dst_path, no_cache, manifest, profiler, file_jobs)
+    try:
+        mp_context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as executor:
+            chunk_results = list(executor.map(_process_chunk, chunks))
+    finally:
+        _forked_state = None
+        gc.unfreeze()
+
+    # collect what the workers recorded
+    results = []
+    for chunk, (file_results, chunk_profiler) in zip(chunks, chunk_results):
+        if profiler is not None:
+            profiler.merge(chunk_profiler)
+        for index, (result, record, seen, state) in zip(chunk, file_results):
+            action, src_path, dst_path, _ = file_jobs[index]
+            if manifest is not None:
+                if record is not None:
+                    manifest.set_record(dst_path, record)
+                if seen:
+                    manifest.add(dst_path, src_path)
+            import_state = getattr(action, 'import_state', None)
+            if import_state is not None and state is not None:
+                import_state(dst_path, state)
+            results.append(result)
+    return results
+
+
+def _process_chunk(indexes):
+    """Run the actions of some of the files in a forked worker process."""
+    root_src_path, root_dst_path, no_cache, manifest, profiler, file_jobs = _forked_state
+
+    # timings are recorded from scratch and merged with the parent's ones
+    if profiler is not None:
+        profiler = Profiler(top=profiler.top)
+
+    file_results = []
+    for index in indexes:
+        action, src_path, dst_path, _ = file_job = file_jobs[index]
+        result = _process_file(
+            root_src_path, root_dst_path, no_cache, manifest, profiler, file_job)
+
+        record = seen = state = None
+        if manifest is not None:
+            record = manifest.records.get(str(dst_path))
+            seen = str(dst_path) in manifest.seen
+        export_state = getattr(action, 'export_state', None)
+        if export_state is not None:
+            state = export_state(dst_path)
+        file_results.append((result, record, seen, state))
+    return file_results, profiler
+
+
+def _is_up_to_date(action, root_src_path, src_path, root_dst_path, dst_path, entry):
+    """Check if the output of an action doesn't need to be generated again.
+
+    Actions can provide their own check as an ``is_up_to_date`` attribute with
+    the same signature as the action. Otherwise, the destination is up to date
+    if it is more modern than the source file (whose stat is cached in its
+    ``os.DirEntry``).
+    """
+    is_up_to_date = getattr(action, 'is_up_to_date', None)
+    if is_up_to_date is not None:
+        return is_up_to_date(root_src_path, src_path, root_dst_path, dst_path)
 
+    try:
+        dst_stat = os.stat(dst_path)
+    except OSError:
+        return False
+    if not stat.S_ISREG(dst_stat.st_mode):
+        return False
+    dst_timestamp = dst_stat.st_mtime
+    src_timestamp = entry.stat().st_mtime
+    return dst_timestamp >= src_timestamp
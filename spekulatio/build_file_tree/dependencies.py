@@ -0,0 +1,263 @@
+
+import os
+import hashlib
+import logging
+import threading
+import contextvars
+from pathlib import Path
+
+from jinja2 import meta
+
+from .state_files import load_state
+from .state_files import save_state
+
+# nodes used while rendering the current page (along with the keys of the
+# dependencies on the whole som, see below)
+fetched_nodes = contextvars.ContextVar('fetched_nodes', default=None)
+
+# keys of the dependencies on the whole som (they can't be node names): the
+# names of all the nodes (eg. when the som is accessed directly), the values
+# of a field in all the pages (eg. when the pages are queried by that field)
+# and the signatures of all the nodes (see MAX_TRACKED_NODES)
+SOM_KEY = '/'
+FIELD_KEY_PREFIX = '/field:'
+ALL_NODES_KEY = '/nodes'
+
+# pages and fragments that use more nodes than this (eg. with a navigation
+# menu of the whole site) depend on all the nodes of the som instead, so the
+# size of their records doesn't grow with the size of the site
+MAX_TRACKED_NODES = 100
+
+
+def add_fetched_nodes(nodes):
+    """Record that the page being rendered uses some nodes."""
+    fetched = fetched_nodes.get()
+    if fetched is not None:
+        fetched.update(nodes)
+
+
+def add_query_dependencies(operation, arguments):
+    """Record that the page being rendered runs a query (see ``Query``).
+
+    The result of a query changes when the values of the queried field change
+    in any page (or, for ``all``, when any page is added or removed).
+    """
+    key = f"{FIELD_KEY_PREFIX}{arguments[0]}" if arguments else SOM_KEY
+    add_fetched_nodes((key,))
+
+
+def get_mtime(path):
+    """Return the modification time (ns) of a file or None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DependencyTracker:
+    """Record what each rendered page depends on to know when it is outdated.
+
+    For every output file the tracker stores:
+
+        :templates: the template used to render the page and all the ones it
+            extends, includes or imports, together with their modification times.
+        :nodes: the names of the som nodes the page used (the node itself,
+            its prev and next nodes, the ones fetched with ``get_node`` and
+            any node whose attributes were read by the templates).
+        :signature: a hash of the signatures of all these nodes.
+
+    The signature of a node changes when its content file, any of the
+    underscore files it inherits data from or its prev/next/children
+    relationships change. If a page accessed the som directly, the names of
+    all the nodes are part of its dependencies too, and if it queried the
+    pages by a field, the values of that field in all of them. Pages that
+    use more than MAX_TRACKED_NODES nodes depend on the signatures of all the
+    nodes. A page is up to date only if none of its templates and none of
+    these signatures changed.
+
+    The records are kept between builds in a state file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = load_state(self.path)
+        self.lock = threading.Lock()
+
+        # per-build memos
+        self.signatures = {}
+        self.template_files = {}
+
+    def save(self):
+        """Write the records to the state file."""
+        with self.lock:
+            save_state(self.path, self.records)
+
+    def reset(self):
+        """Forget the memoized signatures (eg. after the som or templates change)."""
+        self.signatures = {}
+        self.template_files = {}
+
+    def get_node_signature(self, som, node):
+        """Return a string that changes whenever the node may render differently."""
+        key = str(node)
+        signature = self.signatures.get(key)
+        if signature is None:
+            parts = []
+
+            # own and inherited data
+            ancestor = node
+            while ancestor is not None:
+                for source in ancestor.sources:
+                    parts.append(f"{source}:{get_mtime(som.root_path / source)}")
+                ancestor = ancestor.parent
+
+            # relationships
+            parts.append(f"prev:{node.prev}")
+            parts.append(f"next:{node.next}")
+            parts.extend(f"child:{child}" for child in node.children)
+
+            signature = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+            self.signatures[key] = signature
+        return signature
+
+    def get_som_signature(self, som, key):
+        """Return a string that changes whenever a dependency on the whole som changes.
+
+        :param key: SOM_KEY for the names of all the nodes (they change when a
+            node is added, removed or moved), ALL_NODES_KEY for the signatures
+            of all the nodes or FIELD_KEY_PREFIX followed by the name of a
+            field for the values of the field in all the pages.
+        """
+        signature = self.signatures.get(key)
+        if signature is None:
+            if key == SOM_KEY:
+                parts = (str(node) for node in som.iter_nodes())
+            elif key == ALL_NODES_KEY:
+                parts = (
+                    f"{node}:{self.get_node_signature(som, node)}" for node in som.iter_nodes()
+                )
+            else:
+                field = key[len(FIELD_KEY_PREFIX):]
+                parts = (
+                    f"{node}:{node.data[field]!r}" for node in som.iter_nodes()
+                    if not node.is_dir and field in node.data
+                )
+            signature = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+            self.signatures[key] = signature
+        return signature
+
+    def get_dependencies(self, som, used_nodes):
+        """Return the names of some used nodes and keys (see ``fetched_nodes``) and their signature.
+
+        If there are more than MAX_TRACKED_NODES nodes, they're replaced by
+        ALL_NODES_KEY.
+        """
+        keys = {item for item in used_nodes if isinstance(item, str)}
+        nodes = [item for item in used_nodes if not isinstance(item, str)]
+        if len(nodes) > MAX_TRACKED_NODES:
+            keys.add(ALL_NODES_KEY)
+            nodes = []
+        used_nodes = [*sorted(keys), *sorted(nodes, key=str)]
+        names = [str(item) for item in used_nodes]
+        return names, self.get_combined_signature(som, used_nodes)
+
+    def get_used_nodes(self, som, names, signature):
+        """Return the nodes and keys of some names or None if their signature changed."""
+        used_nodes = []
+        for name in names:
+            if name.startswith(SOM_KEY):
+                used_nodes.append(name)
+                continue
+            node = som.map.get(name)
+            if node is None:
+                return None
+            used_nodes.append(node)
+        if self.get_combined_signature(som, used_nodes) != signature:
+            return None
+        return used_nodes
+
+    def get_combined_signature(self, som, used_nodes):
+        """Return a hash of the signatures of some nodes and keys."""
+        digest = hashlib.sha1()
+        for item in used_nodes:
+            if isinstance(item, str):
+                signature = self.get_som_signature(som, item)
+            else:
+                signature = self.get_node_signature(som, item)
+            digest.update(f"{item}:{signature}\n".encode())
+        return digest.hexdigest()
+
+    def get_template_files(self, env, template_name):
+        """Return the files (and their mtimes) a template depends on.
+
+        If a template references another one using a name that is only known
+        at render time, None is returned since its dependencies can't be
+        determined.
+        """
+        template_files = self.template_files.get(template_name)
+        if template_files is not None or template_name in self.template_files:
+            return template_files
+
+        template_files = {}
+        pending = [template_name]
+        seen = set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+
+            source, filename, _ = env.loader.get_source(env, name)
+            template_files[filename] = get_mtime(filename)
+            referenced_names = list(meta.find_referenced_templates(env.parse(source)))
+            if None in referenced_names:
+                template_files = None
+                break
+            pending.extend(referenced_names)
+
+        self.template_files[template_name] = template_files
+        return template_files
+
+    def is_up_to_date(self, som, env, dst_path):
+        """Check if an output file was generated with the current dependencies."""
+        record = self.records.get(str(dst_path))
+        if record is None or record['templates'] is None or not dst_path.is_file():
+            return False
+
+        for filename, mtime in record['templates'].items():
+            if get_mtime(filename) != mtime:
+                return False
+
+        return self.get_used_nodes(som, record['nodes'], record.get('signature')) is not None
+
+    def get_record(self, dst_path):
+        """Return the dependencies stored for an output file (or None)."""
+        return self.records.get(str(dst_path))
+
+    def set_record(self, dst_path, record):
+        """Store the dependencies of an output file (eg. recorded in a worker process)."""
+        with self.lock:
+            self.records[str(dst_path)] = record
+
+    def record(self, som, env, dst_path, template_name, nodes):
+        """Store the dependencies of a rendered output file."""
+        try:
+            template_files = self.get_template_files(env, template_name)
+        except Exception as err:
+            logging.debug(f"Can't get dependencies of template {template_name}: {err}")
+            template_files = None
+
+        names, signature = self.get_dependencies(som, nodes)
+        record = {
+            'templates': template_files,
+            'nodes': names,
+            'signature': signature,
+        }
+        self.set_record(dst_path, record)
+
+    def prune(self):
+        """Forget the records of the output files that don't exist anymore."""
+        with self.lock:
+            for key in list(self.records):
+                if not os.path.exists(key):
+                    del self.records[key]
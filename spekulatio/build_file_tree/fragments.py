@@ -0,0 +1,95 @@
+import threading
+from pathlib import Path
+
+from .dependencies import get_mtime
+from .state_files import load_state
+from .state_files import save_state
+
+
+class FragmentStore:
+    """Keep the fragments rendered by ``{% cache %}`` blocks between builds.
+
+    For every fragment the store keeps its HTML together with what it was
+    rendered from:
+
+        :templates: the template of the block and all the ones it extends,
+            includes or imports, with their modification times.
+        :nodes: the names of the som nodes used by the fragment (the nodes in
+            its key and the ones read while rendering it).
+        :signature: a hash of the signatures of all these nodes.
+
+    A stored fragment is only used while none of them changed. Templates and
+    node signatures are obtained from a DependencyTracker.
+
+    Like the records of the tracker, the fragments are kept between builds
+    in a state file.
+    """
+
+    def __init__(self, path, dependencies):
+        self.path = Path(path)
+        self.dependencies = dependencies
+        self.records = load_state(self.path)
+        self.lock = threading.Lock()
+
+        # fragments stored since the last call to pop_new_records
+        self.new_records = {}
+
+    def save(self):
+        """Write the fragments to the state file."""
+        with self.lock:
+            save_state(self.path, self.records)
+            self.new_records = {}
+
+    def clear(self):
+        """Forget all the stored fragments (eg. to render all of them again)."""
+        with self.lock:
+            self.records = {}
+            self.new_records = {}
+
+    def get(self, som, key):
+        """Return a stored fragment as (html, nodes) or None if it is outdated."""
+        record = self.records.get(key)
+        if record is None:
+            return None
+
+        for filename, mtime in record['templates'].items():
+            if get_mtime(filename) != mtime:
+                return None
+
+        nodes = self.dependencies.get_used_nodes(som, record['nodes'], record.get('signature'))
+        if nodes is None:
+            return None
+        return record['html'], nodes
+
+    def set(self, som, env, key, template_name, html, nodes):
+        """Store a rendered fragment.
+
+        Fragments whose templates can't be determined (see
+        ``DependencyTracker.get_template_files``) aren't stored.
+        """
+        template_files = self.dependencies.get_template_files(env, template_name)
+        if template_files is None:
+            return
+
+        names, signature = self.dependencies.get_dependencies(som, nodes)
+        record = {
+            'html': str(html),
+            'templates': template_files,
+            'nodes': names,
+            'signature': signature,
+        }
+        self.update({key: record})
+        with self.lock:
+            self.new_records[key] = record
+
+    def update(self, records):
+        """Add some fragments (eg. stored in a worker process)."""
+        with self.lock:
+            self.records.update(records)
+
+    def pop_new_records(self):
+        """Return the fragments stored since the last call and forget them."""
+        with self.lock:
+            new_records = self.new_records
+            self.new_records = {}
+        return new_records
@@ -0,0 +1,251 @@
+import os
+import filecmp
+import hashlib
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+
+from .state_files import load_state
+from .state_files import save_state
+from .state_files import is_relative_to
+
+# manifest of the build in which the current action is running
+current_manifest = contextvars.ContextVar('current_manifest', default=None)
+
+# size of the buffer used to write streamed outputs
+STREAM_BUFFER_SIZE = 256 * 1024
+
+
+def write_output(dst_path, content):
+    """Write the text of an output file.
+
+    If the action is run by a build that keeps a manifest, the file is only
+    written if its content changed (see BuildManifest.write).
+    """
+    manifest = current_manifest.get()
+    if manifest is None:
+        dst_path.write_text(content)
+    else:
+        manifest.write(dst_path, content.encode())
+
+
+def write_output_stream(dst_path, chunks):
+    """Write an output file out of an iterable of text chunks.
+
+    The chunks are written while they are produced (eg. by
+    ``Template.generate``) so the whole content is never held in memory.
+    They're written to a temporary file that replaces the output at the end,
+    so if producing the chunks fails the previous output is left untouched.
+
+    If the action is run by a build that keeps a manifest, the output is
+    only replaced if its content changed (see BuildManifest.write_stream).
+    """
+    encoded_chunks = (chunk.encode() for chunk in chunks)
+    manifest = current_manifest.get()
+    if manifest is None:
+        tmp_path = get_tmp_path(dst_path)
+        with _removing_on_error(tmp_path):
+            write_chunks(tmp_path, encoded_chunks)
+            os.replace(tmp_path, dst_path)
+    else:
+        manifest.write_stream(dst_path, encoded_chunks)
+
+
+def get_tmp_path(dst_path):
+    """Return the path of a temporary file next to an output file."""
+    return dst_path.with_name(f".{dst_path.name}.{threading.get_ident()}.tmp")
+
+
+def write_chunks(path, chunks):
+    """Write an iterable of bytes to a file through a buffer.
+
+    :return: (digest, size) where digest is the SHA-256 of the content.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb', buffering=STREAM_BUFFER_SIZE) as output_file:
+        for chunk in chunks:
+            digest.update(chunk)
+            output_file.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@contextmanager
+def _removing_on_error(path):
+    """Remove a (temporary) file if the block of code fails."""
+    try:
+        yield
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+
+
+class BuildManifest:
+    """Record the output files of a build to avoid needless writes.
+
+    For every output file the manifest stores the source file it was
+    generated from and, for the files written with ``write``, the hash,
+    size and modification time of its content.
+
+    This allows to:
+
+    * skip writing an output whose content didn't change, so its mtime is
+      preserved and tools that sync the build directory only transfer the
+      files that really changed.
+    * delete the outputs whose source no longer exists (see ``prune``).
+
+    The records are persisted in a JSON file so they are available in the
+    following builds.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = load_state(self.path)
+        self.lock = threading.Lock()
+
+        # outputs generated (or found up to date) since the last prune
+        self.seen = set()
+
+    def save(self):
+        """Write the records to the manifest file."""
+        with self.lock:
+            save_state(self.path, self.records)
+
+    def add(self, dst_path, src_path):
+        """Register that an output file belongs to a source file in this build."""
+        key = str(dst_path)
+        with self.lock:
+            self.seen.add(key)
+            self.records.setdefault(key, {})['source'] = str(src_path)
+
+    def set_record(self, dst_path, record):
+        """Replace the record of an output file (eg. with one made in a worker process)."""
+        with self.lock:
+            self.records[str(dst_path)] = record
+
+    def write(self, dst_path, data):
+        """Write the bytes of an output file unless it already contains them.
+
+        The file is replaced atomically so a reader never sees it half written.
+
+        :return: True if the file was written.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if self.is_unchanged(dst_path, digest, len(data), lambda: dst_path.read_bytes() == data):
+            return False
+
+        tmp_path = get_tmp_path(dst_path)
+        with _removing_on_error(tmp_path):
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, dst_path)
+        self.set_content(dst_path, digest)
+        return True
+
+    def write_stream(self, dst_path, chunks):
+        """Write an output file out of an iterable of bytes.
+
+        The content is written to a temporary file that only replaces the
+        output if its content changed.
+
+        :return: True if the file was written.
+        """
+        tmp_path = get_tmp_path(dst_path)
+        with _removing_on_error(tmp_path):
+            digest, size = write_chunks(tmp_path, chunks)
+
+            def compare():
+                return filecmp.cmp(tmp_path, dst_path, shallow=False)
+
+            if self.is_unchanged(dst_path, digest, size, compare):
+                os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, dst_path)
+        self.set_content(dst_path, digest)
+        return True
+
+    def is_unchanged(self, dst_path, digest, size, compare):
+        """Check if an output file already has a given content.
+
+        The hash stored in the manifest is used while the file keeps the size
+        and mtime recorded with it. Otherwise (eg. the file was modified
+        outside of the build or it isn't recorded yet) its content is compared
+        with the ``compare`` function.
+        """
+        key = str(dst_path)
+        with self.lock:
+            record = self.records.setdefault(key, {'source': None})
+
+        try:
+            stat = os.stat(dst_path)
+        except OSError:
+            return False
+        if stat.st_size != size:
+            return False
+
+        if (stat.st_size, stat.st_mtime_ns) == (record.get('size'), record.get('mtime')):
+            is_unchanged = record.get('hash') == digest
+        else:
+            is_unchanged = compare()
+        if is_unchanged:
+            self.update_record(record, digest, stat)
+            logging.debug(f"(unchanged): {dst_path}")
+        return is_unchanged
+
+    def set_content(self, dst_path, digest):
+        """Record the hash of the content just written to an output file."""
+        with self.lock:
+            record = self.records.setdefault(str(dst_path), {'source': None})
+        self.update_record(record, digest, os.stat(dst_path))
+
+    def update_record(self, record, digest, stat):
+        with self.lock:
+            record.update(hash=digest, size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    def prune(self, root_src_path, root_dst_path):
+        """Delete the outputs of a source tree that weren't generated in this build.
+
+        Only the records whose source is inside ``root_src_path`` are
+        considered, so several source trees can share the same manifest as
+        long as each one is pruned after being built. Directories left empty
+        in ``root_dst_path`` are removed too.
+
+        :return: list of the deleted output paths.
+        """
+        root_src_path = Path(root_src_path)
+        root_dst_path = Path(root_dst_path)
+
+        deleted = []
+        with self.lock:
+            for key, record in list(self.records.items()):
+                if key in self.seen or not is_relative_to(record['source'], root_src_path):
+                    continue
+                del self.records[key]
+                dst_path = Path(key)
+                try:
+                    dst_path.unlink()
+                except FileNotFoundError:
+                    continue
+                except OSError as err:
+                    logging.warning(f"Can't delete orphaned output {dst_path}: {err}")
+                    continue
+                logging.debug(f"(deleted): {dst_path}")
+                deleted.append(dst_path)
+                _remove_empty_dirs(dst_path.parent, root_dst_path)
+            self.seen = set()
+        return deleted
+
+
+def _remove_empty_dirs(dir_path, root_path):
+    """Remove a directory and its ancestors (up to root_path) while they're empty."""
+    while dir_path != root_path and is_relative_to(dir_path, root_path):
+        try:
+            dir_path.rmdir()
+        except OSError:
+            return
+        dir_path = dir_path.parent
@@ -0,0 +1,35 @@
+import os
+import json
+from pathlib import Path
+
+
+def load_state(path):
+    """Read the data of a state file (empty if it doesn't exist or is corrupt)."""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, data):
+    """Write the data of a state file atomically.
+
+    The data is written to a temporary file that replaces the state file, so
+    an interrupted build never leaves it half written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def is_relative_to(path, parent):
+    """Return True if path is inside the parent directory (False if path is None)."""
+    if path is None:
+        return False
+    try:
+        Path(path).absolute().relative_to(Path(parent).absolute())
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,212 @@
+import multiprocessing
+from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from spekulatio.som import SOM
+from spekulatio.walker import scan_tree
+from spekulatio.profiler import profile_phase
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import DependencyTracker
+from spekulatio.build_file_tree import BuildManifest
+from spekulatio.build_file_tree import FragmentStore
+from spekulatio.build_file_tree.state_files import is_relative_to
+from spekulatio.build_file_tree.actions import ignore
+from spekulatio.build_file_tree.actions import compile_scss_factory
+from spekulatio.build_file_tree.actions import copy_factory
+from spekulatio.build_file_tree.actions import create_environment
+from spekulatio.build_file_tree.actions import render_html_factory
+
+
+current_dir = Path(__file__).absolute().parent
+default_template_path = current_dir / 'default_templates'
+
+template_actions = {
+    '.html': ignore,
+}
+
+
+class SiteBuilder:
+    """Generate a site out of a content and a template directory.
+
+    The builder keeps the site object model, the templating environment and
+    the dependencies of the rendered pages between builds, so a long running
+    process can regenerate the site after some files change without starting
+    from scratch.
+    """
+
+    def __init__(self, content_path, template_path, build_path, cache=None, jobs=1,
+            lazy=False, auto_reload=False, copy_mode='copy', stream=False, profiler=None,
+            markdown_extensions=None, fork=None, keep_fragments=False):
+        self.content_path = content_path
+        self.template_path = template_path
+        self.build_path = build_path
+        self.template_paths = (default_template_path, template_path)
+        self.cache = cache
+        self.jobs = jobs
+        self.lazy = lazy
+        self.stream = stream
+        self.markdown_extensions = markdown_extensions
+
+        # render the content files in forked processes (one per job) that
+        # share the som copy-on-write instead of in threads. Rendering is CPU
+        # bound, so threads only help with the I/O of the actions and
+        # processes are used by default when possible
+        if fork is None:
+            fork = jobs > 1 and 'fork' in multiprocessing.get_all_start_methods()
+        self.fork = fork
+        self.copy = copy_factory(copy_mode)
+
+        # optional Profiler (it can be replaced between builds)
+        self.profiler = profiler
+
+        self.dependencies = DependencyTracker(build_path / '.spekulatio' / 'dependencies.json')
+        self.manifest = BuildManifest(build_path / '.spekulatio' / 'manifest.json')
+
+        # optional store of the fragments of {% cache %} blocks between builds
+        self.fragment_store = None
+        if keep_fragments:
+            self.fragment_store = FragmentStore(
+                build_path / '.spekulatio' / 'fragments.json', self.dependencies)
+        self.env = create_environment(self.template_paths, auto_reload=auto_reload)
+        self.som = None
+        self.content_tree = None
+
+    def build(self, no_cache=False):
+        """Generate the whole site."""
+        self.build_path.mkdir(parents=True, exist_ok=True)
+        self.build_templates(no_cache)
+        self.scan_content()
+        self.create_som()
+        self.build_content(no_cache)
+        self.manifest.save()
+
+    def rebuild(self, changed_paths):
+        """Regenerate the outputs affected by a set of changed files.
+
+        Only the pages whose dependencies were modified are rendered again.
+        The som is updated in place with the content files that changed. If
+        the update fails, the som is created from scratch in the next rebuild.
+        """
+        template_changed = any(is_relative_to(path, self.template_path) for path in changed_paths)
+        content_paths = [
+            path for path in changed_paths if is_relative_to(path, self.content_path)
+        ]
+
+        self.dependencies.reset()
+        if template_changed:
+            self.build_templates(no_cache=False)
+        self.scan_content()
+        try:
+            if self.som is None:
+                self.create_som()
+            elif content_paths:
+                self.update_som(content_paths)
+        except Exception:
+            # the som may have been left half updated
+            self.som = None
+            raise
+        self.build_content(no_cache=False)
+        self.manifest.save()
+
+    def build_templates(self, no_cache):
+        """Process the static files of the template directory."""
+        with profile_phase(self.profiler, 'template tree'), \
+                self.create_scss_action(self.jobs) as compile_scss:
+            build_file_tree(self.template_path, self.build_path, no_cache,
+                actions={
+                    **template_actions,
+                    '.scss': ('.css', compile_scss),
+                },
+                jobs=self.jobs,
+                manifest=self.manifest,
+                default_action=self.copy,
+                profiler=self.profiler,
+            )
+
+    @contextmanager
+    def create_scss_action(self, jobs):
+        """Create the action that compiles the SCSS files of a file tree.
+
+        With several jobs, the stylesheets are compiled in a pool of worker
+        processes (only started if some stylesheet has to be compiled).
+        """
+        executor = None
+        if jobs > 1:
+            mp_context = multiprocessing.get_context('spawn')
+            executor = ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context)
+        try:
+            yield compile_scss_factory(self.build_path / '.spekulatio' / 'scss-cache', executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def scan_content(self):
+        """Read the content directory tree.
+
+        The same scan is used to create the som and to process the content
+        files, so the directory is only traversed once per build.
+        """
+        with profile_phase(self.profiler, 'scan content'):
+            self.content_tree = scan_tree(self.content_path, jobs=self.jobs)
+
+    def create_som(self):
+        """Create the site object model out of the content directory."""
+        self.som = SOM(self.content_path, cache=self.cache, jobs=self.jobs, lazy=self.lazy,
+            tree=self.content_tree, profiler=self.profiler,
+            markdown_extensions=self.markdown_extensions)
+
+    def update_som(self, changed_paths):
+        """Apply the changes in a set of content files to the site object model."""
+        added = []
+        modified = []
+        deleted = []
+        for path in changed_paths:
+            if not Path(path).exists():
+                deleted.append(path)
+            elif str(self.som.get_relative_path(path)) in self.som.map:
+                modified.append(path)
+            else:
+                added.append(path)
+        self.som.profiler = self.profiler
+        with profile_phase(self.profiler, 'update som'):
+            self.som.update(added, modified, deleted)
+
+    def build_content(self, no_cache):
+        """Render the pages and process the static files of the content directory.
+
+        In fork mode, the files are processed in forked worker processes (so
+        the stylesheets are compiled in them too, without a pool of their own).
+        If ``no_cache`` is True, the stored fragments aren't used either.
+        """
+        if no_cache and self.fragment_store is not None:
+            self.fragment_store.clear()
+        render_html = render_html_factory(
+            self.som, self.template_paths, self.dependencies, env=self.env, stream=self.stream,
+            fragment_store=self.fragment_store)
+        processes = self.jobs if self.fork else 1
+        with profile_phase(self.profiler, 'content tree'), \
+                self.create_scss_action(1 if self.fork else self.jobs) as compile_scss:
+            build_file_tree(self.content_path, self.build_path, no_cache,
+                actions={
+                    '.scss': ('.css', compile_scss),
+                    '.rst': ('.html', render_html),
+                    '.json': ('.html', render_html),
+                    '.yaml': ('.html', render_html),
+                    '.yml': ('.html', render_html),
+                    '.html': ('.html', render_html),
+                    '.htm': ('.html', render_html),
+                    '.md': ('.html', render_html),
+                    '.markdown': ('.html', render_html),
+                },
+                jobs=self.jobs,
+                manifest=self.manifest,
+                default_action=self.copy,
+                tree=self.content_tree,
+                profiler=self.profiler,
+                processes=processes,
+            )
+        self.dependencies.prune()
+        self.dependencies.save()
+        if self.fragment_store is not None:
+            self.fragment_store.save()
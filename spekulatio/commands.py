@@ -1,20 +1,20 @@
+import os
 import sys
+import json
+import cProfile
 import logging
 
 from pathlib import Path
 
 import click
 
-from spekulatio.som import SOM
+from spekulatio.som import ExtractionCache
+from spekulatio.som import iter_metadata
+from spekulatio.builder import SiteBuilder
+from spekulatio.watcher import create_watcher
+from spekulatio.profiler import Profiler
+from spekulatio.build_file_tree.actions import copy_modes
 from spekulatio.exceptions import SpekulatioError
-from spekulatio.build_file_tree import build_file_tree
-from spekulatio.build_file_tree.actions import ignore
-from spekulatio.build_file_tree.actions import compile_scss
-from spekulatio.build_file_tree.actions import render_html_factory
-
-
-current_dir = Path(__file__).absolute().parent
-default_template_path = current_dir / 'default_templates'
 
 
 @click.command()
@@ -24,11 +24,41 @@ default_template_path = current_dir / 'default_templates'
         help="Directory for content files (default: ./content).")
 @click.option('--template-dir', default='./templates',
         help="Directory for HTML templates (default: ./templates).")
-@click.option('--no-cache', default=True, is_flag=True,
+@click.option('--no-cache', default=False, is_flag=True,
         help="Don't check timestamps. Regenerate all files.")
+@click.option('--extraction-cache-size', default=512, type=int,
+        help="Max size in MB of the extraction cache. 0 disables it (default: 512).")
+@click.option('--jobs', default=None, type=int,
+        help="Number of parallel jobs (default: number of CPUs).")
+@click.option('--lazy', default=False, is_flag=True,
+        help="Convert the content of each page only when it is rendered.")
+@click.option('--copy-mode', default='copy', type=click.Choice(copy_modes),
+        help="How static files are copied: copy (reflinks if supported), hardlink or symlink "
+        "(default: copy).")
+@click.option('--fork/--threads', default=None,
+        help="Render the pages in forked processes (one per job) or in threads (default: "
+        "processes if there are several jobs and the OS supports fork).")
+@click.option('--keep-fragments', default=False, is_flag=True,
+        help="Keep the fragments rendered by {% cache %} blocks between builds.")
+@click.option('--markdown-extensions', default=None,
+        help="Comma separated list of Markdown extensions (default: toc).")
+@click.option('--stream', default=False, is_flag=True,
+        help="Write pages while they are rendered (reduces the memory used by big pages).")
+@click.option('--watch', default=False, is_flag=True,
+        help="Keep running and rebuild the site when files change.")
+@click.option('--profile', default=False, is_flag=True,
+        help="Show the time spent in each phase and the slowest files.")
+@click.option('--profile-top', default=10, type=int,
+        help="Number of slowest files shown when profiling (default: 10).")
+@click.option('--profile-dump', default=None, type=click.Path(dir_okay=False),
+        help="Write cProfile stats of the build to this file.")
+@click.option('--list-pages', default=False, is_flag=True,
+        help="List the content pages with the metadata set in them and exit.")
 @click.option('--verbose', default=False, is_flag=True,
         help="Show processing messages.")
-def create_site(build_dir, content_dir, template_dir, no_cache, verbose):
+def create_site(build_dir, content_dir, template_dir, no_cache, extraction_cache_size, jobs,
+        lazy, copy_mode, fork, keep_fragments, markdown_extensions, stream, watch, profile,
+        profile_top, profile_dump, list_pages, verbose):
     """Create static site from content files using a set of HTML templates."""
 
     # set logging options
@@ -50,42 +80,100 @@ def create_site(build_dir, content_dir, template_dir, no_cache, verbose):
         click.echo(f"Directory '{template_path}' not found.")
         sys.exit(-1)
 
-    template_paths = (default_template_path, template_path)
+    # number of parallel jobs
+    jobs = jobs or os.cpu_count() or 1
 
-    try:
-        # process file tree in template path
-        build_file_tree(template_path, build_path, no_cache,
-            actions={
-                '.html': ignore,
-                '.scss': ('.css', compile_scss),
-            }
-        )
+    # list pages without building the site
+    if list_pages:
+        list_content_pages(content_path, jobs)
+        return
 
-        # get site object model
-        som = SOM(content_path)
-
-        # initialize render action
-        render_html = render_html_factory(som, template_paths)
-
-        # process file tree in content path
-        build_file_tree(content_path, build_path, no_cache,
-            actions={
-                '.scss': ('.css', compile_scss),
-                '.rst': ('.html', render_html),
-                '.json': ('.html', render_html),
-                '.yaml': ('.html', render_html),
-                '.yml': ('.html', render_html),
-                '.html': ('.html', render_html),
-                '.htm': ('.html', render_html),
-                '.md': ('.html', render_html),
-                '.markdown': ('.html', render_html),
-            }
+    # cache of extracted content files
+    cache = None
+    if extraction_cache_size > 0:
+        cache = ExtractionCache(
+            build_path / '.spekulatio' / 'extraction-cache',
+            max_size=extraction_cache_size * 1024 * 1024,
         )
 
+    # extensions used to convert Markdown files
+    if markdown_extensions is not None:
+        markdown_extensions = [
+            name.strip() for name in markdown_extensions.split(',') if name.strip()
+        ]
+
+    builder = SiteBuilder(content_path, template_path, build_path,
+        cache=cache, jobs=jobs, lazy=lazy, auto_reload=watch, copy_mode=copy_mode,
+        stream=stream, markdown_extensions=markdown_extensions, fork=fork,
+        keep_fragments=keep_fragments)
+
+    # profiling (cProfile only sees the main thread, use --jobs 1 to get
+    # the complete picture)
+    c_profiler = None
+    if profile_dump:
+        c_profiler = cProfile.Profile()
+        c_profiler.enable()
+
+    try:
+        builder.profiler = Profiler(top=profile_top) if profile else None
+        builder.build(no_cache)
+        report_profile(builder.profiler, build_path)
+
+        # regenerate the affected files every time something changes
+        if watch:
+            watcher = create_watcher([content_path, template_path])
+            logging.info("Watching for changes. Press Ctrl+C to stop.")
+            while True:
+                changed_paths = watcher.wait()
+                logging.info(f"{len(changed_paths)} file(s) changed. Rebuilding...")
+                try:
+                    builder.profiler = Profiler(top=profile_top) if profile else None
+                    builder.rebuild(changed_paths)
+                    report_profile(builder.profiler, build_path)
+                except SpekulatioError as err:
+                    click.echo(str(err))
+                except Exception as err:
+                    # keep watching: the next change may fix the problem
+                    logging.exception(f"Error while rebuilding the site: {err}")
+
+    except KeyboardInterrupt:
+        pass
+
     except SpekulatioError as err:
         click.echo(str(err))
         sys.exit(-1)
 
+    finally:
+        if cache is not None:
+            cache.prune()
+            logging.info(f"Extraction cache: {cache}")
+        if c_profiler is not None:
+            c_profiler.disable()
+            c_profiler.dump_stats(profile_dump)
+            logging.info(f"cProfile stats written to {profile_dump}")
+
+
+def list_content_pages(content_path, jobs):
+    """Print the path and metadata (as JSON) of every page in the content directory.
+
+    Only the frontmatter of Markdown and HTML files is read, so listing is
+    fast even for big sites.
+    """
+    pages = sorted(iter_metadata(content_path, jobs=jobs), key=lambda item: item[0])
+    for relative_path, data in pages:
+        if not Path(relative_path).name.startswith('_'):
+            click.echo(f"{relative_path}\t{json.dumps(data, default=str)}")
+
+
+def report_profile(profiler, build_path):
+    """Print the summary of a profiled build and save its JSON report."""
+    if profiler is None:
+        return
+    click.echo(profiler.format_summary())
+    report_path = build_path / '.spekulatio' / 'profile.json'
+    profiler.save(report_path)
+    click.echo(f"Profile report written to {report_path}")
+
 
 if __name__ == '__main__':
     create_site()
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import heapq
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextlib import nullcontext
+
+
+def get_cpu_time():
+    """Return the CPU time used by this process and its finished children."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+class Profiler:
+    """Collect the time spent in each phase of a build and in each file.
+
+    For phases, both the wall time and the CPU time are recorded. The CPU
+    time includes all the threads of the process and the worker processes
+    that finished during the phase.
+
+    For files, the time of each extraction or action is recorded (the CPU
+    time is the one of the thread or process that handled the file) and
+    aggregated by type (eg. extractor '.rst', action 'render_html').
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+        self.phases = {}
+        self.types = {}
+        self.files = []
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # profilers are pickled to send them back from worker processes
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Record the wall and CPU time of a block of code."""
+        wall_start = time.perf_counter()
+        cpu_start = get_cpu_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = get_cpu_time() - cpu_start
+            with self.lock:
+                phase = self.phases.setdefault(name, {'wall': 0, 'cpu': 0})
+                phase['wall'] += wall
+                phase['cpu'] += cpu
+
+    def record_file(self, kind, name, path, wall, cpu):
+        """Record the time spent processing a file.
+
+        :param kind: what was done with the file (eg. 'extractor', 'action').
+        :param name: the extractor or action used (eg. '.rst', 'render_html').
+        """
+        type_name = f"{kind} {name}"
+        with self.lock:
+            totals = self.types.setdefault(type_name, {'count': 0, 'wall': 0, 'cpu': 0})
+            totals['count'] += 1
+            totals['wall'] += wall
+            totals['cpu'] += cpu
+
+        # only keep the slowest files
+        self.add_file((wall, str(path), type_name, cpu))
+
+    def merge(self, other):
+        """Add the timings recorded by another profiler (eg. in a worker process)."""
+        for name, phase in other.phases.items():
+            with self.lock:
+                totals = self.phases.setdefault(name, {'wall': 0, 'cpu': 0})
+                totals['wall'] += phase['wall']
+                totals['cpu'] += phase['cpu']
+        for type_name, type_totals in other.types.items():
+            with self.lock:
+                totals = self.types.setdefault(type_name, {'count': 0, 'wall': 0, 'cpu': 0})
+                for key in ('count', 'wall', 'cpu'):
+                    totals[key] += type_totals[key]
+        for item in other.files:
+            self.add_file(item)
+
+    def add_file(self, item):
+        """Add a file to the slowest ones if it is slow enough."""
+        with self.lock:
+            if len(self.files) < self.top:
+                heapq.heappush(self.files, item)
+            elif self.top:
+                heapq.heappushpop(self.files, item)
+
+    def get_report(self):
+        """Return the collected timings as a dictionary."""
+        slowest_files = [
+            {'path': path, 'type': type_name, 'wall': wall, 'cpu': cpu}
+            for wall, path, type_name, cpu in sorted(self.files, reverse=True)
+        ]
+        return {
+            'phases': self.phases,
+            'types': self.types,
+            'slowest_files': slowest_files,
+        }
+
+    def save(self, path):
+        """Write the report as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.get_report(), indent=2))
+
+    def format_summary(self):
+        """Return the report as a set of text tables."""
+        lines = [f"{'phase':<40}{'wall (s)':>10}{'cpu (s)':>10}"]
+        for name, phase in self.phases.items():
+            lines.append(f"{name:<40}{phase['wall']:>10.3f}{phase['cpu']:>10.3f}")
+
+        lines.append('')
+        lines.append(f"{'type':<30}{'files':>10}{'wall (s)':>10}{'cpu (s)':>10}")
+        types = sorted(self.types.items(), key=lambda item: item[1]['wall'], reverse=True)
+        for name, totals in types:
+            lines.append(
+                f"{name:<30}{totals['count']:>10}{totals['wall']:>10.3f}{totals['cpu']:>10.3f}"
+            )
+
+        lines.append('')
+        lines.append(f"{'slowest files':<60}{'wall (s)':>10}")
+        for item in self.get_report()['slowest_files']:
+            lines.append(f"{item['path']:<60}{item['wall']:>10.3f}  ({item['type']})")
+        return '\n'.join(lines)
+
+
+def profile_phase(profiler, name):
+    """Return a context that records a phase if there's a profiler."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
@@ -1 +1,5 @@
 from .som import SOM  # noqa
+from .extraction_cache import ExtractionCache  # noqa
+from .metadata import read_metadata  # noqa
+from .metadata import iter_metadata  # noqa
+from .query import Query  # noqa
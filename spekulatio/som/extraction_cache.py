@@ -0,0 +1,147 @@
+
+import os
+import re
+import sys
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+
+import yaml
+import docutils
+import markdown
+
+# increment this number whenever the output of any extractor changes so that
+# previously cached results are no longer used
+CACHE_VERSION = 2
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# reStructuredText directives whose output depends on other files
+RST_FILE_DIRECTIVE_RE = re.compile(
+    r'^[ \t]*(\.\.[ \t]+(include|literalinclude)::|:file:)', re.MULTILINE)
+
+
+def _get_version_tag():
+    """Return a string that identifies the code used to extract the nodes."""
+    versions = [
+        f"cache:{CACHE_VERSION}",
+        f"python:{sys.version_info[0]}.{sys.version_info[1]}",
+        f"docutils:{docutils.__version__}",
+        f"markdown:{markdown.__version__}",
+        f"yaml:{yaml.__version__}",
+    ]
+    return ';'.join(versions)
+
+
+class ExtractionCache:
+    """Persistent cache of the information extracted from content files.
+
+    Each entry is stored in its own file under ``path`` and it is keyed by the
+    hash of the content of the original file, its suffix (which determines the
+    extractor to use) and the versions of the libraries used in the extraction.
+    That way, a file only needs to be extracted again if its content changes
+    or if the extraction code is updated. Documents whose output depends on
+    other files (eg. reStructuredText ones with ``include`` directives) aren't
+    cached.
+
+    The total size of the cache is limited to ``max_size`` bytes. When calling
+    ``prune`` the least recently used entries are removed until the cache fits
+    into that size.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.version_tag = _get_version_tag().encode()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, suffix, text, mode='full'):
+        """Return the cache key of a file given its suffix and content.
+
+        ``mode`` distinguishes the entries of fully extracted files from the
+        metadata-only ones.
+
+        :return: the key or None if the file can't be cached.
+        """
+        if suffix == '.rst' and RST_FILE_DIRECTIVE_RE.search(text):
+            return None
+
+        digest = hashlib.sha256(self.version_tag)
+        digest.update(mode.encode())
+        digest.update(b'\0')
+        digest.update(suffix.encode())
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get_entry_path(self, key):
+        return self.path / key[:2] / f"{key}.pickle"
+
+    def get(self, key):
+        """Return the node info stored for the key or None if there's no entry."""
+        entry_path = self.get_entry_path(key)
+        try:
+            with entry_path.open('rb') as entry_file:
+                node_info = pickle.load(entry_file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as err:
+            logging.debug(f"Discarding cache entry {entry_path}: {err}")
+            self.misses += 1
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return node_info
+
+    def set(self, key, node_info):
+        """Store the node info of a file under the given key."""
+        entry_path = self.get_entry_path(key)
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open('wb') as entry_file:
+                pickle.dump(node_info, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except Exception as err:
+            logging.debug(f"Can't write cache entry {entry_path}: {err}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def prune(self):
+        """Remove the least recently used entries until the cache fits in max_size."""
+        if not self.path.is_dir():
+            return
+
+        entries = []
+        total_size = 0
+        for entry_path in self.path.glob('*/*.pickle'):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total_size -= size
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses"
@@ -1,9 +1,17 @@
 from .rst_extractor import rst_extractor
+from .rst_extractor import rst_metadata_extractor
+from .rst_extractor import rst_converter
 from .json_extractor import json_extractor
 from .yaml_extractor import yaml_extractor
 from .html_extractor import html_extractor
+from .html_extractor import html_metadata_extractor
+from .html_extractor import html_converter
 from .md_extractor import md_extractor
+from .md_extractor import md_metadata_extractor
+from .md_extractor import md_converter
 
+# each extractor is a function ``extractor(text, base_path=None)`` that returns
+# a dictionary with the keys 'title', 'data', 'toc' and 'content'
 extractors = {
     '.rst': rst_extractor,
     '.json': json_extractor,
@@ -15,3 +23,32 @@ extractors = {
     '.markdown': md_extractor,
 }
 
+# extractors that return the same dictionary but with 'content' set to None,
+# used to create the som without converting the documents
+metadata_extractors = {
+    '.rst': rst_metadata_extractor,
+    '.json': json_extractor,
+    '.yaml': yaml_extractor,
+    '.yml': yaml_extractor,
+    '.html': html_metadata_extractor,
+    '.htm': html_metadata_extractor,
+    '.md': md_metadata_extractor,
+    '.markdown': md_metadata_extractor,
+}
+
+# suffixes of the files whose data comes only from their frontmatter (so it
+# can be read without reading or converting the rest of the file)
+frontmatter_suffixes = ('.md', '.markdown', '.html', '.htm')
+
+# suffixes of the files converted with Markdown (their extractors and
+# converter accept an ``extensions`` keyword argument)
+markdown_suffixes = ('.md', '.markdown')
+
+# converters return the content of a document, ``converter(text, base_path=None)``
+converters = {
+    '.rst': rst_converter,
+    '.html': html_converter,
+    '.htm': html_converter,
+    '.md': md_converter,
+    '.markdown': md_converter,
+}
@@ -1,3 +1,4 @@
 
 from .parse_frontmatter import parse_frontmatter
 
+from .read_frontmatter import read_frontmatter
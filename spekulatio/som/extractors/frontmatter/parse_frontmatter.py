@@ -1,11 +1,44 @@
 
-import re
-import yaml
-
 from spekulatio.exceptions import SpekulatioError
 from spekulatio.exceptions import FrontmatterError
+from ..loaders import load_yaml
+
+DELIMITER = '---'
+
+
+def is_delimiter(text, start, end):
+    """Check if the line text[start:end] is a frontmatter delimiter.
+
+    Delimiters are lines with three dashes (and optionally trailing spaces).
+    """
+    return text.startswith(DELIMITER, start, end) and not text[start + 3:end].strip()
 
-FRONTMATTER_PATTERN = re.compile(r'^---\s*?^(.*?)^---\s*?^(.*)', re.MULTILINE|re.DOTALL)
+
+def split_frontmatter(text):
+    """Find the frontmatter section of a text.
+
+    Only the lines up to the closing delimiter are scanned, so the time spent
+    doesn't depend on the size of the rest of the document.
+
+    :return: (frontmatter, content) or None if the text has no frontmatter.
+    """
+    # opening delimiter (the very first line)
+    opening_end = text.find('\n')
+    if opening_end == -1 or not is_delimiter(text, 0, opening_end):
+        return None
+
+    # closing delimiter (the first line that is a delimiter too)
+    position = opening_end
+    while True:
+        line_start = text.find(f"\n{DELIMITER}", position) + 1
+        if not line_start:
+            return None
+        line_end = text.find('\n', line_start)
+        if line_end == -1:
+            return None
+        if is_delimiter(text, line_start, line_end):
+            return text[opening_end + 1:line_start], text[line_end + 1:]
+        position = line_end
 
 def parse_frontmatter(text):
     """Extract YAML frontmatter data from a text.
@@ -30,17 +63,14 @@ def parse_frontmatter(text):
     """
 
     # check if the document has a frontmatter section
-    match = FRONTMATTER_PATTERN.fullmatch(text)
-    if not match:
+    parts = split_frontmatter(text)
+    if parts is None:
         return text, {}
-
-    # get parts
-    frontmatter = match.group(1)
-    content = match.group(2)
+    frontmatter, content = parts
 
     # parse frontmatter
     try:
-        metadata = yaml.safe_load(frontmatter)
+        metadata = load_yaml(frontmatter)
     except Exception as err:
         raise FrontmatterError(f"Can't parse YAML in frontmatter: {err}")
 
@@ -0,0 +1,37 @@
+
+from .parse_frontmatter import DELIMITER
+from .parse_frontmatter import is_delimiter
+from .parse_frontmatter import parse_frontmatter
+
+def read_frontmatter(path):
+    """Read and parse the YAML frontmatter of a file.
+
+    Only the lines up to the closing delimiter are read (through the buffer
+    of the file object), so the cost of reading the metadata of a file
+    depends on the size of its frontmatter but not on the size of its body.
+
+    :return: metadata (an empty dictionary if the file has no frontmatter).
+    """
+    with open(path) as input_file:
+
+        # opening delimiter
+        if input_file.read(len(DELIMITER)) != DELIMITER:
+            return {}
+        first_line = DELIMITER + input_file.readline()
+        if not _is_delimiter_line(first_line):
+            return {}
+
+        # read up to the closing delimiter
+        lines = [first_line]
+        for line in input_file:
+            lines.append(line)
+            if _is_delimiter_line(line):
+                _, metadata = parse_frontmatter(''.join(lines))
+                return metadata
+
+    # no closing delimiter (so it isn't a frontmatter)
+    return {}
+
+def _is_delimiter_line(line):
+    """Check if a line (with its line break) is a frontmatter delimiter."""
+    return line.endswith('\n') and is_delimiter(line, 0, len(line) - 1)
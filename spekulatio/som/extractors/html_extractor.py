@@ -1,7 +1,7 @@
 
 from .frontmatter import parse_frontmatter
 
-def html_extractor(text):
+def html_extractor(text, base_path=None):
     """Extract data from HTML content into a dictionary.
 
     The keys of the returned dictionary are:
@@ -26,3 +26,14 @@ def html_extractor(text):
     }
     return node_info
 
+
+def html_metadata_extractor(text, base_path=None):
+    """Extract data from HTML content without keeping the document."""
+    node_info = html_extractor(text, base_path)
+    node_info['content'] = None
+    return node_info
+
+def html_converter(text, base_path=None):
+    """Return the HTML document without its frontmatter."""
+    content, _ = parse_frontmatter(text)
+    return content
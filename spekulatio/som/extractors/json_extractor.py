@@ -1,14 +1,13 @@
 
-import json
-
 from spekulatio.exceptions import SpekulatioError
+from .loaders import load_json
 from .frontmatter import parse_frontmatter
 
-def json_extractor(text):
+def json_extractor(text, base_path=None):
     """Extract data from JSON content into a dictionary."""
 
     # create dictionary
-    data = json.loads(text)
+    data = load_json(text)
     if not isinstance(data, dict):
         msg = "To extract the content, the top level element in a JSON file must be an object"
         raise SpekulatioError(msg)
@@ -0,0 +1,40 @@
+import re
+import json
+
+import yaml
+
+# libyaml based loader (much faster than the pure Python one, same results)
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# optional faster JSON parser
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson converts integers that don't fit in 64 bits into floats (the
+# smallest one, -9223372036854775809, has 19 digits)
+LONG_NUMBER_RE = re.compile(r'\d{19,}')
+
+
+def load_yaml(text):
+    """Parse a YAML document (like ``yaml.safe_load``)."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def load_json(text):
+    """Parse a JSON document (like ``json.loads``).
+
+    If orjson is installed it's used to parse the document. Documents that
+    it can't parse in exactly the same way as the json module (eg. with NaN
+    values, lone surrogates or big integers) are parsed with the json module.
+    """
+    if orjson is not None and not LONG_NUMBER_RE.search(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
@@ -1,9 +1,57 @@
 
+import re
+import threading
+
 import markdown
 
 from .frontmatter import parse_frontmatter
 
-def md_extractor(text):
+# extensions used to convert the documents (the toc extension is always
+# enabled since the title and toc of the nodes are obtained from it)
+DEFAULT_EXTENSIONS = ('toc',)
+
+# lines that are relevant to get the headings of a document
+SETEXT_UNDERLINE_RE = re.compile(r'(=+|-+)[ ]*$')
+REFERENCE_RE = re.compile(r'[ ]{0,3}\[[^\]]+\]:')
+FENCE_RE = re.compile(r'[ ]{0,3}(`{3,}|~{3,})')
+FENCED_EXTENSIONS = ('fenced_code', 'markdown.extensions.fenced_code', 'extra',
+    'markdown.extensions.extra')
+
+
+class _MarkdownInstances(threading.local):
+    """Markdown converters of a thread, keyed by their set of extensions."""
+
+    def __init__(self):
+        self.instances = {}
+
+
+_instances = _MarkdownInstances()
+
+
+def get_markdown(extensions=None):
+    """Return a ready to use Markdown converter.
+
+    Creating a converter loads and registers all its extensions, which takes
+    longer than converting a small document. Converters are kept per thread
+    (they aren't thread safe) and reset before being used again.
+
+    :param extensions: names of the Markdown extensions to enable (default:
+        DEFAULT_EXTENSIONS).
+    """
+    extensions = tuple(extensions or DEFAULT_EXTENSIONS)
+    if 'toc' not in extensions and 'markdown.extensions.toc' not in extensions:
+        extensions = ('toc', *extensions)
+
+    md = _instances.instances.get(extensions)
+    if md is None:
+        md = markdown.Markdown(extensions=list(extensions))
+        _instances.instances[extensions] = md
+    else:
+        md.reset()
+    return md
+
+
+def md_extractor(text, base_path=None, extensions=None):
     """Extract data from Markdown content into a dictionary.
 
     The keys of the dictionary are:
@@ -12,13 +60,16 @@ def md_extractor(text):
         :content: the HTML document generated from the Markdown one
         :title: first heading of the document
         :toc: list of headings of document
+
+    ``extensions`` are the names of the Markdown extensions to use (see
+    ``get_markdown``).
     """
 
     # parse frontmatter
     content, data = parse_frontmatter(text)
 
     # get body and toc
-    md = markdown.Markdown(extensions=['toc'])
+    md = get_markdown(extensions)
     body = md.convert(content)
     toc = md.toc_tokens
 
@@ -31,3 +82,56 @@ def md_extractor(text):
     }
     return node_info
 
+
+def get_headings_text(text, extensions=None):
+    """Return the lines of a Markdown document needed to get its headings.
+
+    These are the ATX (``# Title``) and setext (underlined) headings and the
+    link references they may use, skipping code blocks. Converting only these
+    lines gives the same toc as converting the whole document.
+    """
+    has_fences = any(extension in FENCED_EXTENSIONS for extension in extensions or ())
+    lines = text.splitlines()
+    headings = []
+    fence = None
+    previous_line = ''
+    for index, line in enumerate(lines):
+        if fence is not None:
+            if line.lstrip().startswith(fence):
+                fence = None
+        elif line.startswith(('    ', '\t')):
+            pass
+        elif has_fences and FENCE_RE.match(line):
+            fence = FENCE_RE.match(line).group(1)
+        elif line.startswith('#') or REFERENCE_RE.match(line):
+            headings.append(line)
+        elif (line.strip() and not previous_line.strip() and index + 1 < len(lines) and
+                SETEXT_UNDERLINE_RE.match(lines[index + 1])):
+            headings.append(f"{line}\n{lines[index + 1]}")
+        previous_line = line
+    return '\n\n'.join(headings)
+
+
+def md_metadata_extractor(text, base_path=None, extensions=None):
+    """Extract data from Markdown content without converting its body.
+
+    The returned dictionary is the same one as in ``md_extractor`` but
+    ``content`` is None. The title and toc are obtained by converting just
+    the headings of the document (see ``get_headings_text``).
+    """
+    content, data = parse_frontmatter(text)
+    md = get_markdown(extensions)
+    md.convert(get_headings_text(content, extensions))
+    toc = md.toc_tokens
+    return {
+        'title': toc[0]['name'] if toc else None,
+        'data': data,
+        'toc': toc,
+        'content': None,
+    }
+
+def md_converter(text, base_path=None, extensions=None):
+    """Convert Markdown content (without frontmatter) into HTML."""
+    content, _ = parse_frontmatter(text)
+    md = get_markdown(extensions)
+    return md.convert(content)
@@ -1,10 +1,29 @@
 
+import os
+import copy
+import threading
+
 from docutils import io
 from docutils import core
 
 from .frontmatter import parse_frontmatter
 
-def rst_extractor(text):
+SETTINGS_OVERRIDES = {
+    'doctitle_xform': False,
+    'initial_header_level': 1,
+}
+
+
+class _Publishers(threading.local):
+    """Docutils publishers of a thread, keyed by writer name."""
+
+    def __init__(self):
+        self.publishers = {}
+
+
+_publishers = _Publishers()
+
+def rst_extractor(text, base_path=None):
     """Extract data from RestructuredText content into a dictionary.
 
     The keys of the dictionary are:
@@ -29,30 +48,86 @@ def rst_extractor(text):
     docinfo ones if the keys are the same. (Be also aware than in the
     docinfo section the values can't have a type other than strings, unlike
     in frontmatter).
+
+    Relative paths in directives such as ``include`` are resolved from
+    ``base_path`` (or from the current directory if it is not set).
     """
 
     # parse frontmatter
     content, metadata = parse_frontmatter(text)
 
-    settings_overrides = {
-        'doctitle_xform': False,
-        'initial_header_level': 1,
-    }
-
-    output, pub = core.publish_programmatically(
-        source_class=io.StringInput, source=content,
-        source_path=None,
-        destination_class=io.NullOutput, destination=None,
-        destination_path=None,
-        reader=None, reader_name='standalone',
-        parser=None, parser_name='restructuredtext',
-        writer=None, writer_name='html5',
-        settings=None, settings_spec=None, settings_overrides=settings_overrides,
-        config_section=None, enable_exit_status=None)
-
-    docinfo = pub.writer.docinfo
+    # convert document
+    pub = _publish(content, base_path)
     body = pub.writer.parts['html_body']
-    toc = _extract_toc(pub.writer.document)
+
+    return _get_node_info(pub.writer.document, metadata, body)
+
+def rst_metadata_extractor(text, base_path=None):
+    """Extract data from RestructuredText content without converting it to HTML.
+
+    The returned dictionary is the same one as in ``rst_extractor`` but
+    ``content`` is None. The document is parsed only to obtain the docinfo
+    section and the toc, which is considerably cheaper than generating its
+    HTML.
+    """
+
+    # parse frontmatter
+    content, metadata = parse_frontmatter(text)
+
+    # parse document
+    document = _publish(content, base_path, writer_name='null').document
+
+    return _get_node_info(document, metadata, None)
+
+def rst_converter(text, base_path=None):
+    """Convert RestructuredText content (without frontmatter) into HTML."""
+    content, _ = parse_frontmatter(text)
+    pub = _publish(content, base_path)
+    return pub.writer.parts['html_body']
+
+def _get_source_path(base_path):
+    """Return the source path to pass to docutils."""
+    # docutils resolves relative paths from the directory of the source
+    return os.path.join(base_path, '<string>') if base_path else None
+
+def _get_publisher(writer_name):
+    """Return the docutils publisher of this thread for a writer.
+
+    Setting up a publisher (creating its components, building the option
+    parser and reading the docutils config files to get the settings) costs
+    more than converting a small document. So each thread keeps a publisher
+    per writer whose components and settings are reused for all documents.
+
+    :return: (publisher, settings) where settings must be copied before
+        using them in a document.
+    """
+    item = _publishers.publishers.get(writer_name)
+    if item is None:
+        publisher = core.Publisher(
+            reader='standalone', parser='restructuredtext', writer=writer_name,
+            source_class=io.StringInput, destination_class=io.NullOutput)
+        publisher.process_programmatic_settings(None, SETTINGS_OVERRIDES, None)
+        item = (publisher, publisher.settings)
+        _publishers.publishers[writer_name] = item
+    return item
+
+def _publish(content, base_path, writer_name='html5'):
+    """Convert a document and return the docutils publisher.
+
+    With the 'null' writer the document is only parsed (the result is in
+    ``publisher.document``).
+    """
+    publisher, settings = _get_publisher(writer_name)
+    publisher.settings = copy.copy(settings)
+    publisher.set_source(content, _get_source_path(base_path))
+    publisher.set_destination(None, None)
+    publisher.publish()
+    return publisher
+
+def _get_node_info(document, metadata, body):
+    """Create the node info dictionary out of a parsed document."""
+    docinfo = _extract_docinfo(document)
+    toc = _extract_toc(document)
 
     data = {}
     data.update(docinfo)
@@ -67,6 +142,19 @@ def rst_extractor(text):
     }
     return node_info
 
+def _extract_docinfo(document):
+    """Extract the fields of the docinfo section of a rst document."""
+    docinfo = {}
+    for node in document.children:
+        if node.tagname != 'docinfo':
+            continue
+        for field in node.children:
+            if field.tagname == 'field':
+                docinfo[field.children[0].astext()] = field.children[1].astext()
+            else:
+                docinfo[field.tagname] = field.astext()
+    return docinfo
+
 def _extract_toc(node, level=1, toc_depth=3):
     """Extract table of contents from rst document."""
     # check if this level has to be processed
@@ -1,14 +1,13 @@
 
-import yaml
-
 from spekulatio.exceptions import SpekulatioError
+from .loaders import load_yaml
 from .frontmatter import parse_frontmatter
 
-def yaml_extractor(text):
+def yaml_extractor(text, base_path=None):
     """Extract data from YAML content into a dictionary."""
 
     # create dictionary
-    data = yaml.safe_load(text)
+    data = load_yaml(text)
     if not isinstance(data, dict):
         msg = "To extract the content, the top level element in a YAML file must be an object"
         raise SpekulatioError(msg)
@@ -0,0 +1,54 @@
+
+from collections.abc import Mapping
+
+
+class LayeredData(Mapping):
+    """Read-only view over a stack of data dictionaries.
+
+    Looking up a key returns the value of the first layer that contains it, so
+    the first layers have priority over the last ones. Adding a layer returns
+    a new view that shares the existing layers instead of copying them::
+
+        >>> parent_data = LayeredData({'a': 1, 'b': 1})
+        >>> data = parent_data.new_layer({'b': 2})
+        >>> dict(data)
+        {'a': 1, 'b': 2}
+
+    Iteration follows the order in which the keys would have been inserted
+    merging the layers from the last to the first one.
+    """
+
+    __slots__ = ('layers',)
+
+    def __init__(self, *layers):
+        self.layers = layers
+
+    def new_layer(self, layer):
+        """Return a new view with a layer on top of the ones of this view."""
+        return LayeredData(layer, *self.layers)
+
+    def __getitem__(self, key):
+        for layer in self.layers:
+            try:
+                return layer[key]
+            except KeyError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return any(key in layer for layer in self.layers)
+
+    def __iter__(self):
+        keys = {}
+        for layer in reversed(self.layers):
+            keys.update(dict.fromkeys(layer))
+        return iter(keys)
+
+    def __len__(self):
+        return len(set().union(*self.layers))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+
+EMPTY_DATA = LayeredData()
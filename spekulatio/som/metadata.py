@@ -0,0 +1,53 @@
+import os
+import logging
+from pathlib import Path
+
+from .extractors import metadata_extractors
+from .extractors import frontmatter_suffixes
+from .extractors.frontmatter import read_frontmatter
+from ..walker import scan_tree
+
+
+def read_metadata(path, base_path=None):
+    """Return the data of a content file reading as little of it as possible.
+
+    For the files whose data only comes from their frontmatter (Markdown and
+    HTML) only the frontmatter is read, regardless of the size of the file.
+    Other files are read completely: in JSON and YAML files the whole file is
+    data and in RestructuredText ones the docinfo section is only available
+    after parsing the document.
+
+    :param base_path: path used to resolve the relative paths in the
+        documents (the root of the content, as in the som). By default, the
+        directory of the file is used.
+    """
+    path = Path(path)
+    if path.suffix in frontmatter_suffixes:
+        return read_frontmatter(path)
+    extractor = metadata_extractors[path.suffix]
+    if base_path is None:
+        base_path = str(path.parent.absolute())
+    return extractor(path.read_text(), base_path=base_path)['data']
+
+
+def iter_metadata(root_path, jobs=1):
+    """Yield ``(relative_path, data)`` for every content file under a directory.
+
+    The data is the one set in each file (see ``read_metadata``), without the
+    data inherited from its directories. Files that can't be read are logged
+    and skipped.
+
+    This is meant for tools that only need the metadata of the files (eg. to
+    list the pages of a site), which don't need to create a whole som.
+    """
+    tree = scan_tree(root_path, jobs=jobs)
+    base_path = str(Path(root_path).absolute())
+    for relative_path, entry in tree.iter_files():
+        if os.path.splitext(entry.name)[1] not in metadata_extractors:
+            continue
+        try:
+            data = read_metadata(entry.path, base_path)
+        except Exception as err:
+            logging.error(f"Can't process file: {entry.path}. {err}")
+            continue
+        yield relative_path, data
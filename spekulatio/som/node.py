@@ -1,28 +1,87 @@
+import sys
+from types import MappingProxyType
+
+from .layered_data import EMPTY_DATA
+
+# shared empty containers for the nodes that don't have any data, toc or children
+EMPTY_MAPPING = MappingProxyType({})
+EMPTY_TUPLE = ()
+
+
+def intern_keys(data):
+    """Return a dictionary with the same items but with interned string keys.
+
+    Records of the same type usually share the same keys, so interning them
+    means that a single string is kept in memory for each key.
+    """
+    if not data:
+        return EMPTY_MAPPING
+    return {sys.intern(key) if type(key) is str else key: value for key, value in data.items()}
 
-from collections import OrderedDict
 
 class Node:
-    """Base class of all the nodes in a som."""
+    """Base class of all the nodes in a som.
+
+    Sites can have hundreds of thousands of nodes, so their layout is kept
+    compact: there's no per instance ``__dict__`` and empty data, tocs and
+    lists of children are shared among all the nodes.
+    """
+
+    __slots__ = (
+        'path', 'is_dir', 'local_data', 'global_data', 'data',
+        '_title', 'toc', '_content', 'raw_data', 'content_loader', 'sources', '_url',
+        'parent', 'next', 'prev', 'root', 'children',
+    )
 
     def __init__(self, path, is_dir, title=None, data=None, toc=None, content=None):
         self.path = path
         self.is_dir = is_dir
-        self.local_data = OrderedDict()
-        self.global_data = OrderedDict()
-        self.data = OrderedDict()
+        self.local_data = EMPTY_MAPPING
+        self.global_data = EMPTY_DATA
+        self.data = EMPTY_DATA
 
         # metadata
-        self._title = title
-        self.toc = toc or []
-        self.content = content
-        self.raw_data = data or {}
+        self.set_info(title, data, toc, content)
+
+        # optional function that returns the content when it wasn't extracted
+        # at creation time (see SOM lazy mode)
+        self.content_loader = None
+
+        # relative paths of the files the node was created from: the content
+        # file for pages and the underscore files for directories
+        self.sources = [] if is_dir else (path,)
+
+        # url cached by the som (see SOM.set_node_data)
+        self._url = None
 
         # relationships
         self.parent = None
         self.next = None
         self.prev = None
         self.root = None
-        self.children = []
+        self.children = [] if is_dir else EMPTY_TUPLE
+
+    def set_info(self, title=None, data=None, toc=None, content=None):
+        """Replace the extracted metadata of the node."""
+        self._title = title
+        self.toc = toc or EMPTY_TUPLE
+        self._content = content
+        self.raw_data = intern_keys(data)
+
+    @property
+    def content(self):
+        if self._content is None and self.content_loader is not None:
+            self._content = self.content_loader()
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    def release_content(self):
+        """Free the memory used by the content if it can be loaded again."""
+        if self.content_loader is not None:
+            self._content = None
 
     @property
     def skip(self):
@@ -34,13 +93,21 @@ class Node:
 
     @property
     def url(self):
+        if self._url is None:
+            return self.get_url()
+        return self._url
+
+    def get_url(self):
+        """Calculate the url of the node out of its data and path."""
+
         # if set explicitly, return the value provided by the user
         manually_set_url = self.data.get('_url')
         if manually_set_url:
             return manually_set_url
 
-        # calculate the relative destination path/url
-        relative_path = self.path.relative_to(self.root.path)
+        # calculate the relative destination path/url (node paths are already
+        # relative to the root of the som)
+        relative_path = self.path
         if self.is_dir:
             html_path = relative_path / 'index.html'
         else:
@@ -0,0 +1,246 @@
+import bisect
+
+from .sorting.keys import get_value_key
+
+# marker of the missing values (None is a valid value of a field)
+MISSING = object()
+
+
+def iter_field_values(value):
+    """Yield the values a field matches: the items of lists or the value itself."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        yield from value
+    else:
+        yield value
+
+
+def is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class NodeList(tuple):
+    """Nodes returned by a query.
+
+    It's an immutable sequence that can be queried again with the same
+    methods of Query (eg. ``query.where('section', 'blog').top('date', 5)``).
+    """
+
+    def __new__(cls, nodes, query, key):
+        node_list = super().__new__(cls, nodes)
+        node_list.query = query
+        node_list.key = key
+        return node_list
+
+    def where(self, field, value):
+        return self.query.run(self, 'where', (field, value))
+
+    def range(self, field, min=None, max=None):
+        return self.query.run(self, 'range', (field, min, max))
+
+    def group_by(self, field):
+        return self.query.run(self, 'group_by', (field,))
+
+    def top(self, field, count, reverse=True):
+        return self.query.run(self, 'top', (field, count, reverse))
+
+
+class Query:
+    """Find the pages of a som by the values of their data fields.
+
+    The methods return a NodeList (or a dictionary of them in ``group_by``):
+
+    * ``where(field, value)``: pages whose field is equal to a value. If the
+      field is a list (eg. tags), the pages where any of its items is equal
+      to the value.
+    * ``range(field, min=None, max=None)``: pages whose field is between min
+      and max (both included), sorted by the field.
+    * ``group_by(field)``: map of each value of a field to its pages.
+    * ``top(field, count, reverse=True)``: the ``count`` pages with the
+      greatest values of the field (or the smallest ones if ``reverse`` is
+      False).
+
+    Pages are returned in the order of the som unless they're sorted by a
+    field. Values of different types are sorted as described in
+    ``get_value_key`` (eg. dates can be compared with ISO date strings).
+    Pages without the field are never returned.
+
+    Queries over all the pages use indexes built the first time each field
+    is queried, and the results of every query are memoized, so the same
+    query run by many pages is only computed once. Queries can be chained
+    (eg. ``query.where('section', 'blog').top('date', 5)``). Since the som
+    is expected not to change, a new Query has to be created for each build.
+
+    :param on_result: optional function called with the nodes of each
+        result (eg. to record the dependencies of the page being rendered).
+    :param on_query: optional function called with the operation and the
+        arguments of each query that is run (memoized or not), so what a
+        result depends on can be recorded too (eg. the queried field).
+    """
+
+    def __init__(self, som, on_result=None, on_query=None):
+        self.som = som
+        self.on_result = on_result
+        self.on_query = on_query
+        self.memo = {}
+        self.pages = None
+        self.value_indexes = {}
+        self.sorted_indexes = {}
+
+    def all(self):
+        """Return all the pages."""
+        return self.run(None, 'all', ())
+
+    def where(self, field, value):
+        return self.run(None, 'where', (field, value))
+
+    def range(self, field, min=None, max=None):
+        return self.run(None, 'range', (field, min, max))
+
+    def group_by(self, field):
+        return self.run(None, 'group_by', (field,))
+
+    def top(self, field, count, reverse=True):
+        return self.run(None, 'top', (field, count, reverse))
+
+    def run(self, base, operation, arguments):
+        """Return the (memoized) result of an operation over some nodes.
+
+        :param base: NodeList with the nodes to query or None to query all
+            the pages.
+        """
+        base_key = () if base is None else base.key
+        key = None
+        if base_key is not None and is_hashable(arguments):
+            key = (base_key, operation, arguments)
+
+        result = self.memo.get(key, MISSING) if key is not None else MISSING
+        if result is MISSING:
+            if base is None:
+                result = getattr(self, f"_indexed_{operation}")(key, *arguments)
+            else:
+                result = getattr(self, f"_{operation}")(base, key, *arguments)
+            if key is not None:
+                self.memo[key] = result
+
+        if self.on_query is not None:
+            self.on_query(operation, arguments)
+        if self.on_result is not None:
+            if isinstance(result, dict):
+                for nodes in result.values():
+                    self.on_result(nodes)
+            else:
+                self.on_result(result)
+        return result
+
+    # indexes
+
+    def get_pages(self):
+        """Return the pages of the som in order."""
+        if self.pages is None:
+            self.pages = [node for node in self.som.iter_nodes() if not node.is_dir]
+        return self.pages
+
+    def get_value_index(self, field):
+        """Return a map of each value of a field to the pages that have it."""
+        index = self.value_indexes.get(field)
+        if index is None:
+            index = {}
+            for node in self.get_pages():
+                for value in iter_field_values(node.data.get(field, MISSING)):
+                    if value is not MISSING and is_hashable(value):
+                        index.setdefault(value, []).append(node)
+            self.value_indexes[field] = index
+        return index
+
+    def get_sorted_index(self, field, reverse=False):
+        """Return the pages with a field sorted by it and their sort keys.
+
+        Pages with the same value keep the order of the som (in both
+        directions).
+        """
+        index = self.sorted_indexes.get((field, reverse))
+        if index is None:
+            nodes = [node for node in self.get_pages() if field in node.data]
+            nodes.sort(key=lambda node: get_value_key(node.data[field]), reverse=reverse)
+            keys = [get_value_key(node.data[field]) for node in nodes]
+            index = (keys, nodes)
+            self.sorted_indexes[(field, reverse)] = index
+        return index
+
+    # operations over all the pages (using the indexes)
+
+    def _indexed_all(self, key):
+        return NodeList(self.get_pages(), self, key)
+
+    def _indexed_where(self, key, field, value):
+        nodes = self.get_value_index(field).get(value, ()) if is_hashable(value) else ()
+        return NodeList(nodes, self, key)
+
+    def _indexed_range(self, key, field, min, max):
+        keys, nodes = self.get_sorted_index(field)
+        start = 0 if min is None else bisect.bisect_left(keys, get_value_key(min))
+        end = len(keys) if max is None else bisect.bisect_right(keys, get_value_key(max))
+        return NodeList(nodes[start:end], self, key)
+
+    def _indexed_group_by(self, key, field):
+        return {
+            value: NodeList(nodes, self, self.get_group_key(key, field, value))
+            for value, nodes in self.get_value_index(field).items()
+        }
+
+    def _indexed_top(self, key, field, count, reverse):
+        _, nodes = self.get_sorted_index(field, reverse)
+        return NodeList(nodes[:count], self, key)
+
+    # operations over the result of a previous query
+
+    def _all(self, base, key):
+        return base
+
+    def _where(self, base, key, field, value):
+        nodes = [
+            node for node in base
+            if any(item == value for item in iter_field_values(node.data.get(field, MISSING)))
+        ]
+        return NodeList(nodes, self, key)
+
+    def _range(self, base, key, field, min, max):
+        min_key = None if min is None else get_value_key(min)
+        max_key = None if max is None else get_value_key(max)
+        nodes = []
+        for node in base:
+            if field not in node.data:
+                continue
+            value_key = get_value_key(node.data[field])
+            if (min_key is None or value_key >= min_key) and \
+                    (max_key is None or value_key <= max_key):
+                nodes.append(node)
+        nodes.sort(key=lambda node: get_value_key(node.data[field]))
+        return NodeList(nodes, self, key)
+
+    def _group_by(self, base, key, field):
+        groups = {}
+        for node in base:
+            for value in iter_field_values(node.data.get(field, MISSING)):
+                if value is not MISSING and is_hashable(value):
+                    groups.setdefault(value, []).append(node)
+        return {
+            value: NodeList(nodes, self, self.get_group_key(key, field, value))
+            for value, nodes in groups.items()
+        }
+
+    def _top(self, base, key, field, count, reverse):
+        nodes = [node for node in base if field in node.data]
+        nodes.sort(key=lambda node: get_value_key(node.data[field]), reverse=reverse)
+        return NodeList(nodes[:count], self, key)
+
+    def get_group_key(self, key, field, value):
+        """Return the key of a group, which is the same as the one of the equivalent ``where``."""
+        if key is None:
+            return None
+        base_key = key[0]
+        return (base_key, 'where', (field, value))
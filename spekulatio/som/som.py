@@ -1,12 +1,110 @@
 import os
+import time
 import logging
+from pathlib import Path
+from functools import partial
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 from .node import Node
+from .node import intern_keys
+from .node import EMPTY_MAPPING
+from .layered_data import EMPTY_DATA
 from .extractors import extractors
+from .extractors import metadata_extractors
+from .extractors import converters
+from .extractors import markdown_suffixes
+from .extractors import frontmatter_suffixes
+from .metadata import read_metadata
 from .sorting import sorting_methods
+from ..walker import ScannedDir
+from ..walker import scan_tree
+from ..profiler import profile_phase
 from ..exceptions import SpekulatioError
 
 
+def get_extractor_options(suffix, markdown_extensions=None):
+    """Return the keyword arguments of the extractor or converter of a suffix."""
+    if markdown_extensions is not None and suffix in markdown_suffixes:
+        return {'extensions': markdown_extensions}
+    return {}
+
+
+def extract_text(suffix, text, base_path, lazy=False, markdown_extensions=None):
+    """Run the extractor associated to a suffix over a text.
+
+    This function is executed in the worker processes, so errors are returned
+    instead of raised.
+
+    :param lazy: if True, only the metadata of the document is extracted.
+    :param markdown_extensions: optional extensions used to convert Markdown.
+    :return: (node_info, error, timing) where only one of node_info and
+        error is set and timing is the (wall, cpu) time of the extraction.
+    """
+    extractor = metadata_extractors[suffix] if lazy else extractors[suffix]
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        options = get_extractor_options(suffix, markdown_extensions)
+        node_info, error = extractor(text, base_path=base_path, **options), None
+    except Exception as err:
+        node_info, error = None, str(err)
+    timing = (time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+    return node_info, error, timing
+
+
+def load_content(path, base_path, markdown_extensions=None):
+    """Read a content file and convert it (used to load node contents lazily)."""
+    converter = converters[path.suffix]
+    options = get_extractor_options(path.suffix, markdown_extensions)
+    return converter(path.read_text(), base_path=base_path, **options)
+
+
+def iter_content_paths(entries):
+    """Yield the paths of the content files in a list of entries (see SOM.scan_dir)."""
+    for path, _, child_entries in entries:
+        if child_entries is None:
+            yield path
+        else:
+            yield from iter_content_paths(child_entries)
+
+
+def is_data_file(path):
+    """Check if a path is an underscore content file (directory data)."""
+    return path.name.startswith('_') and path.suffix in extractors
+
+
+def get_depth(node):
+    """Return the number of ancestors of a node."""
+    return len(node.path.parts)
+
+
+def iter_ancestors(node):
+    """Yield the ancestors of a node from its parent up to the root."""
+    ancestor = node.parent
+    while ancestor is not None:
+        yield ancestor
+        ancestor = ancestor.parent
+
+
+def iter_dir_subtree(node):
+    """Yield the directory nodes under a node."""
+    for child in node.iter_dir_nodes():
+        yield child
+        yield from iter_dir_subtree(child)
+
+
+def get_next_subtree_node(node):
+    """Return the node that follows the last descendant of a node (or None)."""
+    while node.parent is not None:
+        siblings = node.parent.children
+        index = siblings.index(node)
+        if index + 1 < len(siblings):
+            return siblings[index + 1]
+        node = node.parent
+    return None
+
+
 class SOM:
     """The som is a tree of Node objects in which each node represents either a
     directory or a file. Each file node contains all the necessary infromation
@@ -16,131 +114,326 @@ class SOM:
     directory nodes out of the filesystem directories and file nodes out of
     the content files (.rst, .json, .yaml, ...) in them.
     """
-    def __init__(self, root_path):
+    def __init__(self, root_path, cache=None, jobs=1, lazy=False, tree=None, profiler=None,
+            markdown_extensions=None):
         # the map contains an item for each node in the tree:
         # * the key is the path (as a string) of the node
         # * the value is the node itself
         # it is used as a cache to easily retrieve a node given its path
         self.map = {}
 
-        # create the nodes and map
+        # index of the nodes in the map by url (kept up to date along with
+        # the data of the nodes, which may set the url explicitly)
+        self.by_url = {}
+
+        # optional ExtractionCache used to skip the extraction of unchanged files
+        self.cache = cache
+
+        # number of processes used to extract the content files
+        self.jobs = jobs
+
+        # in lazy mode only the metadata of the files is extracted when the som
+        # is created and the content of each node is converted on first access
+        self.lazy = lazy
+
+        # optional Profiler that records the time spent in each phase and file
+        self.profiler = profiler
+
+        # extensions used to convert Markdown files (None to use the default ones)
+        self.markdown_extensions = (
+            tuple(markdown_extensions) if markdown_extensions is not None else None
+        )
+
+        # create the nodes and map (``tree`` is an optional scan of the root
+        # path done with scan_tree that may be shared with other consumers)
         self.root_path = root_path
-        self.root_node = self.create_tree(root_path)
+        with profile_phase(profiler, 'create_tree'):
+            self.root_node = self.create_tree(root_path, tree)
 
         # calculate the data of each node using its local data and the data
         # of its ancestors
-        self.set_node_data(self.root_node)
+        with profile_phase(profiler, 'set_node_data'):
+            self.set_node_data(self.root_node)
 
         # sort siblings
-        self.sort_som_siblings(self.root_node)
+        with profile_phase(profiler, 'sort_som_siblings'):
+            self.sort_som_siblings(self.root_node)
 
         # finally, set the relationship between nodes
-        self.set_som_relationships()
+        with profile_phase(profiler, 'set_som_relationships'):
+            self.set_som_relationships()
 
-    def create_tree(self, path):
+    def create_tree(self, path, tree=None):
         """Create a site object model recursively from a directory path.
 
         The resulting tree will have directory and page nodes, and the metadata
         of each one will be initialized.
+
+        The file tree is traversed first to collect all the content files,
+        then all of them are extracted (in parallel if the som uses more than
+        one job) and finally the nodes are put together.
         """
         if not path.is_dir():
             raise SpekulatioError(f"'{path}' is not a valid directory")
 
+        # collect directories and content files
+        entries = self.scan_dir(path, tree)
+        content_paths = list(iter_content_paths(entries))
+
+        # extract the information of all the content files
+        node_infos = self.extract_files(content_paths)
+
+        # create nodes
+        return self.create_dir_node(Path('.'), entries, node_infos)
+
+    def scan_dir(self, path, tree=None):
+        """Return the directories and content files that hang from a path.
+
+        Each entry is a tuple ``(child_path, relative_path, child_entries)``
+        where ``relative_path`` is relative to the root of the som and
+        ``child_entries`` is the list of entries of a directory or None for
+        files.
+
+        :param tree: optional ScannedDir of the path. If not provided, the
+            directory is scanned (see scan_tree).
+        """
+        if tree is None:
+            relative_path = str(self.get_relative_path(path))
+            tree = scan_tree(path, '' if relative_path == '.' else relative_path, self.jobs)
+        return self.get_entries(tree)
+
+    def get_entries(self, scanned_dir):
+        entries = []
+        for entry in scanned_dir.entries:
+            if isinstance(entry, ScannedDir):
+                entries.append((
+                    Path(entry.path), Path(entry.relative_path), self.get_entries(entry)
+                ))
+            elif os.path.splitext(entry.name)[1] in extractors:
+                relative_path = scanned_dir.get_relative_path(entry.name)
+                entries.append((Path(entry.path), Path(relative_path), None))
+        return entries
+
+    def create_dir_node(self, relative_path, entries, node_infos):
+        """Create the node of a directory and, recursively, the ones of its children."""
+
         # create directory node
-        node = Node(path.relative_to(self.root_path), is_dir=True)
+        node = Node(relative_path, is_dir=True)
         self.map[str(node)] = node
 
         # create children and get directory metadata
         duplicates = set()
         dir_data_parts = []
-        for child_path in path.iterdir():
+        for child_path, child_relative_path, child_entries in entries:
 
             # dir paths
-            if child_path.is_dir():
-                child_node = self.create_tree(child_path)
-                if not child_node.skip:
-                    node.add_child(child_node)
-
-            # data/page paths
-            elif child_path.suffix in extractors:
-
-                # check duplicates
-                if child_path.stem in duplicates:
-                    logging.warning(f"Multiple files with the same basename: '{child_path.stem}'")
-                else:
-                    duplicates.add(child_path.stem)
-
-                # extract node information
-                text = child_path.read_text()
-                extractor = extractors[child_path.suffix]
-                prev_cwd = os.getcwd()
-                os.chdir(self.root_path)
-                try:
-                    node_info = extractor(text)
-                except Exception as err:
-                    logging.error(f"Can't process file: {child_path}. {err}")
-                    continue
-                finally:
-                    os.chdir(prev_cwd)
-
-                if child_path.name.startswith('_'):
-                    dir_data_parts.append({
-                        'name': child_path.name,
-                        'data': node_info['data'],
-                    })
+            if child_entries is not None:
+                child_node = self.create_dir_node(child_relative_path, child_entries, node_infos)
+                if child_node.skip:
+                    self.map.pop(str(child_node))
                 else:
-                    child_node = Node(
-                        path=child_path.relative_to(self.root_path),
-                        is_dir=False,
-                        **node_info)
-                    self.map[str(child_node)] = child_node
                     node.add_child(child_node)
+                continue
+
+            # check duplicates
+            if child_path.stem in duplicates:
+                logging.warning(f"Multiple files with the same basename: '{child_path.stem}'")
+            else:
+                duplicates.add(child_path.stem)
+
+            # skip files that couldn't be extracted
+            node_info = node_infos.get(child_path)
+            if node_info is None:
+                continue
+
+            if child_path.name.startswith('_'):
+                dir_data_parts.append({
+                    'name': child_path.name,
+                    'data': node_info['data'],
+                })
+            else:
+                child_node = self.create_page_node(child_path, child_relative_path, node_info)
+                node.add_child(child_node)
 
         # set directory data
         sorted_dir_data_parts = sorted(dir_data_parts, key=lambda x: x['name'])
+        dir_data = {}
         for data_part in sorted_dir_data_parts:
-            node.raw_data.update(data_part['data'])
+            dir_data.update(data_part['data'])
+            node.sources.append(node.path / data_part['name'])
+        node.raw_data = intern_keys(dir_data)
 
         return node
 
+    def create_page_node(self, path, relative_path, node_info):
+        """Create the node of a content file and add it to the map."""
+        node = Node(path=relative_path, is_dir=False, **node_info)
+        if self.lazy and path.suffix in converters:
+            node.content_loader = partial(
+                load_content, path, self.get_base_path(), self.markdown_extensions)
+        self.map[str(node)] = node
+        return node
+
+    def get_base_path(self):
+        """Return the path used by the extractors to resolve relative paths."""
+        return str(Path(self.root_path).absolute())
+
+    def extract_files(self, paths):
+        """Get the node information of a list of content files.
+
+        Files whose content hasn't changed since they were cached are not
+        extracted again. The rest are processed in a pool of ``self.jobs``
+        worker processes. Only the frontmatter of the underscore files whose
+        data comes from it is read (see ``read_data_file``).
+
+        :return: map of path to node info. Files that can't be processed are
+            logged and left out.
+        """
+        node_infos = {}
+
+        # read files and check cache
+        pending = []
+        for path in paths:
+            if is_data_file(path) and path.suffix in frontmatter_suffixes:
+                node_info = self.read_data_file(path)
+                if node_info is not None:
+                    node_infos[path] = node_info
+                continue
+
+            try:
+                text = path.read_text()
+            except Exception as err:
+                logging.error(f"Can't process file: {path}. {err}")
+                continue
+
+            key = None
+            if self.cache is not None:
+                key = self.cache.get_key(path.suffix, text, self.get_extraction_mode(path.suffix))
+            if key is not None:
+                node_info = self.cache.get(key)
+                if node_info is not None:
+                    node_infos[path] = node_info
+                    continue
+
+            pending.append((path, text, key))
+
+        # run extractors
+        suffixes = [path.suffix for path, _, _ in pending]
+        texts = [text for _, text, _ in pending]
+        base_paths = repeat(self.get_base_path())
+        lazy = repeat(self.lazy)
+        markdown_extensions = repeat(self.markdown_extensions)
+        arguments = (suffixes, texts, base_paths, lazy, markdown_extensions)
+        if self.jobs > 1 and len(pending) > 1:
+            chunksize = max(1, len(pending) // (self.jobs * 4))
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                results = list(executor.map(extract_text, *arguments, chunksize=chunksize))
+        else:
+            results = map(extract_text, *arguments)
+
+        # collect results
+        for (path, _, key), (node_info, error, timing) in zip(pending, results):
+            if self.profiler is not None:
+                self.profiler.record_file('extractor', path.suffix, path, *timing)
+            if error is not None:
+                logging.error(f"Can't process file: {path}. {error}")
+                continue
+            if key is not None:
+                self.cache.set(key, node_info)
+            node_infos[path] = node_info
+
+        return node_infos
+
+    def read_data_file(self, path):
+        """Get the node information of an underscore file out of its frontmatter.
+
+        Only the data of underscore files is used (for their directories), so
+        the rest of the file doesn't need to be read or converted.
+
+        :return: node info or None if the file can't be read.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            data = read_metadata(path, self.get_base_path())
+        except Exception as err:
+            logging.error(f"Can't process file: {path}. {err}")
+            return None
+        if self.profiler is not None:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            self.profiler.record_file('extractor', path.suffix, path, wall, cpu)
+        return {'title': None, 'data': data, 'toc': None, 'content': None}
+
+    def get_extraction_mode(self, suffix):
+        """Return the mode of the cache entries of the files with a suffix.
+
+        Besides the lazy mode, it includes the options of the extractor, so
+        changing them doesn't reuse entries extracted with other options.
+        """
+        mode = 'metadata' if self.lazy else 'full'
+        options = get_extractor_options(suffix, self.markdown_extensions)
+        if options:
+            mode += f":{sorted(options.items())}"
+        return mode
+
     def set_node_data(self, node):
         """Make data inherit from parent to children.
 
-        In a node there are two kinds of data dictionaries:
+        In a node there are three kinds of data:
+
+        * local_data: data explicitly set on the node under the '_local' key
+          (not inherited by its descendants)
+        * global_data: data set on the node (except '_local') layered on top
+          of the global data of its parent
+        * data: local data layered on top of the global data
 
-        * local_data: data explicitly set on the node
-        * data: local data merged with the inherited one
+        The layers are views over the original dictionaries (see LayeredData),
+        so the inherited data is never copied into the descendant nodes.
 
         The farder the origin of the data to a given node, the least it has
         priority over the same keys set deeper in the tree.
-        """
 
-        # inherit parent's global data
-        if node != self.root_node:
-            node.global_data.update(node.parent.global_data)
+        As the url of a node may be set in its data, it is calculated here too
+        and the node is indexed in ``by_url``.
+        """
 
         # process raw data
-        node.global_data.update(
-            {key: value for key, value in node.raw_data.items() if key != '_local'}
-        )
-        node.local_data.update(node.raw_data.get('_local', {}))
+        own_data = node.raw_data
+        if '_local' in own_data:
+            own_data = {key: value for key, value in own_data.items() if key != '_local'}
+        node.local_data = node.raw_data.get('_local') or EMPTY_MAPPING
+
+        # inherit parent's global data
+        if node == self.root_node:
+            parent_data = EMPTY_DATA
+        else:
+            parent_data = node.parent.global_data
+        node.global_data = parent_data.new_layer(own_data) if own_data else parent_data
 
         # merge global and local data
-        node.data.update(node.global_data)
-        node.data.update(node.local_data)
+        if node.local_data:
+            node.data = node.global_data.new_layer(node.local_data)
+        else:
+            node.data = node.global_data
+
+        # cache url
+        self.unindex_url(node)
+        node._url = node.get_url()
+        self.by_url[node._url] = node
 
         # process children recursively
         for child in node.children:
             self.set_node_data(child)
 
-    def sort_som_siblings(self, node):
+    def sort_som_siblings(self, node, recursive=True):
         """Sort siblings in every dir node of a som."""
 
         # get sorting method
         sorting_method = node.data.get('_sorting_method', 'none')
-        if sorting_method not in ('none', 'name', 'field', 'list'):
+        if sorting_method not in sorting_methods:
             msg = f"Unknown sorting method '{sorting_method}' in {node.path}. "
-            msg += "Valid values: 'none', 'name', 'field', 'list'."
+            msg += f"Valid values: {', '.join(repr(name) for name in sorting_methods)}."
             raise SpekulatioError(msg)
 
         # get sorting direction
@@ -155,29 +448,239 @@ class SOM:
         if not sorting_data and sorting_method in ('field', 'list'):
             msg = f"Sorting by {sorting_method} requires to set the '_sorting_data' field."
             raise SpekulatioError(msg)
+        if sorting_method == 'field' and not isinstance(sorting_data, str) and not (
+                isinstance(sorting_data, list) and
+                all(isinstance(field, str) for field in sorting_data)):
+            msg = f"Wrong '_sorting_data' in {node.path}. Sorting by field requires the "
+            msg += "name of a field or a list of names."
+            raise SpekulatioError(msg)
 
         # sort the children of this node
         sorting_parameters = {
             'direction': sorting_direction,
             'data': sorting_data,
         }
-        if sorting_method in sorting_methods:
-            sorting_function = sorting_methods[sorting_method]
-            node.children = sorting_function(node.children, **sorting_parameters)
+        sorting_function = sorting_methods[sorting_method]
+        node.children = sorting_function(node.children, **sorting_parameters)
 
         # sort children recursively
-        for child in node.iter_dir_nodes():
-            self.sort_som_siblings(child)
+        if recursive:
+            for child in node.iter_dir_nodes():
+                self.sort_som_siblings(child)
 
     def set_som_relationships(self):
         """Set the next, prev and root relationships of every node."""
         self.root_node.root = self.root_node
-        prev_node = self.root_node
-        for node in self.root_node.iter_nodes():
-            node.root = self.root_node
-            node.prev = prev_node
-            prev_node.next = node
-            prev_node = node
+        self.set_subtree_relationships(self.root_node)
+
+    def set_subtree_relationships(self, node):
+        """Set the next, prev and root relationships of the nodes under a node.
+
+        The last node of the subtree is linked to the node that follows it.
+        """
+        prev_node = node
+        for child in node.iter_nodes():
+            child.root = self.root_node
+            child.prev = prev_node
+            prev_node.next = child
+            prev_node = child
+
+        next_node = get_next_subtree_node(node)
+        prev_node.next = next_node
+        if next_node is not None:
+            next_node.prev = prev_node
+
+    def update(self, added=(), modified=(), deleted=()):
+        """Apply changes in the content files without recreating the whole som.
+
+        Only the added and modified files are extracted. Data inheritance is
+        recalculated for the modified pages and for the whole subtree of any
+        directory whose underscore files changed. Then only the affected
+        directories are sorted again and the prev/next links and map entries
+        are patched in place.
+
+        :param added: paths of the files (or directories) created.
+        :param modified: paths of the files modified.
+        :param deleted: paths of the files (or directories) removed.
+        """
+        changed_dirs = set()    # dirs whose children have to be sorted again
+        data_dirs = set()       # dirs whose data has to be recalculated
+        changed_pages = set()   # pages whose data has to be recalculated
+
+        # remove deleted nodes
+        for path in deleted:
+            relative_path = self.get_relative_path(path)
+            node = self.map.get(str(relative_path))
+            if node is not None:
+                self.remove_node(node, changed_dirs)
+            elif is_data_file(relative_path):
+                dir_node = self.map.get(str(relative_path.parent))
+                if dir_node is not None:
+                    data_dirs.add(dir_node)
+
+        # get the content files to extract
+        page_paths = []
+        for path in [*added, *modified]:
+            path = self.root_path / self.get_relative_path(path)
+            if path.is_dir():
+                child_paths = iter_content_paths(self.scan_dir(path))
+            elif path.suffix in extractors:
+                child_paths = [path]
+            else:
+                continue
+
+            # (the nodes of new directories are created here so that their
+            # data files are read below)
+            for child_path in child_paths:
+                relative_path = child_path.relative_to(self.root_path)
+                dir_node = self.get_dir_node(relative_path.parent, data_dirs, changed_dirs)
+                if is_data_file(relative_path):
+                    data_dirs.add(dir_node)
+                else:
+                    page_paths.append(child_path)
+
+        data_paths = {
+            dir_node: sorted(
+                (child_path for child_path in (self.root_path / dir_node.path).iterdir()
+                    if is_data_file(child_path)),
+                key=lambda child_path: child_path.name,
+            )
+            for dir_node in data_dirs if (self.root_path / dir_node.path).is_dir()
+        }
+        all_data_paths = [data_path for paths in data_paths.values() for data_path in paths]
+        node_infos = self.extract_files(page_paths + all_data_paths)
+
+        # create or update pages
+        for page_path in page_paths:
+            relative_path = page_path.relative_to(self.root_path)
+            node = self.map.get(str(relative_path))
+            node_info = node_infos.get(page_path)
+            if node_info is None:
+                if node is not None:
+                    self.remove_node(node, changed_dirs)
+                continue
+
+            if node is None:
+                parent = self.get_dir_node(relative_path.parent, data_dirs, changed_dirs)
+                stem = relative_path.stem
+                if any(sibling.path.stem == stem for sibling in parent.children):
+                    logging.warning(f"Multiple files with the same basename: '{stem}'")
+                node = self.create_page_node(page_path, relative_path, node_info)
+                parent.add_child(node)
+            else:
+                node.set_info(**node_info)
+            changed_dirs.add(node.parent)
+            changed_pages.add(node)
+
+        # update directory data
+        for dir_node, dir_data_paths in data_paths.items():
+            dir_data = {}
+            dir_node.sources = []
+            for data_path in dir_data_paths:
+                node_info = node_infos.get(data_path)
+                if node_info is not None:
+                    dir_data.update(node_info['data'])
+                    dir_node.sources.append(dir_node.path / data_path.name)
+            dir_node.raw_data = intern_keys(dir_data)
+            if dir_node.parent is not None:
+                changed_dirs.add(dir_node.parent)
+
+        # detach directories that were left without children
+        for dir_node in sorted(changed_dirs | data_dirs, key=get_depth, reverse=True):
+            while dir_node.parent is not None and not dir_node.children:
+                parent = dir_node.parent
+                self.map.pop(str(dir_node), None)
+                self.unindex_url(dir_node)
+                self.detach_node(dir_node)
+                changed_dirs.add(parent)
+                dir_node = parent
+
+        # only consider nodes that are still part of the tree
+        changed_dirs = {node for node in changed_dirs if self.is_in_tree(node)}
+        data_dirs = {node for node in data_dirs if self.is_in_tree(node)}
+        changed_pages = {node for node in changed_pages if self.is_in_tree(node)}
+
+        # get the directories that have to be sorted again
+        unsorted_dirs = set(changed_dirs)
+        for dir_node in data_dirs:
+            unsorted_dirs.add(dir_node)
+            unsorted_dirs.update(iter_dir_subtree(dir_node))
+
+        # recalculate data (parents first)
+        for node in sorted(data_dirs | changed_pages, key=get_depth):
+            if not any(ancestor in data_dirs for ancestor in iter_ancestors(node)):
+                self.set_node_data(node)
+
+        # sort directories again
+        for dir_node in unsorted_dirs:
+            self.sort_som_siblings(dir_node, recursive=False)
+
+        # patch prev/next relationships
+        affected_dirs = data_dirs | changed_dirs
+        for dir_node in affected_dirs:
+            if not any(ancestor in affected_dirs for ancestor in iter_ancestors(dir_node)):
+                if self.is_in_tree(dir_node):
+                    self.set_subtree_relationships(dir_node)
+
+    def get_relative_path(self, path):
+        """Return a path relative to the root of the som."""
+        path = Path(path)
+        try:
+            return path.relative_to(self.root_path)
+        except ValueError:
+            return path.absolute().relative_to(Path(self.root_path).absolute())
+
+    def get_dir_node(self, relative_path, new_dirs, changed_dirs):
+        """Return the node of a directory creating (and attaching) it if necessary.
+
+        Newly created nodes are added to ``new_dirs`` and the directories
+        they're attached to are added to ``changed_dirs``.
+        """
+        node = self.map.get(str(relative_path))
+        if node is None:
+            node = Node(relative_path, is_dir=True)
+            self.map[str(node)] = node
+            new_dirs.add(node)
+        if node is not self.root_node and node.parent is None:
+            parent = self.get_dir_node(relative_path.parent, new_dirs, changed_dirs)
+            parent.add_child(node)
+            new_dirs.add(node)
+            changed_dirs.add(parent)
+        return node
+
+    def remove_node(self, node, changed_dirs):
+        """Remove a node and all its descendants from the som."""
+        pending = [node]
+        while pending:
+            descendant = pending.pop()
+            self.map.pop(str(descendant), None)
+            self.unindex_url(descendant)
+            if descendant.is_dir:
+                pending.extend(descendant.children)
+        if node.parent is not None:
+            changed_dirs.add(node.parent)
+            self.detach_node(node)
+
+    def unindex_url(self, node):
+        """Remove a node from the url index."""
+        if node._url is not None and self.by_url.get(node._url) is node:
+            del self.by_url[node._url]
+
+    def detach_node(self, node):
+        """Remove a node from the children of its parent."""
+        node.parent.children.remove(node)
+        node.parent = None
+
+    def is_in_tree(self, node):
+        """Check if a node is reachable from the root node."""
+        if self.map.get(str(node)) is not node:
+            return False
+        ancestor = node
+        while ancestor.parent is not None:
+            if ancestor not in ancestor.parent.children:
+                return False
+            ancestor = ancestor.parent
+        return ancestor is self.root_node
 
     def iter_nodes(self):
         """Yield one by one all the nodes of the som."""
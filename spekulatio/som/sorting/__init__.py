@@ -1,12 +1,14 @@
 
 from .none_sorting import none_sorting
 from .name_sorting import name_sorting
+from .natural_sorting import natural_sorting
 from .field_sorting import field_sorting
 from .list_sorting import list_sorting
 
 sorting_methods = {
     'none': none_sorting,
     'name': name_sorting,
+    'natural': natural_sorting,
     'field': field_sorting,
     'list': list_sorting,
 }
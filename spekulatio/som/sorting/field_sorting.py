@@ -1,28 +1,36 @@
 
 import logging
 
+from .keys import MISSING_KEY
+from .keys import get_fields_key
+
 
 def field_sorting(nodes, direction, data):
-    """Sort nodes according to one of their data fields."""
+    """Sort nodes according to one or several of their data fields.
+
+    ``data`` is the name of the field or a list of names (eg. ``[date,
+    title]``): nodes are sorted by the first field, then by the second one...
+    Values of different types can be sorted together (see
+    ``get_value_key``). Nodes without a field go after the ones that have it
+    in both directions.
+    """
     reverse = direction == 'desc'
-    field = data
+    fields = [data] if isinstance(data, str) else list(data)
 
-    # classify nodes according if they have the required field or not
-    nodes_without_field = []
-    nodes_with_field = []
+    # get the sort keys of the nodes
+    keyed_nodes = []
     for node in nodes:
-        if field in node.data:
-            nodes_with_field.append(node)
-        else:
-            nodes_without_field.append(node)
-            logging.warning(f"Not sorting {node.path}. File doesn't contain a field '{field}'")
-
-    # get sorted nodes
-    try:
-        sorted_nodes = sorted(nodes_with_field, reverse=reverse, key=lambda n: n.data[field])
-    except Exception as err:
-        logging.warning(f"Can't sort pages by field {field}: {err}")
-        sorted_nodes = nodes_with_field
+        key = get_fields_key(node.data, fields)
+        if key[0] is MISSING_KEY:
+            logging.warning(f"{node.path} doesn't contain a field '{fields[0]}'. Sorting it last.")
+        keyed_nodes.append((key, node))
 
-    return sorted_nodes
+    # sort by each field starting with the last one (sorting is stable, so
+    # nodes with the same value keep the order of the following fields)
+    for index in reversed(range(len(fields))):
+        present = [item for item in keyed_nodes if item[0][index] is not MISSING_KEY]
+        missing = [item for item in keyed_nodes if item[0][index] is MISSING_KEY]
+        present.sort(key=lambda item: item[0][index], reverse=reverse)
+        keyed_nodes = present + missing
 
+    return [node for _, node in keyed_nodes]
@@ -0,0 +1,57 @@
+import re
+import math
+import datetime
+
+# rank of each kind of value (values of different kinds are never compared
+# with each other, the ones with lower rank go first)
+NONE_RANK = 0
+NUMBER_RANK = 1
+TEXT_RANK = 2
+OTHER_RANK = 3
+MISSING_RANK = 4
+
+# key of the fields a node doesn't have (they go after any value)
+MISSING_KEY = (MISSING_RANK, '')
+
+NUMBER_RE = re.compile(r'(\d+)')
+
+
+def get_value_key(value):
+    """Return a sort key for a data value that can be compared with any other.
+
+    Values of the same kind are compared as usual. Dates and datetimes are
+    compared as ISO strings, so they can be compared with dates written as
+    text (eg. '2020-01-31'). Values of different kinds are sorted by kind:
+    None, numbers, text and anything else (compared by its string
+    representation).
+    """
+    if value is None:
+        return (NONE_RANK, 0)
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return (OTHER_RANK, 'nan')
+        return (NUMBER_RANK, value)
+    if isinstance(value, str):
+        return (TEXT_RANK, value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return (TEXT_RANK, value.isoformat())
+    return (OTHER_RANK, str(value))
+
+
+def get_fields_key(data, fields):
+    """Return the sort key of some data by several fields (missing ones go last)."""
+    return tuple(
+        get_value_key(data[field]) if field in data else MISSING_KEY for field in fields
+    )
+
+
+def get_natural_key(name):
+    """Return a key to sort names with numbers in natural order.
+
+    The numbers in the name are compared by their value (eg. 'page2' goes
+    before 'page10'). Names with the same key (eg. 'page01' and 'page1') are
+    compared as text.
+    """
+    parts = NUMBER_RE.split(name)
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return parts, name
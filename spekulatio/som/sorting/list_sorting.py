@@ -3,29 +3,36 @@ import logging
 
 
 def list_sorting(nodes, direction, data):
-    """Sort nodes by using an explicit list."""
+    """Sort nodes by using an explicit list.
+
+    Nodes that aren't in the list go after the listed ones (in their original
+    order) in both directions.
+    """
 
     reverse = direction == 'desc'
-    sorted_nodes = []
-    unsorted_nodes = nodes[:]
     path_list = data
 
+    # nodes by path (if several nodes have the same path, the first one is used)
+    unsorted_nodes = {}
+    for node in nodes:
+        unsorted_nodes.setdefault(str(node), node)
+
     # get the nodes sorted in the same order of the list
+    sorted_nodes = []
     for path in path_list:
-        for index, node in enumerate(unsorted_nodes):
-            if str(node) == path:
-                sorted_nodes.append(unsorted_nodes.pop(index))
-                break
-        else:
+        node = unsorted_nodes.pop(path, None)
+        if node is None:
             logging.warning(f"Can't find {path} among the files to sort.")
-
-    # check if there was a 1:1 relationship between list and nodes
-    for node in unsorted_nodes:
-        logging.warning(f"Not sorting {node.path}. File not in sorting list.")
+        else:
+            sorted_nodes.append(node)
 
     # reverse if necessary
     if reverse:
         sorted_nodes.reverse()
 
-    return sorted_nodes
+    # check if there was a 1:1 relationship between list and nodes
+    for node in unsorted_nodes.values():
+        logging.warning(f"{node.path} is not in the sorting list. Sorting it last.")
+        sorted_nodes.append(node)
 
+    return sorted_nodes
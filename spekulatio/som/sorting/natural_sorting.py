@@ -0,0 +1,8 @@
+
+from .keys import get_natural_key
+
+
+def natural_sorting(nodes, direction, data):
+    """Sort nodes by name comparing the numbers in it by value (eg. 'page2' < 'page10')."""
+    reverse = direction == 'desc'
+    return sorted(nodes, reverse=reverse, key=lambda n: get_natural_key(str(n)))
@@ -0,0 +1,80 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ScannedDir:
+    """Contents of a directory read with ``os.scandir``.
+
+    ``entries`` keeps the children in the order returned by the file system:
+    files are ``os.DirEntry`` objects (which cache the result of ``stat``)
+    and subdirectories are ScannedDir objects.
+
+    ``relative_path`` is the path of the directory relative to the root of
+    the scan ('' for the root itself), so consumers don't need to compute it.
+    """
+
+    __slots__ = ('path', 'relative_path', 'entries')
+
+    def __init__(self, path, relative_path):
+        self.path = path
+        self.relative_path = relative_path
+        self.entries = []
+
+    def get_relative_path(self, name):
+        """Return the path relative to the root of the scan of a child."""
+        return f"{self.relative_path}/{name}" if self.relative_path else name
+
+    def iter_dirs(self):
+        for entry in self.entries:
+            if isinstance(entry, ScannedDir):
+                yield entry
+
+    def iter_files(self):
+        """Yield ``(relative_path, entry)`` for all the files under this directory."""
+        for entry in self.entries:
+            if isinstance(entry, ScannedDir):
+                yield from entry.iter_files()
+            else:
+                yield self.get_relative_path(entry.name), entry
+
+
+def _scan_dir(scanned_dir):
+    """Read the entries of a directory and return its subdirectories."""
+    subdirs = []
+    with os.scandir(scanned_dir.path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                subdir = ScannedDir(entry.path, scanned_dir.get_relative_path(entry.name))
+                scanned_dir.entries.append(subdir)
+                subdirs.append(subdir)
+            else:
+                scanned_dir.entries.append(entry)
+    return subdirs
+
+
+def scan_tree(path, relative_path='', jobs=1):
+    """Read a whole directory tree with a single traversal.
+
+    Directories are read level by level. If ``jobs`` is greater than one,
+    the directories of each level are read concurrently in a pool of
+    threads (useful for network file systems, where each read has a high
+    latency).
+
+    :param path: root directory to scan.
+    :param relative_path: relative path assigned to the root directory.
+    :return: ScannedDir of the root directory.
+    """
+    root = ScannedDir(os.fspath(path), relative_path)
+    pending = [root]
+    executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while pending:
+            if executor is not None and len(pending) > 1:
+                results = executor.map(_scan_dir, pending)
+            else:
+                results = map(_scan_dir, pending)
+            pending = [subdir for subdirs in results for subdir in subdirs]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return root
@@ -0,0 +1,116 @@
+import os
+import time
+import logging
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+def take_snapshot(paths):
+    """Return a map of every file under paths to its (mtime, size)."""
+    snapshot = {}
+    for root_path in paths:
+        for dir_path, _, file_names in os.walk(root_path, followlinks=True):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def compare_snapshots(old_snapshot, new_snapshot):
+    """Return the set of files added, modified or deleted between two snapshots."""
+    changed_paths = set(old_snapshot.keys() ^ new_snapshot.keys())
+    for file_path, stat in new_snapshot.items():
+        if file_path in old_snapshot and old_snapshot[file_path] != stat:
+            changed_paths.add(file_path)
+    return changed_paths
+
+
+class PollingWatcher:
+    """Detect changes in a set of directories by periodically checking the
+    modification time and size of the files in them."""
+
+    def __init__(self, paths, interval=0.5):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = take_snapshot(paths)
+
+    def wait(self):
+        """Block until some files change and return their paths."""
+        while True:
+            time.sleep(self.interval)
+            new_snapshot = take_snapshot(self.paths)
+            changed_paths = compare_snapshots(self.snapshot, new_snapshot)
+            self.snapshot = new_snapshot
+            if changed_paths:
+                return changed_paths
+
+
+class InotifyWatcher:
+    """Detect changes in a set of directories using inotify (Linux only)."""
+
+    watch_flags = (
+        inotify_simple.flags.CREATE | inotify_simple.flags.DELETE |
+        inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_FROM |
+        inotify_simple.flags.MOVED_TO | inotify_simple.flags.ATTRIB
+    ) if inotify_simple else 0
+
+    def __init__(self, paths, delay=0.1):
+        self.delay = delay
+        self.inotify = inotify_simple.INotify()
+        self.dirs = {}
+        for root_path in paths:
+            for dir_path, _, _ in os.walk(root_path, followlinks=True):
+                self.add_watch(dir_path)
+
+    def add_watch(self, dir_path):
+        try:
+            wd = self.inotify.add_watch(dir_path, self.watch_flags)
+        except OSError as err:
+            logging.warning(f"Can't watch directory {dir_path}: {err}")
+            return
+        self.dirs[wd] = dir_path
+
+    def wait(self):
+        """Block until some files change and return their paths.
+
+        Events are collected until there's a pause of ``delay`` seconds, so
+        that editors that write several files at once trigger a single rebuild.
+        """
+        flags = inotify_simple.flags
+        changed_paths = set()
+        while not changed_paths:
+            events = self.inotify.read()
+            while events:
+                for event in events:
+                    dir_path = self.dirs.get(event.wd)
+                    if dir_path is None or not event.name:
+                        continue
+                    path = os.path.join(dir_path, event.name)
+                    changed_paths.add(path)
+
+                    # watch new directories (and consider their files changed)
+                    if event.mask & flags.ISDIR and event.mask & (flags.CREATE | flags.MOVED_TO):
+                        for new_dir_path, _, file_names in os.walk(path, followlinks=True):
+                            self.add_watch(new_dir_path)
+                            changed_paths.update(
+                                os.path.join(new_dir_path, name) for name in file_names)
+
+                events = self.inotify.read(timeout=int(self.delay * 1000))
+        return changed_paths
+
+
+def create_watcher(paths):
+    """Return an inotify watcher if available or a polling one otherwise."""
+    if inotify_simple is not None:
+        try:
+            return InotifyWatcher(paths)
+        except OSError as err:
+            logging.debug(f"Can't use inotify, falling back to polling: {err}")
+    return PollingWatcher(paths)
@@ -1,6 +1,8 @@
 import time
 
 from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree.actions import copy_factory
+from spekulatio.build_file_tree.actions import copy_modes
 
 
 def test_basic_file_tree(tmp_path):
@@ -173,3 +175,61 @@ def test_basic_file_tree_cache(tmp_path):
     build_file_tree(src_path, dst_path, no_cache=False, actions={})
     assert dst_foo.stat().st_mtime >= prev_timestamp
 
+
+
+def test_parallel_file_tree(tmp_path):
+    """Build a file tree with several worker threads."""
+
+    # source
+    src_path = tmp_path / 'src/'
+    src_path.mkdir()
+    for index in range(10):
+        dir_path = src_path / f'dir{index}' / 'subdir'
+        dir_path.mkdir(parents=True)
+        (dir_path / 'foo.txt').write_text(f'foo {index}')
+        (dir_path / 'bar.err').write_text(f'bar {index}')
+
+    # destination
+    dst_path = tmp_path / 'dst/'
+    dst_path.mkdir()
+
+    # build tree
+    def fail(root_src_path, src_path, root_dst_path, dst_path):
+        raise ValueError('wrong file')
+
+    failures = build_file_tree(
+        src_path, dst_path, no_cache=True,
+        actions={'.err': fail}, jobs=4
+    )
+
+    for index in range(10):
+        dst_foo = dst_path / f'dir{index}' / 'subdir' / 'foo.txt'
+        assert dst_foo.read_text() == f'foo {index}'
+    assert sorted(failures) == sorted(src_path.glob('*/subdir/bar.err'))
+
+
+def test_copy_modes(tmp_path):
+    """Check the different ways of copying static files."""
+
+    src_path = tmp_path / 'src/'
+    src_path.mkdir()
+    foo = src_path / 'foo.txt'
+    foo.write_text('foo content')
+
+    for mode in copy_modes:
+        dst_path = tmp_path / mode
+        dst_path.mkdir()
+        copy = copy_factory(mode)
+        build_file_tree(src_path, dst_path, no_cache=False, actions={}, default_action=copy)
+
+        dst_foo = dst_path / 'foo.txt'
+        assert dst_foo.read_text() == 'foo content'
+        assert dst_foo.is_symlink() == (mode == 'symlink')
+        assert (dst_foo.stat().st_ino == foo.stat().st_ino) == (mode != 'copy')
+        assert copy.is_up_to_date(src_path, foo, dst_path, dst_foo)
+
+    # copies are only up to date while they have the same size and mtime
+    dst_foo = tmp_path / 'copy/foo.txt'
+    dst_foo.write_text('bar content')
+    assert not copy_factory('copy').is_up_to_date(src_path, foo, tmp_path / 'copy', dst_foo)
+    assert not copy_factory('symlink').is_up_to_date(src_path, foo, tmp_path / 'copy', dst_foo)
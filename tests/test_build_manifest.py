@@ -0,0 +1,91 @@
+import os
+
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import BuildManifest
+from spekulatio.build_file_tree import write_output
+
+
+def upper(root_src_path, src_path, root_dst_path, dst_path):
+    write_output(dst_path, src_path.read_text().upper())
+
+
+def test_skip_unchanged_outputs(tmp_path):
+    """Check that outputs are only written when their content changes."""
+
+    src_path = tmp_path / 'src/'
+    src_path.mkdir()
+    (src_path / 'foo.txt').write_text('foo')
+    (src_path / 'bar.txt').write_text('bar')
+
+    dst_path = tmp_path / 'dst/'
+    dst_path.mkdir()
+    manifest_path = tmp_path / 'manifest.json'
+    manifest = BuildManifest(manifest_path)
+    build_file_tree(src_path, dst_path, no_cache=True, actions={'.txt': upper},
+        manifest=manifest)
+    manifest.save()
+    assert (dst_path / 'foo.txt').read_text() == 'FOO'
+
+    # regenerate everything with only one change
+    os.utime(dst_path / 'foo.txt', ns=(0, 0))
+    os.utime(dst_path / 'bar.txt', ns=(0, 0))
+    (src_path / 'bar.txt').write_text('baz')
+    manifest = BuildManifest(manifest_path)
+    build_file_tree(src_path, dst_path, no_cache=True, actions={'.txt': upper},
+        manifest=manifest)
+
+    assert (dst_path / 'foo.txt').stat().st_mtime_ns == 0
+    assert (dst_path / 'bar.txt').stat().st_mtime_ns != 0
+    assert (dst_path / 'bar.txt').read_text() == 'BAZ'
+
+
+def test_prune_orphaned_outputs(tmp_path):
+    """Check that the outputs of deleted sources are removed."""
+
+    src_path = tmp_path / 'src/'
+    dir1 = src_path / 'dir1/'
+    dir1.mkdir(parents=True)
+    (src_path / 'foo.txt').write_text('foo')
+    (src_path / 'bar.css').write_text('bar')
+    (dir1 / 'baz.txt').write_text('baz')
+
+    dst_path = tmp_path / 'dst/'
+    dst_path.mkdir()
+    (dst_path / 'other.txt').write_text('not generated')
+    manifest = BuildManifest(tmp_path / 'manifest.json')
+    build_file_tree(src_path, dst_path, no_cache=True, actions={'.txt': upper},
+        manifest=manifest)
+    assert (dst_path / 'dir1/baz.txt').is_file()
+
+    (src_path / 'bar.css').unlink()
+    (dir1 / 'baz.txt').unlink()
+    dir1.rmdir()
+    build_file_tree(src_path, dst_path, no_cache=False, actions={'.txt': upper},
+        manifest=manifest)
+
+    assert sorted(path.name for path in dst_path.iterdir()) == ['foo.txt', 'other.txt']
+
+
+def test_keep_outputs_of_failed_actions(tmp_path):
+    """Check that the last output of a source is kept if its action fails."""
+
+    def fail_on_error(root_src_path, src_path, root_dst_path, dst_path):
+        if 'error' in src_path.read_text():
+            raise ValueError("wrong content")
+        upper(root_src_path, src_path, root_dst_path, dst_path)
+
+    src_path = tmp_path / 'src/'
+    src_path.mkdir()
+    (src_path / 'foo.txt').write_text('foo')
+
+    dst_path = tmp_path / 'dst/'
+    dst_path.mkdir()
+    manifest = BuildManifest(tmp_path / 'manifest.json')
+    build_file_tree(src_path, dst_path, no_cache=True, actions={'.txt': fail_on_error},
+        manifest=manifest)
+
+    (src_path / 'foo.txt').write_text('error')
+    build_file_tree(src_path, dst_path, no_cache=True, actions={'.txt': fail_on_error},
+        manifest=manifest)
+
+    assert (dst_path / 'foo.txt').read_text() == 'FOO'
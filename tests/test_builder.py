@@ -0,0 +1,128 @@
+
+import os
+import multiprocessing
+
+import pytest
+
+from spekulatio.builder import SiteBuilder
+from spekulatio.profiler import Profiler
+from spekulatio.exceptions import SpekulatioError
+
+
+def test_rebuild(tmp_path):
+    """Check that a builder regenerates the pages affected by a change."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    layout = template_path / 'layout.html'
+    layout.write_text('{{ data.title }}')
+    (template_path / 'other.html').write_text('other {{ data.title }}')
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    foo = content_path / 'foo.json'
+    foo.write_text('{"title": "foo"}')
+    bar = content_path / 'bar.json'
+    bar.write_text('{"title": "bar", "_template": "other.html"}')
+
+    build_path = tmp_path / 'build/'
+    builder = SiteBuilder(content_path, template_path, build_path, auto_reload=True)
+    builder.build()
+    assert (build_path / 'foo.html').read_text() == 'foo'
+    assert (build_path / 'bar.html').read_text() == 'other bar'
+
+    # modify template (and make sure its mtime changes)
+    mtime = layout.stat().st_mtime_ns + 10**9
+    layout.write_text('new {{ data.title }}')
+    os.utime(layout, ns=(mtime, mtime))
+    os.utime(build_path / 'bar.html', ns=(0, 0))
+    builder.rebuild({str(layout)})
+
+    assert (build_path / 'foo.html').read_text() == 'new foo'
+    assert (build_path / 'bar.html').stat().st_mtime_ns == 0
+
+    # add a content file
+    baz = content_path / 'baz.json'
+    baz.write_text('{"title": "baz"}')
+    builder.rebuild({str(baz)})
+
+    assert (build_path / 'baz.html').read_text() == 'new baz'
+    assert 'baz.json' in builder.som.map
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+    reason="fork is not supported")
+def test_fork_build(tmp_path):
+    """Check that pages rendered in forked processes are tracked like the rest."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        '{{ data.title }} {{ get_node("foo.json").data.title }}'
+    )
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    foo = content_path / 'foo.json'
+    foo.write_text('{"title": "foo"}')
+    for index in range(10):
+        (content_path / f'page{index}.json').write_text(f'{{"title": "page{index}"}}')
+    (content_path / 'image.png').write_bytes(b'png')
+
+    build_path = tmp_path / 'build/'
+    profiler = Profiler()
+    builder = SiteBuilder(content_path, template_path, build_path, jobs=2, fork=True,
+        profiler=profiler)
+    builder.build()
+    assert (build_path / 'page0.html').read_text() == 'page0 foo'
+    assert (build_path / 'image.png').read_bytes() == b'png'
+    assert profiler.types['action render_html']['count'] == 11
+    assert 'hash' in builder.manifest.records[str(build_path / 'page0.html')]
+
+    # pages that depend on a modified node are rendered again
+    os.utime(build_path / 'page0.html', ns=(0, 0))
+    mtime = foo.stat().st_mtime_ns + 10**9
+    foo.write_text('{"title": "new foo"}')
+    os.utime(foo, ns=(mtime, mtime))
+    builder.rebuild({str(foo)})
+    assert (build_path / 'page0.html').read_text() == 'page0 new foo'
+
+    # the rest are up to date
+    os.utime(build_path / 'page0.html', ns=(0, 0))
+    builder.rebuild(set())
+    assert (build_path / 'page0.html').stat().st_mtime_ns == 0
+
+
+def test_default_render_mode(tmp_path):
+    """Check that pages are rendered in processes by default when there are several jobs."""
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    assert SiteBuilder(tmp_path, tmp_path, tmp_path, jobs=2).fork == can_fork
+    assert not SiteBuilder(tmp_path, tmp_path, tmp_path, jobs=1).fork
+    assert not SiteBuilder(tmp_path, tmp_path, tmp_path, jobs=2, fork=False).fork
+
+
+def test_rebuild_after_error(tmp_path):
+    """Check that a builder recovers from a rebuild that fails."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text('{{ data.title }}')
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    values = content_path / '_values.json'
+    values.write_text('{"_sorting_method": "name"}')
+    (content_path / 'foo.json').write_text('{"title": "foo"}')
+
+    build_path = tmp_path / 'build/'
+    builder = SiteBuilder(content_path, template_path, build_path)
+    builder.build()
+
+    values.write_text('{"_sorting_method": "wrong"}')
+    with pytest.raises(SpekulatioError):
+        builder.rebuild({str(values)})
+    assert builder.som is None
+
+    values.write_text('{"_sorting_method": "name", "title": "bar"}')
+    (content_path / 'foo.json').write_text('{}')
+    builder.rebuild({str(values)})
+    assert (build_path / 'foo.html').read_text() == 'bar'
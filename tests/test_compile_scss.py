@@ -0,0 +1,91 @@
+import os
+import importlib
+
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import BuildManifest
+from spekulatio.build_file_tree.actions import compile_scss_factory
+from spekulatio.build_file_tree.actions.compile_scss import get_import_names
+
+compile_scss_module = importlib.import_module('spekulatio.build_file_tree.actions.compile_scss')
+
+
+def test_import_names():
+    """Check that imported stylesheets are found in SCSS files."""
+
+    text = """
+        @use "sass:math";
+        @use 'config' with ($color: "red");
+        @forward "mixins";
+        @import "reset", 'theme/colors';
+        @import url(https://example.com/font.css);
+        @import "print.css";
+        // @import "commented";
+        /* @import "commented"; */
+    """
+    assert get_import_names(text) == ['config', 'mixins', 'reset', 'theme/colors']
+
+
+def test_import_graph(tmp_path, monkeypatch):
+    """Check that entry files are only compiled when their imports change."""
+
+    compiled_files = []
+    original_compile_file = compile_scss_module.compile_file
+
+    def compile_file(filename):
+        compiled_files.append(os.path.basename(filename))
+        return original_compile_file(filename)
+
+    monkeypatch.setattr(compile_scss_module, 'compile_file', compile_file)
+
+    # source
+    src_path = tmp_path / 'src/'
+    partials = src_path / 'partials/'
+    partials.mkdir(parents=True)
+    (partials / '_colors.scss').write_text('$color: red;')
+    (partials / '_base.scss').write_text('@import "colors"; body { color: $color; }')
+    (src_path / 'main.scss').write_text('@import "partials/base";')
+    (src_path / 'other.scss').write_text('p { color: blue; }')
+
+    dst_path = tmp_path / 'dst/'
+    dst_path.mkdir()
+    cache_path = tmp_path / 'cache/'
+    manifest = BuildManifest(tmp_path / 'manifest.json')
+
+    def build():
+        compile_scss = compile_scss_factory(cache_path)
+        build_file_tree(src_path, dst_path, no_cache=False,
+            actions={'.scss': ('.css', compile_scss)}, manifest=manifest)
+        return compile_scss
+
+    build()
+    assert sorted(compiled_files) == ['main.scss', 'other.scss']
+    assert 'red' in (dst_path / 'main.css').read_text()
+    assert not (dst_path / 'partials/_colors.css').exists()
+
+    # modify a transitive import
+    compiled_files.clear()
+    colors = partials / '_colors.scss'
+    colors.write_text('$color: green;')
+    mtime = (dst_path / 'main.css').stat().st_mtime_ns + 10**9
+    os.utime(colors, ns=(mtime, mtime))
+    build()
+    assert compiled_files == ['main.scss']
+    assert 'green' in (dst_path / 'main.css').read_text()
+
+    # regenerate a deleted output (its sources didn't change)
+    compiled_files.clear()
+    (dst_path / 'other.css').unlink()
+    build()
+    assert compiled_files == []
+    assert 'blue' in (dst_path / 'other.css').read_text()
+
+    # a change that doesn't modify the output (which keeps its mtime)
+    compiled_files.clear()
+    mtime += 10**9
+    colors.write_text('// green\n$color: green;')
+    os.utime(colors, ns=(mtime, mtime))
+    compile_scss = build()
+    assert compiled_files == ['main.scss']
+    assert (dst_path / 'main.css').stat().st_mtime_ns < mtime
+    assert compile_scss.is_up_to_date(src_path, src_path / 'main.scss', dst_path,
+        dst_path / 'main.css')
@@ -0,0 +1,191 @@
+
+import os
+
+from spekulatio.som import SOM
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import DependencyTracker
+from spekulatio.build_file_tree import dependencies as dependencies_module
+from spekulatio.build_file_tree.actions import render_html_factory
+
+
+def build(content_path, template_path, build_path):
+    """Build the site and return the names of the regenerated pages."""
+
+    # mark existing outputs so we can tell which ones are written again
+    for output_path in build_path.glob('**/*.html'):
+        os.utime(output_path, ns=(0, 0))
+
+    som = SOM(content_path)
+    dependencies = DependencyTracker(build_path / '.spekulatio/dependencies.json')
+    render_html = render_html_factory(som, [template_path], dependencies)
+    build_file_tree(content_path, build_path, no_cache=False,
+        actions={'.json': ('.html', render_html)})
+    dependencies.save()
+
+    return set(
+        str(output_path.relative_to(build_path))
+        for output_path in build_path.glob('**/*.html')
+        if output_path.stat().st_mtime_ns != 0
+    )
+
+
+def touch(path, text):
+    """Write a file making sure that its modification time changes."""
+    mtime = path.stat().st_mtime_ns + 10**9 if path.exists() else None
+    path.write_text(text)
+    if mtime:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_incremental_rebuild(tmp_path):
+    """Check that only the pages affected by a change are regenerated."""
+
+    # templates
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text('{{ data.title }}')
+    (template_path / 'footer.html').write_text('footer')
+    (template_path / 'special.html').write_text(
+        '{% include "footer.html" %}{{ get_node("dir2/ccc.json").data.title }}'
+    )
+
+    # content:
+    #   dir1/
+    #     _values.json
+    #     aaa.json
+    #     bbb.json
+    #   dir2/
+    #     ccc.json
+    #     ddd.json
+    #     eee.json (special.html)
+    content_path = tmp_path / 'content/'
+    dir1 = content_path / 'dir1/'
+    dir1.mkdir(parents=True)
+    dir2 = content_path / 'dir2/'
+    dir2.mkdir(parents=True)
+    touch(dir1 / '_values.json', '{"_sorting_method": "name"}')
+    touch(dir1 / 'aaa.json', '{"title": "aaa"}')
+    touch(dir1 / 'bbb.json', '{"title": "bbb"}')
+    (dir2 / '_values.json').write_text('{"_sorting_method": "name"}')
+    touch(dir2 / 'ccc.json', '{"title": "ccc"}')
+    touch(dir2 / 'ddd.json', '{"title": "ddd"}')
+    touch(dir2 / 'eee.json', '{"title": "eee", "_template": "special.html"}')
+
+    build_path = tmp_path / 'build/'
+    build_path.mkdir()
+
+    all_pages = {
+        'dir1/aaa.html', 'dir1/bbb.html',
+        'dir2/ccc.html', 'dir2/ddd.html', 'dir2/eee.html',
+    }
+    assert build(content_path, template_path, build_path) == all_pages
+
+    # nothing changed
+    assert build(content_path, template_path, build_path) == set()
+
+    # included template
+    touch(template_path / 'footer.html', 'new footer')
+    assert build(content_path, template_path, build_path) == {'dir2/eee.html'}
+
+    # inherited data
+    touch(dir1 / '_values.json', '{"_sorting_method": "name", "author": "me"}')
+    assert build(content_path, template_path, build_path) == {'dir1/aaa.html', 'dir1/bbb.html'}
+
+    # node fetched with get_node (ddd is also affected since it's next to ccc)
+    touch(dir2 / 'ccc.json', '{"title": "new ccc"}')
+    assert build(content_path, template_path, build_path) == {
+        'dir2/ccc.html', 'dir2/ddd.html', 'dir2/eee.html',
+    }
+    assert (build_path / 'dir2/eee.html').read_text() == 'new footernew ccc'
+
+    # new neighbour
+    touch(dir1 / 'abc.json', '{"title": "abc"}')
+    assert build(content_path, template_path, build_path) == {
+        'dir1/aaa.html', 'dir1/abc.html', 'dir1/bbb.html',
+    }
+
+
+def test_rebuild_nodes_read_by_templates(tmp_path):
+    """Check that nodes reached through relationships are tracked too."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        '{% for child in node.parent.children %}{{ child.data.title }},{% endfor %}'
+    )
+    (template_path / 'all.html').write_text(
+        '{% for other in som.iter_nodes() %}{{ other }},{% endfor %}'
+    )
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    touch(content_path / '_values.json', '{"_sorting_method": "name"}')
+    touch(content_path / 'a.json', '{"title": "A"}')
+    touch(content_path / 'b.json', '{"title": "B"}')
+    touch(content_path / 'c.json', '{"title": "C"}')
+    sub_path = content_path / 'sub/'
+    sub_path.mkdir()
+    touch(sub_path / 'all.json', '{"_template": "all.html"}')
+
+    build_path = tmp_path / 'build/'
+    build_path.mkdir()
+    build(content_path, template_path, build_path)
+
+    # sibling data
+    touch(content_path / 'a.json', '{"title": "new A"}')
+    assert build(content_path, template_path, build_path) == {'a.html', 'b.html', 'c.html'}
+    assert (build_path / 'c.html').read_text() == 'new A,B,C,,'
+
+    # pages that access the whole som
+    touch(content_path / 'd.json', '{"title": "D"}')
+    assert build(content_path, template_path, build_path) == {
+        'a.html', 'b.html', 'c.html', 'd.html', 'sub/all.html',
+    }
+
+
+def test_rebuild_pages_using_many_nodes(tmp_path, monkeypatch):
+    """Check that pages using many nodes depend on all the nodes of the som."""
+    monkeypatch.setattr(dependencies_module, 'MAX_TRACKED_NODES', 3)
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text('{{ data.title }}')
+    (template_path / 'menu.html').write_text(
+        '{% for child in node.parent.children %}{{ child.data.title }},{% endfor %}'
+    )
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    touch(content_path / '_values.json', '{"_sorting_method": "name"}')
+    touch(content_path / 'a.json', '{"title": "A"}')
+    touch(content_path / 'b.json', '{"title": "B"}')
+    touch(content_path / 'c.json', '{"title": "C"}')
+    touch(content_path / 'menu.json', '{"_template": "menu.html"}')
+
+    build_path = tmp_path / 'build/'
+    build_path.mkdir()
+    build(content_path, template_path, build_path)
+    records = DependencyTracker(build_path / '.spekulatio/dependencies.json').records
+    assert records[str(build_path / 'menu.html')]['nodes'] == [dependencies_module.ALL_NODES_KEY]
+    assert records[str(build_path / 'a.html')]['nodes'] == ['.', 'a.json', 'b.json']
+
+    # nothing changed
+    assert build(content_path, template_path, build_path) == set()
+
+    # any node
+    touch(content_path / 'a.json', '{"title": "new A"}')
+    assert build(content_path, template_path, build_path) == {'a.html', 'b.html', 'menu.html'}
+    assert (build_path / 'menu.html').read_text() == 'new A,B,C,,'
+
+
+def test_prune_records(tmp_path):
+    """Check that the records of deleted outputs are forgotten."""
+
+    output_path = tmp_path / 'page.html'
+    output_path.write_text('page')
+    dependencies = DependencyTracker(tmp_path / 'dependencies.json')
+    dependencies.set_record(output_path, {'templates': {}, 'nodes': {}})
+    dependencies.set_record(tmp_path / 'deleted.html', {'templates': {}, 'nodes': {}})
+
+    dependencies.prune()
+    assert list(dependencies.records) == [str(output_path)]
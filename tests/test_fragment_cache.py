@@ -0,0 +1,135 @@
+import os
+import json
+import multiprocessing
+
+import pytest
+
+from spekulatio.som import SOM
+from spekulatio.builder import SiteBuilder
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import DependencyTracker
+from spekulatio.build_file_tree import FragmentStore
+from spekulatio.build_file_tree.actions import create_environment
+from spekulatio.build_file_tree.actions import render_html_factory
+
+
+def create_site(tmp_path):
+    template_path = tmp_path / 'templates'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        '{{ data.title }}|{% cache node.parent %}{{ count() }}'
+        '{% for child in node.parent.children %}{{ child.data.title }}{% endfor %}'
+        '{% endcache %}'
+    )
+    content_path = tmp_path / 'content'
+    for name in ('foo', 'bar'):
+        (content_path / name).mkdir(parents=True)
+        for index in range(3):
+            (content_path / name / f"page{index}.json").write_text(
+                json.dumps({'title': f"{name}{index}"})
+            )
+    (content_path / '_values.json').write_text('{"_sorting_method": "name"}')
+    build_path = tmp_path / 'build'
+    build_path.mkdir()
+    return template_path, content_path, build_path
+
+
+def build(template_path, content_path, build_path, fragment_store=None):
+    """Build a site with a new environment and return the number of rendered fragments."""
+    renders = []
+    env = create_environment([template_path])
+    env.globals['count'] = lambda: renders.append(1) or ''
+    som = SOM(content_path)
+    dependencies = fragment_store.dependencies if fragment_store is not None else None
+    render_html = render_html_factory(som, [template_path], dependencies, env=env,
+        fragment_store=fragment_store)
+    build_file_tree(content_path, build_path, no_cache=True,
+        actions={'.json': ('.html', render_html)})
+    return len(renders)
+
+
+def test_fragment_cache(tmp_path):
+    """Check that fragments are only rendered once per key in a build."""
+    template_path, content_path, build_path = create_site(tmp_path)
+    assert build(template_path, content_path, build_path) == 2
+    assert (build_path / 'foo/page1.html').read_text() == 'foo1|foo0foo1foo2'
+    assert (build_path / 'bar/page0.html').read_text() == 'bar0|bar0bar1bar2'
+
+    # fragments aren't reused in other builds without a store
+    assert build(template_path, content_path, build_path) == 2
+
+
+def test_fragment_store(tmp_path):
+    """Check that stored fragments are reused until their dependencies change."""
+    template_path, content_path, build_path = create_site(tmp_path)
+
+    def build_with_store():
+        dependencies = DependencyTracker(tmp_path / 'dependencies.json')
+        fragment_store = FragmentStore(tmp_path / 'fragments.json', dependencies)
+        renders = build(template_path, content_path, build_path, fragment_store)
+        fragment_store.save()
+        return renders
+
+    assert build_with_store() == 2
+    assert build_with_store() == 0
+    assert (build_path / 'foo/page1.html').read_text() == 'foo1|foo0foo1foo2'
+
+    # a new page changes the children of the node in the key
+    (content_path / 'foo/page3.json').write_text('{"title": "foo3"}')
+    assert build_with_store() == 1
+    assert (build_path / 'foo/page1.html').read_text() == 'foo1|foo0foo1foo2foo3'
+
+    # a modified template invalidates all the fragments
+    layout = template_path / 'layout.html'
+    mtime = layout.stat().st_mtime_ns + 10**9
+    layout.write_text(layout.read_text().replace('|', '#'))
+    os.utime(layout, ns=(mtime, mtime))
+    assert build_with_store() == 2
+    assert (build_path / 'foo/page1.html').read_text() == 'foo1#foo0foo1foo2foo3'
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+    reason="fork is not supported")
+def test_fork_fragment_store(tmp_path):
+    """Check that the fragments rendered in forked processes are stored."""
+    template_path, content_path, build_path = create_site(tmp_path)
+    layout = template_path / 'layout.html'
+    layout.write_text(layout.read_text().replace('{{ count() }}', ''))
+
+    builder = SiteBuilder(content_path, template_path, build_path, jobs=2, fork=True,
+        keep_fragments=True)
+    builder.build()
+    assert (build_path / 'bar/page2.html').read_text() == 'bar2|bar0bar1bar2'
+    fragments = json.loads((build_path / '.spekulatio/fragments.json').read_text())
+    assert sorted(record['html'] for record in fragments.values()) == [
+        'bar0bar1bar2', 'foo0foo1foo2',
+    ]
+
+
+def test_fragment_store_child_changes(tmp_path):
+    """Check that stored fragments are invalidated by the nodes read in the block."""
+    template_path, content_path, build_path = create_site(tmp_path)
+    layout = template_path / 'layout.html'
+    layout.write_text(layout.read_text().replace('{{ count() }}', ''))
+
+    def build_site(no_cache=False):
+        builder = SiteBuilder(content_path, template_path, build_path, keep_fragments=True)
+        builder.build(no_cache)
+
+    build_site()
+    page = content_path / 'foo/page1.json'
+    mtime = page.stat().st_mtime_ns + 10**9
+    page.write_text('{"title": "new"}')
+    os.utime(page, ns=(mtime, mtime))
+    build_site()
+    assert (build_path / 'foo/page1.html').read_text() == 'new|foo0newfoo2'
+    assert (build_path / 'foo/page2.html').read_text() == 'foo2|foo0newfoo2'
+
+    # stored fragments aren't used without cache
+    fragments_path = build_path / '.spekulatio/fragments.json'
+    fragments = json.loads(fragments_path.read_text())
+    for record in fragments.values():
+        record['html'] = 'stale'
+    fragments_path.write_text(json.dumps(fragments))
+    build_site(no_cache=True)
+    assert (build_path / 'foo/page0.html').read_text() == 'foo0|foo0newfoo2'
@@ -1,7 +1,11 @@
 
+import json
+
 import pytest
 
+from spekulatio.som.extractors import loaders
 from spekulatio.som.extractors.frontmatter import parse_frontmatter
+from spekulatio.som.extractors.frontmatter import read_frontmatter
 
 
 def test_parse_frontmatter():
@@ -16,3 +20,50 @@ content."""
     assert metadata == {'foo': 'bar', 'this': 'that'}
     assert document == "content."
 
+
+@pytest.mark.parametrize('text, expected', [
+    ("---\nfoo: 1\n---\ncontent", ("content", {'foo': 1})),
+    ("---  \r\nfoo: 1\r\n--- \r\ncontent", ("content", {'foo': 1})),
+    ("---\nfoo: 1\n---\n---\nbar\n", ("---\nbar\n", {'foo': 1})),
+    ("---\nfoo: 1\n---", ("---\nfoo: 1\n---", {})),
+    ("--- foo\nfoo: 1\n---\ncontent", ("--- foo\nfoo: 1\n---\ncontent", {})),
+    ("content\n---\nfoo: 1\n---\n", ("content\n---\nfoo: 1\n---\n", {})),
+    ("---\nfoo: 1\n---\ncontent\n---\nmore\n", ("content\n---\nmore\n", {'foo': 1})),
+])
+def test_frontmatter_delimiters(text, expected, tmp_path):
+    """Check the lines accepted as frontmatter delimiters."""
+    assert parse_frontmatter(text) == expected
+
+    # reading only the frontmatter of a file gives the same result
+    path = tmp_path / 'page.md'
+    path.write_bytes(text.encode())
+    assert read_frontmatter(path) == expected[1]
+
+
+def test_read_frontmatter_only(tmp_path):
+    """Check that the body of a file isn't read to get its frontmatter."""
+    path = tmp_path / 'page.md'
+    path.write_bytes(b"---\nfoo: 1\n---\n" + b"body\n" * 100000 + b"\xff\n")
+    assert read_frontmatter(path) == {'foo': 1}
+    with pytest.raises(UnicodeDecodeError):
+        path.read_text()
+
+
+@pytest.mark.parametrize('text', [
+    '{"foo": [1, 2.5, "bar", null, true], "baz": {"a": 1, "a": 2}}',
+    '{"nan": NaN, "inf": Infinity}',
+    '{"big": 123456789012345678901234567890}',
+    '{"min": -9223372036854775808, "max": 18446744073709551615}',
+    '{"small": -9223372036854775809}',
+    '{"big": 18446744073709551616}',
+    '{"surrogate": "\\ud800"}',
+])
+def test_load_json(text):
+    """Check that JSON documents are loaded like the json module does."""
+    assert repr(loaders.load_json(text)) == repr(json.loads(text))
+
+
+def test_load_json_fallback(monkeypatch):
+    """Check that the json module is used if orjson isn't installed."""
+    monkeypatch.setattr(loaders, 'orjson', None)
+    assert loaders.load_json('{"foo": 1}') == {'foo': 1}
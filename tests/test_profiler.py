@@ -0,0 +1,38 @@
+import json
+
+from spekulatio.builder import SiteBuilder
+from spekulatio.profiler import Profiler
+
+
+def test_profile_build(tmp_path):
+    """Check that the phases and files of a build are profiled."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text('{{ data.title }}')
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    for index in range(5):
+        (content_path / f'page{index}.json').write_text(f'{{"title": "page {index}"}}')
+    (content_path / 'image.png').write_bytes(b'png')
+
+    build_path = tmp_path / 'build/'
+    profiler = Profiler(top=3)
+    builder = SiteBuilder(content_path, template_path, build_path, profiler=profiler)
+    builder.build()
+
+    assert set(profiler.phases) == {
+        'template tree', 'scan content', 'create_tree', 'set_node_data', 'sort_som_siblings',
+        'set_som_relationships', 'content tree',
+    }
+    assert profiler.types['extractor .json']['count'] == 5
+    assert profiler.types['action render_html']['count'] == 5
+    assert profiler.types['action copy']['count'] == 1
+
+    report_path = tmp_path / 'profile.json'
+    profiler.save(report_path)
+    report = json.loads(report_path.read_text())
+    assert len(report['slowest_files']) == 3
+    walls = [item['wall'] for item in report['slowest_files']]
+    assert walls == sorted(walls, reverse=True)
+    assert 'content tree' in profiler.format_summary()
@@ -0,0 +1,143 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jinja2
+
+from spekulatio.som import SOM
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import BuildManifest
+from spekulatio.build_file_tree.actions import render_html_factory
+from spekulatio.build_file_tree.actions import create_environment
+
+
+def test_templates_compiled_once(tmp_path, monkeypatch):
+    """Check that each template is compiled only once per build."""
+
+    # templates
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'base.html').write_text(
+        '<html>{% block body %}{% endblock %}</html>'
+    )
+    (template_path / 'nav.html').write_text(
+        '<nav>{{ get_node("dir1").path }}</nav>'
+    )
+    (template_path / 'layout.html').write_text(
+        '{% extends "base.html" %}'
+        '{% block body %}{% include "nav.html" %}{{ data.title }}{% endblock %}'
+    )
+
+    # content
+    content_path = tmp_path / 'content/'
+    dir1 = content_path / 'dir1/'
+    dir1.mkdir(parents=True)
+    for index in range(20):
+        (dir1 / f'page{index}.json').write_text(f'{{"title": "page {index}"}}')
+
+    # count compilations
+    compiled_templates = []
+    original_compile = jinja2.Environment.compile
+
+    def compile(self, source, name=None, filename=None, *args, **kwargs):
+        compiled_templates.append(name)
+        return original_compile(self, source, name, filename, *args, **kwargs)
+
+    monkeypatch.setattr(jinja2.Environment, 'compile', compile)
+
+    # build
+    build_path = tmp_path / 'build/'
+    som = SOM(content_path)
+    render_html = render_html_factory(som, [template_path])
+    build_file_tree(content_path, build_path, no_cache=True,
+        actions={'.json': ('.html', render_html)}, jobs=4)
+
+    assert sorted(compiled_templates) == ['base.html', 'layout.html', 'nav.html']
+    assert (build_path / 'dir1/page7.html').read_text() == (
+        '<html><nav>dir1</nav>page 7</html>'
+    )
+
+
+def test_concurrent_template_loads(tmp_path, monkeypatch):
+    """Check that a template requested by several threads at once is compiled once."""
+
+    (tmp_path / 'layout.html').write_text('{{ data.title }}')
+    compiled_templates = []
+    original_compile = jinja2.Environment.compile
+
+    def slow_compile(self, source, name=None, filename=None, *args, **kwargs):
+        compiled_templates.append(name)
+        time.sleep(0.05)
+        return original_compile(self, source, name, filename, *args, **kwargs)
+
+    monkeypatch.setattr(jinja2.Environment, 'compile', slow_compile)
+    env = create_environment([tmp_path])
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        templates = list(executor.map(lambda _: env.get_template('layout.html'), range(8)))
+
+    assert compiled_templates == ['layout.html']
+    assert all(template is templates[0] for template in templates)
+
+
+def test_get_node_by_url(tmp_path):
+    """Check that templates can resolve nodes by url."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        '{{ get_node_by_url("/dir1/bar.html").data.title }}'
+        '{{ get_node_by_url("/missing.html") is none }}'
+    )
+    content_path = tmp_path / 'content/'
+    dir1 = content_path / 'dir1/'
+    dir1.mkdir(parents=True)
+    (dir1 / 'foo.json').write_text('{"title": "foo"}')
+    (dir1 / 'bar.json').write_text('{"title": "bar"}')
+
+    build_path = tmp_path / 'build/'
+    som = SOM(content_path)
+    render_html = render_html_factory(som, [template_path])
+    build_file_tree(content_path, build_path, no_cache=True,
+        actions={'.json': ('.html', render_html)})
+
+    assert (build_path / 'dir1/foo.html').read_text() == 'barTrue'
+
+
+def test_stream_render(tmp_path):
+    """Check that streamed pages are written atomically."""
+
+    template_path = tmp_path / 'templates/'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        '{% for index in range(1000) %}{{ data.title }}{% endfor %}'
+        '{% if data.fail is defined %}{{ fail() }}{% endif %}'
+    )
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    foo = content_path / 'foo.json'
+    foo.write_text('{"title": "foo"}')
+
+    build_path = tmp_path / 'build/'
+    build_path.mkdir()
+    manifest = BuildManifest(tmp_path / 'manifest.json')
+
+    def build():
+        som = SOM(content_path)
+        render_html = render_html_factory(som, [template_path], stream=True)
+        return build_file_tree(content_path, build_path, no_cache=True,
+            actions={'.json': ('.html', render_html)}, manifest=manifest)
+
+    build()
+    dst_foo = build_path / 'foo.html'
+    assert dst_foo.read_text() == 'foo' * 1000
+
+    # unchanged pages aren't written again
+    os.utime(dst_foo, ns=(0, 0))
+    build()
+    assert dst_foo.stat().st_mtime_ns == 0
+
+    # failed renders leave the previous output
+    foo.write_text('{"title": "bar", "fail": true}')
+    assert build() == [foo]
+    assert dst_foo.read_text() == 'foo' * 1000
+    assert [path.name for path in build_path.iterdir()] == ['foo.html']
@@ -106,3 +106,51 @@ def test_node_map(tmp_path):
     for node in som.iter_nodes():
         assert som.map[str(node)] == node
 
+
+
+def test_parallel_extraction(tmp_path):
+    """Check that extracting in several processes creates the same som."""
+
+    # input file tree:
+    #   _a.json
+    #   _b.json
+    #   foo.json
+    #   foo.md
+    #   dir1/
+    #     bar.rst
+    #     baz.md
+    (tmp_path / '_b.json').write_text('{"spam": "b", "ham": "b"}')
+    (tmp_path / '_a.json').write_text('{"spam": "a"}')
+    (tmp_path / 'foo.json').write_text('{"foo": 1}')
+    (tmp_path / 'foo.md').write_text('# Foo')
+    dir1 = tmp_path / 'dir1/'
+    dir1.mkdir()
+    (dir1 / 'bar.rst').write_text('Bar\n===\n\nbar content')
+    (dir1 / 'baz.md').write_text('# Baz')
+
+    serial_som = SOM(tmp_path, jobs=1)
+    parallel_som = SOM(tmp_path, jobs=2)
+
+    assert serial_som.list_names() == parallel_som.list_names()
+    assert dict(parallel_som.root_node.data) == {'spam': 'b', 'ham': 'b'}
+    for name, node in serial_som.map.items():
+        parallel_node = parallel_som.map[name]
+        assert parallel_node.title == node.title
+        assert parallel_node.content == node.content
+        assert dict(parallel_node.data) == dict(node.data)
+
+
+def test_url_index(tmp_path):
+    """Check that nodes can be retrieved by url"""
+
+    dir1 = tmp_path / 'dir1/'
+    dir1.mkdir()
+    (dir1 / 'foo.json').write_text('{}')
+    (dir1 / 'bar.json').write_text('{"_url": "/bar/"}')
+
+    som = SOM(tmp_path)
+    assert som.by_url['/index.html'] is som.root_node
+    assert som.by_url['/dir1/index.html'] is som.map['dir1']
+    assert som.by_url['/dir1/foo.html'] is som.map['dir1/foo.json']
+    assert som.by_url['/bar/'] is som.map['dir1/bar.json']
+    assert som.map['dir1/foo.json'].url == '/dir1/foo.html'
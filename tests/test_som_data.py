@@ -44,3 +44,51 @@ def test_data_inheritance_in_different_levels(tmp_path):
     node_bar = som.map['dir1/dir2/bar.json']
     assert dict(node_bar.data) == {"a": "root", "b": "dir2", "c": "bar", "d": "root"}
 
+
+
+def test_local_data(tmp_path):
+    """Check that local values are not inherited by descendants"""
+
+    values = tmp_path / '_values.json'
+    values.write_text('{"a": "root", "_local": {"b": "local", "a": "local"}}')
+    foo = tmp_path / 'foo.json'
+    foo.write_text('{"c": "foo"}')
+
+    som = SOM(tmp_path)
+    assert dict(som.root_node.data) == {"a": "local", "b": "local"}
+    assert dict(som.map['foo.json'].data) == {"a": "root", "c": "foo"}
+
+
+def test_inherited_data_is_shared(tmp_path):
+    """Check that inherited data is not copied into each node"""
+
+    values = tmp_path / '_values.json'
+    values.write_text('{"big": [1, 2, 3]}')
+    dir1 = tmp_path / 'dir1/'
+    dir1.mkdir()
+    (dir1 / 'foo.json').write_text('{"a": "foo"}')
+    (dir1 / 'bar.json').write_text('{}')
+
+    som = SOM(tmp_path)
+    node_foo = som.map['dir1/foo.json']
+    node_bar = som.map['dir1/bar.json']
+    assert node_foo.data['big'] is node_bar.data['big']
+    assert node_bar.data is som.map['dir1'].data
+    assert list(node_foo.data) == ['big', 'a']
+
+
+def test_compact_nodes(tmp_path):
+    """Check that nodes share their keys and empty containers"""
+
+    (tmp_path / 'foo.json').write_text('{"position": 1}')
+    (tmp_path / 'bar.yaml').write_text('position: 2')
+
+    som = SOM(tmp_path)
+    node_foo = som.map['foo.json']
+    node_bar = som.map['bar.yaml']
+    assert not hasattr(node_foo, '__dict__')
+    assert node_foo.children is node_bar.children
+    assert node_foo.toc is node_bar.toc
+    key_foo, = node_foo.raw_data
+    key_bar, = node_bar.raw_data
+    assert key_foo is key_bar
@@ -0,0 +1,68 @@
+
+from spekulatio.som import SOM
+from spekulatio.som import ExtractionCache
+
+
+def test_cache_hits_and_misses(tmp_path):
+    """Check that unchanged files are retrieved from the cache."""
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    foo = content_path / 'foo.json'
+    foo.write_text('{"spam": "eggs"}')
+    bar = content_path / 'bar.md'
+    bar.write_text('# Bar\n\nbar content')
+
+    cache_path = tmp_path / 'cache/'
+
+    # first build: everything is extracted
+    cache = ExtractionCache(cache_path)
+    SOM(content_path, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # second build: everything comes from the cache
+    cache = ExtractionCache(cache_path)
+    som = SOM(content_path, cache=cache)
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert som.map['bar.md'].title == 'Bar'
+    assert 'bar content' in som.map['bar.md'].content
+    assert dict(som.map['foo.json'].data) == {'spam': 'eggs'}
+
+    # third build: only the modified file is extracted
+    foo.write_text('{"spam": "ham"}')
+    cache = ExtractionCache(cache_path)
+    som = SOM(content_path, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert dict(som.map['foo.json'].data) == {'spam': 'ham'}
+
+
+def test_cache_prune(tmp_path):
+    """Check that the cache is kept under its maximum size."""
+
+    cache = ExtractionCache(tmp_path, max_size=0)
+    key = cache.get_key('.json', '{}')
+    cache.set(key, {'title': None, 'data': {}, 'toc': None, 'content': None})
+    assert cache.get(key) is not None
+
+    cache.prune()
+    assert cache.get(key) is None
+
+
+def test_cache_rst_includes(tmp_path):
+    """Check that documents that include other files aren't cached."""
+
+    content_path = tmp_path / 'content/'
+    content_path.mkdir()
+    (content_path / 'foo.rst').write_text('Foo\n===\n\n.. include:: _part.txt\n')
+    part = content_path / '_part.txt'
+    part.write_text('first part\n')
+
+    cache_path = tmp_path / 'cache/'
+    som = SOM(content_path, cache=ExtractionCache(cache_path))
+    assert 'first part' in som.map['foo.rst'].content
+
+    part.write_text('second part\n')
+    cache = ExtractionCache(cache_path)
+    som = SOM(content_path, cache=cache)
+    assert 'second part' in som.map['foo.rst'].content
+    assert cache.hits == 0
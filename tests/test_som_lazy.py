@@ -0,0 +1,55 @@
+
+from spekulatio.som import SOM
+from spekulatio.som.extractors import md_extractor
+from spekulatio.som.extractors import md_metadata_extractor
+from spekulatio.som.extractors.md_extractor import get_headings_text
+
+
+def test_lazy_content(tmp_path):
+    """Check that contents are only converted when accessed."""
+
+    (tmp_path / 'foo.rst').write_text('---\nposition: 2\n---\n\nFoo\n===\n\nfoo content\n')
+    (tmp_path / 'bar.md').write_text('---\nposition: 1\n---\n\n# Bar\n\nbar content\n')
+    (tmp_path / 'baz.html').write_text('---\nposition: 3\n---\n<p>baz content</p>')
+    (tmp_path / '_values.json').write_text(
+        '{"_sorting_method": "field", "_sorting_data": "position"}'
+    )
+
+    som = SOM(tmp_path)
+    lazy_som = SOM(tmp_path, lazy=True)
+
+    # metadata is available without converting the documents
+    assert lazy_som.list_names() == ['bar.md', 'foo.rst', 'baz.html']
+    for name, node in lazy_som.map.items():
+        if not node.is_dir:
+            assert node._content is None
+            assert node.title == som.map[name].title
+            assert node.toc == som.map[name].toc
+
+    # contents are converted on first access
+    for name, node in lazy_som.map.items():
+        assert node.content == som.map[name].content
+    assert 'foo content' in lazy_som.map['foo.rst'].content
+
+    # and they can be released
+    node = lazy_som.map['bar.md']
+    node.release_content()
+    assert node._content is None
+    assert 'bar content' in node.content
+
+
+def test_markdown_headings_pass():
+    """Check that the toc of a Markdown document can be got from its headings only."""
+
+    text = (
+        "# Title *em*\n\nintro\n\nSecond\n======\n\n```\n# not a heading\n```\n\n"
+        "    # code\n\n## Sub `code` [ref][r]\n\nThird\n---\n\n## Sub `code` [ref][r]\n\n"
+        "[r]: http://example.com\n"
+    )
+    for extensions in (None, ['fenced_code']):
+        node_info = md_extractor(text, extensions=extensions)
+        metadata = md_metadata_extractor(text, extensions=extensions)
+        assert metadata['content'] is None
+        assert metadata['title'] == node_info['title'] == 'Title em'
+        assert metadata['toc'] == node_info['toc']
+    assert 'not a heading' not in get_headings_text(text, ['fenced_code'])
@@ -1,6 +1,7 @@
 
 import pytest
 
+from spekulatio.som import SOM
 from spekulatio.som.extractors import md_extractor
 
 
@@ -26,3 +27,27 @@ This is the body
     assert 'This is the body' in node_info['content']
 
 
+def test_reused_converter():
+    """Check that converting a document doesn't affect the following ones."""
+    text = "# Title\n\nSome text[^1]\n\n[^1]: A note\n"
+    first_node_info = md_extractor(text, extensions=['footnotes'])
+    second_node_info = md_extractor(text, extensions=['footnotes'])
+    assert first_node_info == second_node_info
+    assert second_node_info['toc'][0]['id'] == 'title'
+    assert second_node_info['content'].count('A note') == 1
+
+
+def test_markdown_extensions(tmp_path):
+    """Check that the Markdown extensions can be configured."""
+    text = "# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+    assert '<table>' not in md_extractor(text)['content']
+
+    node_info = md_extractor(text, extensions=['tables'])
+    assert '<table>' in node_info['content']
+    assert node_info['title'] == 'Title'
+
+    (tmp_path / 'foo.md').write_text(text)
+    som = SOM(tmp_path, markdown_extensions=['tables'])
+    assert '<table>' in som.map['foo.md'].content
+    som = SOM(tmp_path, lazy=True, markdown_extensions=['tables'])
+    assert '<table>' in som.map['foo.md'].content
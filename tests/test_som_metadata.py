@@ -0,0 +1,48 @@
+
+import pytest
+
+from spekulatio.som import SOM
+from spekulatio.som import iter_metadata
+
+
+def test_iter_metadata(tmp_path):
+    """Check that the metadata of the content files is listed."""
+    (tmp_path / 'foo').mkdir()
+    (tmp_path / 'foo/_values.json').write_text('{"section": "foo"}')
+    (tmp_path / 'foo/bar.md').write_text("---\ntitle: Bar\n---\n\n# Heading\n")
+    (tmp_path / 'foo/baz.rst').write_text(":author: me\n\nBaz\n===\n")
+    (tmp_path / 'foo/qux.yaml').write_text("title: Qux\n")
+    (tmp_path / 'foo/image.png').write_bytes(b'\x89PNG')
+
+    metadata = dict(iter_metadata(tmp_path))
+    assert metadata == {
+        'foo/_values.json': {'section': 'foo'},
+        'foo/bar.md': {'title': 'Bar'},
+        'foo/baz.rst': {'author': 'me'},
+        'foo/qux.yaml': {'title': 'Qux'},
+    }
+
+
+def test_iter_metadata_includes(tmp_path):
+    """Check that relative includes are resolved from the root of the content."""
+    (tmp_path / 'fields.txt').write_text(":author: me\n")
+    (tmp_path / 'foo').mkdir()
+    (tmp_path / 'foo/bar.rst').write_text(".. include:: fields.txt\n\nBar\n===\n")
+
+    metadata = dict(iter_metadata(tmp_path))
+    som = SOM(tmp_path)
+    assert metadata == {'foo/bar.rst': {'author': 'me'}}
+    assert som.map['foo/bar.rst'].data['author'] == 'me'
+
+
+def test_data_file_frontmatter(tmp_path):
+    """Check that only the frontmatter of underscore Markdown files is read."""
+    (tmp_path / 'foo').mkdir()
+    (tmp_path / 'foo/_index.md').write_bytes(
+        b"---\nsection: foo\n---\n" + b"body\n" * 100000 + b"\xff\n"
+    )
+    (tmp_path / 'foo/bar.md').write_text("# Bar\n")
+
+    som = SOM(tmp_path)
+    assert som.map['foo'].data['section'] == 'foo'
+    assert som.map['foo/bar.md'].data['section'] == 'foo'
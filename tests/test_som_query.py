@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+from spekulatio.som import SOM
+from spekulatio.som import Query
+from spekulatio.builder import SiteBuilder
+from spekulatio.build_file_tree import build_file_tree
+from spekulatio.build_file_tree import DependencyTracker
+from spekulatio.build_file_tree.actions import render_html_factory
+
+
+@pytest.fixture
+def som(tmp_path):
+    content_path = tmp_path / 'content'
+    (content_path / 'blog').mkdir(parents=True)
+    (content_path / 'blog/_values.yaml').write_text("section: blog\n")
+    pages = {
+        'blog/a.yaml': "date: 2020-03-01\ntags: [python, web]\n",
+        'blog/b.yaml': "date: 2020-01-15\ntags: [python]\n",
+        'blog/c.yaml': "date: 2021-06-30\ntags: [rust]\n",
+        'blog/d.yaml': "date: 2020-03-01\n",
+        'about.yaml': "title: About\n",
+    }
+    for name, text in pages.items():
+        (content_path / name).write_text(text)
+    return SOM(content_path)
+
+
+def get_names(nodes):
+    return [str(node) for node in nodes]
+
+
+def test_where(som):
+    """Check equality filters (including list fields)."""
+    query = Query(som)
+    assert sorted(get_names(query.where('tags', 'python'))) == ['blog/a.yaml', 'blog/b.yaml']
+    assert len(query.where('section', 'blog')) == 4
+    assert query.where('tags', 'go') == ()
+    assert query.where('tags', ['unhashable']) == ()
+
+
+def test_range(som):
+    """Check range filters (with dates compared with ISO strings)."""
+    query = Query(som)
+    nodes = query.range('date', min='2020-02-01', max='2020-12-31')
+    assert sorted(get_names(nodes)) == ['blog/a.yaml', 'blog/d.yaml']
+    assert get_names(query.range('date', max='2020-02-01')) == ['blog/b.yaml']
+    assert get_names(query.range('date', min='2021-01-01')) == ['blog/c.yaml']
+
+
+def test_group_by_and_top(som):
+    """Check grouping and top-N queries."""
+    query = Query(som)
+    groups = query.group_by('tags')
+    assert set(groups) == {'python', 'web', 'rust'}
+    assert get_names(groups['rust']) == ['blog/c.yaml']
+
+    latest = query.top('date', 2)
+    assert get_names(latest)[0] == 'blog/c.yaml'
+    assert get_names(latest)[1] in ('blog/a.yaml', 'blog/d.yaml')
+    assert get_names(query.top('date', 1, reverse=False)) == ['blog/b.yaml']
+
+
+def test_chained_and_memoized(som):
+    """Check that queries can be chained and that their results are memoized."""
+    results = []
+    query = Query(som, on_result=results.append)
+    nodes = query.where('section', 'blog').where('tags', 'python').top('date', 1)
+    assert get_names(nodes) == ['blog/a.yaml']
+    assert query.where('section', 'blog').where('tags', 'python').top('date', 1) is nodes
+    assert results[-1] is nodes
+
+    groups = query.where('section', 'blog').group_by('tags')
+    assert get_names(groups['python'].range('date', max='2020-02-01')) == ['blog/b.yaml']
+
+
+def test_query_global(tmp_path):
+    """Check that templates can use the query global."""
+    template_path = tmp_path / 'templates'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        "{% for node in query.where('tags', data.tag) %}{{ node.data.title }} {% endfor %}"
+    )
+    content_path = tmp_path / 'content'
+    content_path.mkdir()
+    (content_path / 'a.yaml').write_text("title: A\ntags: [foo]\n")
+    (content_path / 'b.yaml').write_text("title: B\ntags: [foo, bar]\n")
+    (content_path / 'tag.yaml').write_text("title: Tag\ntag: bar\n")
+
+    build_path = tmp_path / 'build'
+    build_path.mkdir()
+    som = SOM(content_path)
+    dependencies = DependencyTracker(tmp_path / 'dependencies.json')
+    render_html = render_html_factory(som, [template_path], dependencies)
+    build_file_tree(content_path, build_path, no_cache=True,
+        actions={'.yaml': ('.html', render_html)})
+    assert (build_path / 'tag.html').read_text() == 'B '
+    assert (build_path / 'a.html').read_text() == ''
+
+    # the pages depend on the nodes returned by their queries
+    assert 'b.yaml' in dependencies.records[str(build_path / 'tag.html')]['nodes']
+
+
+def test_rebuild_query_pages(tmp_path):
+    """Check that pages are regenerated when the results of their queries change."""
+    template_path = tmp_path / 'templates'
+    template_path.mkdir()
+    (template_path / 'layout.html').write_text(
+        "{% for node in query.where('tag', 'x') %}{{ node.data.title }},{% endfor %}"
+    )
+    content_path = tmp_path / 'content'
+    (content_path / 'sub').mkdir(parents=True)
+    (content_path / 'a.yaml').write_text("title: a\ntag: x\n")
+    (content_path / 'c.yaml').write_text("title: c\n")
+    z = content_path / 'sub/z.yaml'
+    z.write_text("title: z\n")
+
+    build_path = tmp_path / 'build'
+    builder = SiteBuilder(content_path, template_path, build_path)
+    builder.build()
+    assert (build_path / 'c.html').read_text() == 'a,'
+
+    # a page that starts matching the query
+    mtime = z.stat().st_mtime_ns + 10**9
+    z.write_text("title: z\ntag: x\n")
+    os.utime(z, ns=(mtime, mtime))
+    builder.rebuild({str(z)})
+    assert (build_path / 'c.html').read_text() == 'a,z,'
@@ -27,3 +27,40 @@ This is the body
     assert 'This is the body' in node_info['content']
 
 
+
+def test_extract_rst_docinfo():
+    """Check that docinfo fields are added to the data."""
+    text = """---
+foo: bar
+---
+
+:author: Me
+:foo: docinfo
+
+Title
+=====
+
+This is the body
+    """
+    node_info = rst_extractor(text)
+    assert node_info['data'] == {'author': 'Me', 'foo': 'bar'}
+
+
+def test_reused_publisher(tmp_path):
+    """Check that converting a document doesn't affect the following ones."""
+    (tmp_path / 'included.rst').write_text("Included text\n")
+    text = """
+Title
+=====
+
+Some text [#]_.
+
+.. [#] A note
+
+.. include:: included.rst
+"""
+    first_node_info = rst_extractor(text, base_path=str(tmp_path))
+    second_node_info = rst_extractor(text, base_path=str(tmp_path))
+    assert first_node_info == second_node_info
+    assert 'Included text' in second_node_info['content']
+    assert second_node_info['content'].count('A note') == 1
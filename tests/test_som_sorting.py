@@ -1,3 +1,4 @@
+import json
 
 from spekulatio.som import SOM
 
@@ -92,7 +93,8 @@ def test_sorting_by_field(tmp_path):
         'dir1/aaa.rst',
         'dir1/bbb.rst',
         'dir1/ccc.rst',
-        'eee.rst'
+        'eee.rst',
+        'bbb.rst'
     ]
 
     som = SOM(tmp_path)
@@ -138,9 +140,85 @@ def test_sorting_by_list(tmp_path):
         'dir1/aaa.rst',
         'dir1/bbb.rst',
         'dir1/ccc.rst',
-        'bbb.rst'
+        'bbb.rst',
+        'eee.rst'
     ]
 
     som = SOM(tmp_path)
     assert expected_result == som.list_names()
 
+
+def test_sorting_by_several_fields(tmp_path):
+    """Test sorting by a list of fields (missing secondary fields go last)."""
+
+    (tmp_path / '_values.yaml').write_text(
+        "_sorting_method: field\n_sorting_data: [date, title]\n"
+    )
+    (tmp_path / 'aaa.rst').write_text(":date: 2020-01-02\n:title: b\n")
+    (tmp_path / 'bbb.rst').write_text(":date: 2020-01-01\n:title: z\n")
+    (tmp_path / 'ccc.rst').write_text(":date: 2020-01-02\n:title: a\n")
+    (tmp_path / 'ddd.rst').write_text(":date: 2020-01-02\n")
+    (tmp_path / 'eee.rst').write_text(":title: a\n")
+
+    som = SOM(tmp_path)
+    assert som.list_names() == ['bbb.rst', 'ccc.rst', 'aaa.rst', 'ddd.rst', 'eee.rst']
+
+
+def test_sorting_by_several_fields_desc(tmp_path):
+    """Test that missing fields also go last when sorting in descending order."""
+
+    (tmp_path / '_values.yaml').write_text(
+        "_sorting_method: field\n_sorting_direction: desc\n_sorting_data: [date, title]\n"
+    )
+    (tmp_path / 'aaa.rst').write_text(":date: 2020-01-02\n:title: b\n")
+    (tmp_path / 'bbb.rst').write_text(":date: 2020-01-01\n:title: z\n")
+    (tmp_path / 'ccc.rst').write_text(":date: 2020-01-02\n:title: a\n")
+    (tmp_path / 'ddd.rst').write_text(":date: 2020-01-02\n")
+    (tmp_path / 'eee.rst').write_text(":title: a\n")
+
+    som = SOM(tmp_path)
+    assert som.list_names() == ['aaa.rst', 'ccc.rst', 'ddd.rst', 'bbb.rst', 'eee.rst']
+
+
+def test_sorting_by_field_with_mixed_types(tmp_path):
+    """Test that values of different types are sorted instead of aborting the sort."""
+
+    (tmp_path / '_values.yaml').write_text(
+        "_sorting_method: field\n_sorting_data: position\n"
+    )
+    (tmp_path / 'aaa.yaml').write_text("position: b\n")
+    (tmp_path / 'bbb.yaml').write_text("position: 2\n")
+    (tmp_path / 'ccc.yaml').write_text("position: 2020-01-01\n")
+    (tmp_path / 'ddd.yaml').write_text("position: 1.5\n")
+    (tmp_path / 'eee.yaml').write_text("position: a\n")
+
+    som = SOM(tmp_path)
+    assert som.list_names() == ['ddd.yaml', 'bbb.yaml', 'ccc.yaml', 'eee.yaml', 'aaa.yaml']
+
+
+def test_natural_sorting(tmp_path):
+    """Test sorting by name with numbers compared by value."""
+
+    (tmp_path / '_values.json').write_text('{"_sorting_method": "natural"}')
+    for name in ('page10.rst', 'page2.rst', 'page1.rst', 'intro.rst', 'page02.rst'):
+        (tmp_path / name).touch()
+
+    som = SOM(tmp_path)
+    expected_result = ['intro.rst', 'page1.rst', 'page02.rst', 'page2.rst', 'page10.rst']
+    assert som.list_names() == expected_result
+
+
+def test_sorting_by_long_list(tmp_path):
+    """Test sorting a directory with many files by list."""
+
+    names = [f"page{index}.rst" for index in range(2000)]
+    for name in names:
+        (tmp_path / name).touch()
+    (tmp_path / '_values.json').write_text(json.dumps({
+        '_sorting_method': 'list',
+        '_sorting_data': names[::-1],
+        '_sorting_direction': 'desc',
+    }))
+
+    som = SOM(tmp_path)
+    assert som.list_names() == names
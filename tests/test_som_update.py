@@ -0,0 +1,196 @@
+
+import shutil
+
+from spekulatio.som import SOM
+
+
+def check_same_som(som, expected_som):
+    """Check that an updated som is equivalent to one created from scratch."""
+    assert som.list_names() == expected_som.list_names()
+    assert set(som.map) == set(expected_som.map)
+    assert set(som.by_url) == set(expected_som.by_url)
+
+    prev_node = som.root_node
+    for node in som.iter_nodes():
+        expected_node = expected_som.map[str(node)]
+        assert dict(node.data) == dict(expected_node.data)
+        assert node.title == expected_node.title
+        assert node.content == expected_node.content
+        assert node.url == expected_node.url
+        assert som.by_url[node.url] is node
+        assert node.prev is prev_node
+        assert prev_node.next is node
+        assert node.root is som.root_node
+        prev_node = node
+    assert prev_node.next is None
+
+
+def create_content(tmp_path):
+    # input file tree:
+    #   _values.json
+    #   aaa.json
+    #   ccc.md
+    #   dir1/
+    #     _values.json
+    #     bbb.json
+    #     ddd.json
+    #   dir2/
+    #     eee.json
+    (tmp_path / '_values.json').write_text('{"_sorting_method": "name", "site": "spam"}')
+    (tmp_path / 'aaa.json').write_text('{"title": "aaa"}')
+    (tmp_path / 'ccc.md').write_text('# Ccc')
+    dir1 = tmp_path / 'dir1/'
+    dir1.mkdir()
+    (dir1 / '_values.json').write_text(
+        '{"_sorting_method": "field", "_sorting_data": "position", "position": 1}'
+    )
+    (dir1 / 'bbb.json').write_text('{"position": 2}')
+    (dir1 / 'ddd.json').write_text('{"position": 1}')
+    dir2 = tmp_path / 'dir2/'
+    dir2.mkdir()
+    (dir2 / 'eee.json').write_text('{"title": "eee"}')
+
+
+def test_update_pages(tmp_path):
+    """Add, modify and delete pages."""
+    create_content(tmp_path)
+    som = SOM(tmp_path)
+
+    (tmp_path / 'bbb.json').write_text('{"title": "bbb"}')
+    (tmp_path / 'dir1/bbb.json').write_text('{"position": 0}')
+    (tmp_path / 'ccc.md').unlink()
+    som.update(
+        added=[tmp_path / 'bbb.json'],
+        modified=[tmp_path / 'dir1/bbb.json'],
+        deleted=[tmp_path / 'ccc.md'],
+    )
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.list_names() == [
+        'aaa.json', 'bbb.json', 'dir1', 'dir1/bbb.json', 'dir1/ddd.json', 'dir2', 'dir2/eee.json'
+    ]
+
+
+def test_update_dir_data(tmp_path):
+    """Add, modify and delete underscore files."""
+    create_content(tmp_path)
+    som = SOM(tmp_path)
+
+    (tmp_path / '_values.json').write_text('{"_sorting_method": "name", "site": "eggs"}')
+    (tmp_path / 'dir1/_values.json').unlink()
+    (tmp_path / 'dir2/_values.yaml').write_text('site: ham')
+    som.update(
+        added=[tmp_path / 'dir2/_values.yaml'],
+        modified=[tmp_path / '_values.json'],
+        deleted=[tmp_path / 'dir1/_values.json'],
+    )
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.map['dir2/eee.json'].data['site'] == 'ham'
+    assert som.map['dir1/bbb.json'].data['site'] == 'eggs'
+
+
+def test_update_dirs(tmp_path):
+    """Add and delete whole directories."""
+    create_content(tmp_path)
+    som = SOM(tmp_path)
+
+    shutil.rmtree(tmp_path / 'dir1')
+    dir3 = tmp_path / 'dir3/subdir/'
+    dir3.mkdir(parents=True)
+    (dir3 / 'fff.json').write_text('{"title": "fff"}')
+    (dir3 / 'ggg.json').write_text('{"title": "ggg"}')
+    (tmp_path / 'dir2/eee.json').unlink()
+    som.update(
+        added=[tmp_path / 'dir3'],
+        deleted=[tmp_path / 'dir1', tmp_path / 'dir2/eee.json'],
+    )
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.list_names() == [
+        'aaa.json', 'ccc.md', 'dir3', 'dir3/subdir', 'dir3/subdir/fff.json',
+        'dir3/subdir/ggg.json',
+    ]
+
+
+def test_update_new_dir_sorted_first(tmp_path):
+    """Add a directory that goes before its existing siblings."""
+    create_content(tmp_path)
+    som = SOM(tmp_path)
+
+    new_dir = tmp_path / 'a/'
+    new_dir.mkdir()
+    (new_dir / 'xxx.json').write_text('{"title": "xxx"}')
+    som.update(added=[new_dir / 'xxx.json'])
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.list_names()[:3] == ['a', 'a/xxx.json', 'aaa.json']
+
+
+def test_update_emptied_dirs(tmp_path):
+    """Delete the last page of directories so that they're left empty."""
+    create_content(tmp_path)
+    (tmp_path / 'dir2/empty/').mkdir()
+    (tmp_path / 'dir2/data/').mkdir()
+    (tmp_path / 'dir2/data/_values.json').write_text('{"title": "data"}')
+    som = SOM(tmp_path)
+    dir2_url = som.map['dir2'].url
+
+    (tmp_path / 'dir2/eee.json').unlink()
+    som.update(deleted=[tmp_path / 'dir2/eee.json'])
+
+    check_same_som(som, SOM(tmp_path))
+    assert 'dir2' not in som.map
+    assert dir2_url not in som.by_url
+
+    (tmp_path / 'dir2/data/fff.json').write_text('{}')
+    som.update(added=[tmp_path / 'dir2/data/fff.json'])
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.map['dir2/data/fff.json'].data['title'] == 'data'
+
+
+def test_update_urls(tmp_path):
+    """Change the urls set explicitly in the data of the nodes."""
+    create_content(tmp_path)
+    som = SOM(tmp_path)
+
+    (tmp_path / 'aaa.json').write_text('{"title": "aaa", "_url": "/a/"}')
+    (tmp_path / 'dir1/bbb.json').unlink()
+    som.update(
+        modified=[tmp_path / 'aaa.json'],
+        deleted=[tmp_path / 'dir1/bbb.json'],
+    )
+
+    check_same_som(som, SOM(tmp_path))
+    assert som.by_url['/a/'] is som.map['aaa.json']
+    assert '/aaa.html' not in som.by_url
+    assert '/dir1/bbb.html' not in som.by_url
+
+
+def test_update_pages_sorted_last(tmp_path):
+    """Update pages that the sorting method of their directory sorts last."""
+    create_content(tmp_path)
+    (tmp_path / 'dir1/_values.json').write_text(
+        '{"_sorting_method": "field", "_sorting_data": "order"}'
+    )
+    (tmp_path / 'dir1/bbb.json').write_text('{"order": 2}')
+    (tmp_path / 'dir1/ddd.json').write_text('{"order": 1}')
+    (tmp_path / 'dir1/ccc.json').write_text('{"title": "ccc"}')
+    som = SOM(tmp_path)
+    assert som.list_names()[3:6] == ['dir1/ddd.json', 'dir1/bbb.json', 'dir1/ccc.json']
+
+    (tmp_path / 'dir1/ccc.json').write_text('{"order": 0}')
+    som.update(modified=[tmp_path / 'dir1/ccc.json'])
+    check_same_som(som, SOM(tmp_path))
+    assert som.list_names()[3:6] == ['dir1/ccc.json', 'dir1/ddd.json', 'dir1/bbb.json']
+
+    (tmp_path / 'dir1/ccc.json').write_text('{}')
+    som.update(modified=[tmp_path / 'dir1/ccc.json'])
+    check_same_som(som, SOM(tmp_path))
+    assert som.list_names()[3:6] == ['dir1/ddd.json', 'dir1/bbb.json', 'dir1/ccc.json']
+
+    shutil.rmtree(tmp_path / 'dir1')
+    som.update(deleted=[tmp_path / 'dir1'])
+    check_same_som(som, SOM(tmp_path))
+    assert 'dir1/ccc.json' not in som.map
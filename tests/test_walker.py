@@ -0,0 +1,47 @@
+
+from spekulatio.som import SOM
+from spekulatio.walker import scan_tree
+
+
+def create_tree(tmp_path):
+    # input file tree:
+    #   foo.json
+    #   dir1/
+    #     bar.json
+    #     dir2/
+    #       baz.txt
+    #   dir3/
+    (tmp_path / 'foo.json').write_text('{}')
+    dir2 = tmp_path / 'dir1/dir2/'
+    dir2.mkdir(parents=True)
+    (tmp_path / 'dir1/bar.json').write_text('{}')
+    (dir2 / 'baz.txt').write_text('baz')
+    (tmp_path / 'dir3').mkdir()
+
+
+def test_scan_tree(tmp_path):
+    """Check that a directory tree is read in a single pass."""
+    create_tree(tmp_path)
+
+    for jobs in (1, 4):
+        tree = scan_tree(tmp_path, jobs=jobs)
+        assert tree.relative_path == ''
+        files = sorted(tree.iter_files(), key=lambda item: item[0])
+        assert [relative_path for relative_path, _ in files] == [
+            'dir1/bar.json', 'dir1/dir2/baz.txt', 'foo.json',
+        ]
+        assert [entry.path for _, entry in files] == [
+            str(tmp_path / relative_path) for relative_path, _ in files
+        ]
+        assert all(entry.stat().st_size > 0 for _, entry in files)
+        assert sorted(subdir.relative_path for subdir in tree.iter_dirs()) == ['dir1', 'dir3']
+
+
+def test_shared_scan(tmp_path):
+    """Check that a som can be created out of an existing scan."""
+    create_tree(tmp_path)
+
+    tree = scan_tree(tmp_path)
+    som = SOM(tmp_path, tree=tree)
+    assert sorted(som.map) == sorted(SOM(tmp_path).map)
+    assert str(som.map['dir1/bar.json'].path) == 'dir1/bar.json'
@@ -0,0 +1,38 @@
+
+from spekulatio.watcher import take_snapshot
+from spekulatio.watcher import compare_snapshots
+from spekulatio.watcher import PollingWatcher
+
+
+def test_compare_snapshots(tmp_path):
+    """Check that added, modified and deleted files are detected."""
+
+    foo = tmp_path / 'foo.txt'
+    foo.write_text('foo')
+    bar = tmp_path / 'bar.txt'
+    bar.write_text('bar')
+    baz = tmp_path / 'dir1' / 'baz.txt'
+    baz.parent.mkdir()
+    baz.write_text('baz')
+
+    old_snapshot = take_snapshot([tmp_path])
+    assert compare_snapshots(old_snapshot, take_snapshot([tmp_path])) == set()
+
+    foo.unlink()
+    bar.write_text('new bar')
+    spam = tmp_path / 'dir1' / 'spam.txt'
+    spam.write_text('spam')
+
+    new_snapshot = take_snapshot([tmp_path])
+    assert compare_snapshots(old_snapshot, new_snapshot) == {str(foo), str(bar), str(spam)}
+
+
+def test_polling_watcher(tmp_path):
+    """Check that the polling watcher returns the changed files."""
+
+    foo = tmp_path / 'foo.txt'
+    foo.write_text('foo')
+
+    watcher = PollingWatcher([tmp_path], interval=0.01)
+    foo.write_text('new foo')
+    assert watcher.wait() == {str(foo)}